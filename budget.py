@@ -0,0 +1,159 @@
+"""
+NI/EU Law Tracker - Run Time Budget
+A deadline for the whole run (--time-budget). Sources ask the budget
+before each unit of upstream work and defer whatever no longer fits;
+every request's timeout is capped by the time left, so nothing started
+late can overrun it. Deferred work is written to the state directory at
+the end of the run and taken up first by the next one.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+
+from checkpoint import STATE_DIR
+
+DEFERRED_FILE = os.path.join(STATE_DIR, 'deferred.json')
+
+# Seconds held back at the end for writing what was fetched: new upstream
+# work stops once only this much is left (at most a tenth of the budget)
+WRITE_RESERVE = float(os.environ.get('TIME_BUDGET_RESERVE', 120))
+
+# Shortest timeout a request is given, however close the deadline
+MIN_TIMEOUT = 5
+
+# Kinds of deferred work a later run picks up; the rest are only reported
+CARRIED_OVER = ('cellar', 'rss', 'oj', 'topics', 'refresh', 'feedback', 'rescore', 'partitions')
+
+# Labels for the deferred-work summary
+DEFERRED_LABELS = {
+    'cellar': 'runs of CELLAR pages',
+    'rss': 'RSS feed fetches',
+    'oj': 'Official Journal days',
+    'enrich': 'RSS acts left unenriched',
+    'topics': 'consultation topics',
+    'refresh': 'consultation re-checks',
+    'feedback': 'consultation feedback counts',
+    'rescore': 'rescore pages',
+    'partitions': 'backfill partitions',
+    'parts': 'pipelines stopped part-way',
+}
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of sending a request once the deadline has passed"""
+
+
+def parse_duration(value):
+    """'5400', '90m', '1h30m' or '45s' -> seconds"""
+    parts = re.fullmatch(r'\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*(?:(\d+)s?)?\s*', value or '')
+    if not parts or not any(parts.groups()):
+        raise ValueError(f"not a duration: '{value}'")
+    hours, minutes, seconds = (int(part or 0) for part in parts.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class Budget:
+    """
+    Deadline plus a record of the work deferred because of it
+    With no seconds there is no deadline: allows() is always true and
+    timeout() hands back the default.
+    """
+
+    def __init__(self, seconds=None, carried=None):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.reserve = min(WRITE_RESERVE, seconds / 10) if seconds else 0
+        self.carried = carried or {}
+        self.taken = set()
+        self.deferred = {}
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def allows(self, kind=None, *items):
+        """
+        True while there is time to start more upstream work
+        Otherwise the items are recorded as deferred under kind.
+        """
+        remaining = self.remaining()
+        if remaining is None or remaining > self.reserve:
+            return True
+        if kind:
+            self.defer(kind, *items)
+        return False
+
+    def take(self, kind):
+        """Work of one kind deferred by the last run, for a source to do first"""
+        self.taken.add(kind)
+        return self.carried.get(kind, [])
+
+    def defer(self, kind, *items):
+        with self._lock:
+            self.deferred.setdefault(kind, []).extend(items)
+
+    def timeout(self, default, fetching=True):
+        """
+        A request timeout no longer than the time left
+        Fetches must also be done before the write reserve starts; writes
+        may use it.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise BudgetExhausted(f"time budget of {self.seconds:.0f}s used up")
+        limit = remaining - self.reserve if fetching else remaining
+        return min(max(min(default or limit, limit), MIN_TIMEOUT), remaining)
+
+    def summary(self):
+        return ', '.join(
+            f"{len(items)} {DEFERRED_LABELS.get(kind, kind)}" for kind, items in sorted(self.deferred.items())
+        )
+
+
+def load_deferred(path=DEFERRED_FILE):
+    """Work deferred by the last budgeted run, {kind: [items]}"""
+    try:
+        with open(path) as f:
+            return json.load(f).get('deferred', {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_deferred(budget, run_id, path=DEFERRED_FILE):
+    """
+    Record this run's deferred work for the next run, or clear the record
+    Carried-over work this run had no source for (another command's) is
+    kept as it was.
+    """
+    deferred = {kind: items for kind, items in budget.carried.items() if kind not in budget.taken}
+    for kind, items in budget.deferred.items():
+        if kind in CARRIED_OVER:
+            deferred[kind] = items
+    if not deferred:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'run_id': run_id,
+            'saved': datetime.now().isoformat(),
+            'deferred': deferred,
+        }, f, indent=2, default=str)
+
+
+# No deadline until a run sets one with start()
+BUDGET = Budget()
+
+
+def start(seconds=None, carried=None):
+    """Begin the run's budget; returns it"""
+    global BUDGET
+    BUDGET = Budget(seconds, carried)
+    return BUDGET
@@ -0,0 +1,112 @@
+"""
+NI/EU Law Tracker - CELEX Metadata Cache
+Persistent SQLite cache of what CELLAR says about an act: title, document
+date, resource type and the acts it amends. Published metadata almost
+never changes, so lookups read the cache first and only ask CELLAR about
+acts that are missing or expired. Acts CELLAR does not know are cached
+too, for a shorter time, so a re-run asks nothing at all.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from checkpoint import STATE_DIR
+
+CACHE_FILE = os.path.join(STATE_DIR, 'celex_cache.sqlite')
+
+# Days an entry stays fresh; acts CELLAR did not return are retried sooner
+FOUND_TTL_DAYS = float(os.environ.get('CELEX_CACHE_TTL_DAYS', '90'))
+MISSING_TTL_DAYS = 7
+
+# Entries kept; the least recently used beyond this are evicted
+MAX_ENTRIES = int(os.environ.get('CELEX_CACHE_MAX_ENTRIES', '50000'))
+
+# Keys per SQL IN (...) list
+_CHUNK = 500
+
+
+class CelexCache:
+    """
+    Thread-safe CELEX -> metadata cache with a TTL per entry
+    get_many() returns fresh entries only; a None value means CELLAR had
+    nothing for the act. The database is opened on first use.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS celex_metadata (
+                    celex TEXT PRIMARY KEY,
+                    data TEXT,
+                    expires_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS celex_metadata_used ON celex_metadata (used_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get_many(self, celex_numbers):
+        """{celex: metadata or None} for the fresh entries among celex_numbers"""
+        celex_numbers = list(celex_numbers)
+        now = time.time()
+        found = {}
+        with self._lock:
+            db = self._db()
+            for start in range(0, len(celex_numbers), _CHUNK):
+                chunk = celex_numbers[start:start + _CHUNK]
+                marks = ','.join('?' * len(chunk))
+                for celex, data in db.execute(
+                    f"SELECT celex, data FROM celex_metadata WHERE celex IN ({marks}) AND expires_at > ?",
+                    (*chunk, now)
+                ):
+                    found[celex] = json.loads(data) if data else None
+            db.executemany("UPDATE celex_metadata SET used_at = ? WHERE celex = ?", [(now, c) for c in found])
+            db.commit()
+        self.hits += len(found)
+        self.misses += len(celex_numbers) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """Store {celex: metadata or None}, then evict down to max_entries"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO celex_metadata (celex, data, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                [
+                    (celex, json.dumps(data) if data else None,
+                     now + 86400 * (FOUND_TTL_DAYS if data else MISSING_TTL_DAYS), now)
+                    for celex, data in entries.items()
+                ]
+            )
+            excess = db.execute("SELECT COUNT(*) FROM celex_metadata").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM celex_metadata WHERE celex IN "
+                    "(SELECT celex FROM celex_metadata ORDER BY expires_at <= ? DESC, used_at LIMIT ?)",
+                    (now, excess)
+                )
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+CACHE = CelexCache()
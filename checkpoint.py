@@ -0,0 +1,217 @@
+"""
+NI/EU Law Tracker - Run Checkpoints
+Records completed fetch pages and committed write batches per run id in a
+local JSON state file, so an interrupted run can be resumed with --resume.
+A page can also record where the results carry on after it, so a resumed
+run steps over committed pages without fetching them again. A run also
+keeps the settings its checkpoints depend on (its command line, the order
+it pages in), and a resumed run takes them from there.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+STATE_DIR = os.environ.get('SCRAPER_STATE_DIR', '.scraper_state')
+STATE_FILE = os.path.join(STATE_DIR, 'runs.json')
+PARTITIONS_FILE = os.path.join(STATE_DIR, 'backfill.json')
+
+# Older runs are dropped from the state file beyond this many
+MAX_RUNS_KEPT = 20
+
+
+def new_run_id():
+    """Run ids sort by start time"""
+    return datetime.now().strftime('%Y%m%dT%H%M%S')
+
+
+class RunState:
+    """
+    Checkpoint store for one run
+    Thread-safe: both pipelines mark progress from their own threads.
+    Every mark is flushed to disk immediately, so a killed job loses at
+    most the batch that was in flight.
+    """
+
+    def __init__(self, run_id, path=STATE_FILE):
+        self.run_id = run_id
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._load()
+        self._run = self._data['runs'].setdefault(run_id, {
+            'started': datetime.now().isoformat(),
+            'status': 'running',
+            'pages': [],
+            'batches': [],
+        })
+        self._pages = set(self._run['pages'])
+        self._batches = set(self._run['batches'])
+        self._next = self._run.setdefault('next', {})
+
+    @classmethod
+    def open(cls, resume=None, path=STATE_FILE, command=None):
+        """
+        Start a new run, or resume one
+        resume=None starts fresh; resume='latest' picks the newest run that
+        did not complete (or starts fresh if there is none); any other
+        value is taken as a run id, which must be in the state file. With
+        a command, only a run of that command is resumed.
+        """
+        runs = cls._read(path)['runs']
+        ran = {rid: run.get('settings', {}).get('command', command) for rid, run in runs.items()}
+        if resume == 'latest':
+            unfinished = sorted(rid for rid, run in runs.items()
+                                if run.get('status') != 'complete' and (command is None or ran[rid] == command))
+            resume = unfinished[-1] if unfinished else None
+        elif resume and resume not in runs:
+            known = ', '.join(sorted(runs)[-5:]) or 'none'
+            raise ValueError(f"no checkpoints for run '{resume}' in {path} (latest runs: {known})")
+        elif resume and command is not None and ran[resume] != command:
+            raise ValueError(f"run '{resume}' was a '{ran[resume]}' run, not '{command}'")
+        state = cls(resume or new_run_id(), path)
+        if resume:
+            print(f"Resuming run {state.run_id}: {len(state._pages)} pages, {len(state._batches)} batches already committed")
+        return state
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'runs': {}}
+
+    def _load(self):
+        return self._read(self.path)
+
+    def _flush(self):
+        self._run['pages'] = sorted(self._pages)
+        self._run['batches'] = sorted(self._batches)
+
+        runs = self._data['runs']
+        for old in sorted(runs)[:-MAX_RUNS_KEPT]:
+            if old != self.run_id:
+                del runs[old]
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def setting(self, name, value):
+        """
+        A setting of the run: the value it was first given, so a resumed
+        run keeps what its checkpoints were made with
+        """
+        with self._lock:
+            settings = self._run.setdefault('settings', {})
+            if name not in settings:
+                settings[name] = value
+                self._flush()
+            return settings[name]
+
+    # ------------------------------------------
+    # Fetch pages
+    # ------------------------------------------
+
+    def page_done(self, key):
+        with self._lock:
+            return key in self._pages
+
+    def complete_page(self, key, next_page=None):
+        """
+        Mark a page done; next_page is what the source needs to carry on
+        past it without fetching it (see page_next)
+        """
+        with self._lock:
+            self._pages.add(key)
+            if next_page is not None:
+                self._next[key] = next_page
+            self._flush()
+
+    def page_next(self, key):
+        """What complete_page recorded for a done page, or None"""
+        with self._lock:
+            return self._next.get(key) if key in self._pages else None
+
+    # ------------------------------------------
+    # Write batches
+    # ------------------------------------------
+
+    def batch_done(self, key):
+        with self._lock:
+            return key in self._batches
+
+    def commit_batch(self, key):
+        with self._lock:
+            self._batches.add(key)
+            self._flush()
+
+    def finish(self, status='complete'):
+        with self._lock:
+            self._run['status'] = status
+            self._run['finished'] = datetime.now().isoformat()
+            self._flush()
+
+
+class PartitionLog:
+    """
+    Completed backfill partitions, kept across runs
+    A partition ('2024-03') is recorded once all of its pages committed,
+    so re-running a backfill only fetches partitions that are missing.
+    """
+
+    def __init__(self, path=PARTITIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self._done = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._done = {}
+
+    def is_done(self, partition):
+        with self._lock:
+            return partition in self._done
+
+    def complete(self, partition, run_id, items):
+        with self._lock:
+            self._done[partition] = {
+                'completed': datetime.now().isoformat(),
+                'run_id': run_id,
+                'items': items,
+            }
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self._done, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+
+
+class NullState:
+    """Stand-in when checkpointing is off: nothing is ever done"""
+
+    run_id = None
+
+    def setting(self, name, value):
+        return value
+
+    def page_done(self, key):
+        return False
+
+    def complete_page(self, key, next_page=None):
+        pass
+
+    def page_next(self, key):
+        return None
+
+    def batch_done(self, key):
+        return False
+
+    def commit_batch(self, key):
+        pass
+
+    def finish(self, status='complete'):
+        pass
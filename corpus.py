@@ -0,0 +1,195 @@
+"""
+NI/EU Law Tracker - Local Corpus
+Every record a run fetches, appended to Arrow IPC files on disk, one
+directory per kind and year: <dir>/<kind>/year=YYYY/<run id>-<n>.arrow.
+Files are opened memory-mapped, so a scan of the whole history (for
+re-matching, scoring, training or benchmarks) reads local pages in
+place rather than paging through Supabase. Written by the corpus output
+(sinks.CorpusSink). Needs pyarrow, which is imported on first use, so
+the output is for local runs: the scheduled workflow does not install it.
+"""
+
+import os
+import json
+from dataclasses import fields
+
+from checkpoint import STATE_DIR
+from records import Consultation, Feedback, Legislation
+
+CORPUS_DIR = os.environ.get('CORPUS_DIR', os.path.join(STATE_DIR, 'corpus'))
+
+# Record type and key column of each kind kept in the corpus; feedback
+# pages carry FeedbackCounts, whose new items are what gets kept
+KINDS = {
+    'legislation': (Legislation, 'celex_number'),
+    'consultations': (Consultation, 'initiative_id'),
+    'feedback': (Feedback, 'id'),
+}
+
+# Date a record's year partition is taken from
+YEAR_FIELDS = {
+    'legislation': 'date_published',
+    'consultations': 'date_opened',
+    'feedback': 'date_feedback',
+}
+
+# Partition for records with no usable date
+UNKNOWN_YEAR = 'unknown'
+
+# Files being written; renamed to .arrow once complete, and never read
+PARTIAL_SUFFIX = '.arrow.partial'
+
+# Schema metadata each file is written with: when its run started (the
+# order files are read in) and whether it was a dry run
+STARTED_KEY = b'started'
+DRY_RUN_KEY = b'dry_run'
+
+
+def schema(kind, started=None, dry_run=False):
+    """
+    Arrow schema for a kind, from its record type's fields; dicts are
+    stored as JSON. With started, it carries the file metadata too.
+    """
+    import pyarrow as pa
+
+    types = {str: pa.string(), int: pa.int64(), bool: pa.bool_(), list: pa.list_(pa.string()), dict: pa.string()}
+    record_type, _ = KINDS[kind]
+    kind_schema = pa.schema([(f.name, types[f.type]) for f in fields(record_type)])
+    if started is None:
+        return kind_schema
+    return kind_schema.with_metadata({STARTED_KEY: started.encode(), DRY_RUN_KEY: b'true' if dry_run else b'false'})
+
+
+def records_of(kind, records):
+    """The records of a batch the corpus keeps, as records of KINDS[kind]"""
+    if kind == 'feedback':
+        return [item for count in records for item in count.items]
+    return list(records)
+
+
+def year_of(kind, record):
+    """Year partition of a record: its date's year, else a CELEX number's"""
+    value = str(getattr(record, YEAR_FIELDS[kind]) or '')[:4]
+    if value.isdigit():
+        return value
+    celex = getattr(record, 'celex_number', '')
+    return celex[1:5] if celex[1:5].isdigit() else UNKNOWN_YEAR
+
+
+def row(record, names):
+    values = {}
+    for name in names:
+        value = getattr(record, name)
+        if isinstance(value, dict):
+            value = json.dumps(value, sort_keys=True)
+        elif isinstance(value, list):
+            value = [str(v) for v in value]
+        values[name] = value
+    return values
+
+
+def record_batch(kind, records):
+    """Records of one kind as an Arrow record batch in the kind's schema"""
+    import pyarrow as pa
+
+    kind_schema = schema(kind)
+    return pa.RecordBatch.from_pylist([row(r, kind_schema.names) for r in records], schema=kind_schema)
+
+
+def partition_dir(directory, kind, year):
+    return os.path.join(directory, kind, f"year={year}")
+
+
+class Corpus:
+    """
+    Read side of the corpus: memory-mapped, zero-copy record batches
+    Files are read in the order their runs started (from the file
+    metadata), so for a key stored more than once the last row is the
+    newest. Files written by dry runs are left out unless dry_runs is set.
+    """
+
+    def __init__(self, directory=CORPUS_DIR, dry_runs=False):
+        self.directory = directory
+        self.dry_runs = dry_runs
+
+    def years(self, kind):
+        root = os.path.join(self.directory, kind)
+        if not os.path.isdir(root):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(root) if name.startswith('year='))
+
+    def files(self, kind, years=None):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        found = []
+        for year in years or self.years(kind):
+            folder = partition_dir(self.directory, kind, year)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if not name.endswith('.arrow'):
+                    continue
+                path = os.path.join(folder, name)
+                metadata = ipc.open_file(pa.memory_map(path, 'r')).schema.metadata or {}
+                if metadata.get(DRY_RUN_KEY) == b'true' and not self.dry_runs:
+                    continue
+                found.append((metadata.get(STARTED_KEY, b''), path))
+        return [path for _, path in sorted(found)]
+
+    def batches(self, kind, years=None, columns=None):
+        """
+        Yield the record batches of a kind, optionally only some years and
+        columns. The batches point into the mapped files, which stay mapped
+        for as long as a batch (or anything sliced from it) is referenced.
+        """
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        for path in self.files(kind, years):
+            reader = ipc.open_file(pa.memory_map(path, 'r'))
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns else batch
+
+    def table(self, kind, years=None, columns=None):
+        """All batches of a kind as one table, still backed by the mapped files"""
+        import pyarrow as pa
+
+        chosen = schema(kind)
+        if columns:
+            chosen = pa.schema([chosen.field(name) for name in columns])
+        return pa.Table.from_batches(list(self.batches(kind, years, columns)), schema=chosen)
+
+    def latest(self, kind, years=None, columns=None):
+        """Like table(), but only the newest row of each key"""
+        import pyarrow as pa
+
+        _, key = KINDS[kind]
+        wanted = list(columns) if columns else None
+        if wanted and key not in wanted:
+            wanted.append(key)
+        table = self.table(kind, years, wanted)
+        if not table.num_rows:
+            return table
+        order = pa.array(range(table.num_rows), pa.int64())
+        newest = table.select([key]).append_column('row', order).group_by(key).aggregate([('row', 'max')])
+        table = table.take(newest['row_max'].sort())
+        return table.select(list(columns)) if columns else table
+
+    def summary(self):
+        """{kind: {year: (rows, bytes)}} for everything in the corpus"""
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        found = {}
+        for kind in KINDS:
+            for year in self.years(kind):
+                rows = size = 0
+                for path in self.files(kind, [year]):
+                    reader = ipc.open_file(pa.memory_map(path, 'r'))
+                    rows += sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+                    size += os.path.getsize(path)
+                if rows:
+                    found.setdefault(kind, {})[year] = (rows, size)
+        return found
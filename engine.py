@@ -0,0 +1,157 @@
+"""
+NI/EU Law Tracker - Async I/O Engine
+One asyncio event loop, in a background thread, on which fetches and
+writes run as concurrent tasks. Each host has a semaphore sized by its
+concurrency in the request scheduler, so tasks queued for a busy host
+wait on the loop rather than holding a thread. Requests are still sent
+by the scheduler (rate limits, retries, time budget) on its pooled
+keep-alive sessions, from a worker pool. Synchronous code uses run(),
+gather() and imap(), so existing callers and stages stay as they are.
+"""
+
+import os
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import profiling
+import scheduler
+
+# Worker threads for sending requests, and for blocking calls (parsing a
+# streamed response, a sink's write)
+IO_WORKERS = int(os.environ.get('ENGINE_IO_WORKERS', 16))
+CALL_WORKERS = int(os.environ.get('ENGINE_CALL_WORKERS', 8))
+
+# Marks the end of imap()'s items
+_END = object()
+
+
+def _labelled(label, fn, *args, **kwargs):
+    with profiling.label(label):
+        return fn(*args, **kwargs)
+
+
+class Engine:
+    """
+    Event loop thread plus the pools its tasks hand blocking work to
+    The loop starts on first use. Coroutines are awaited on the loop;
+    run() and friends are for callers on any other thread.
+    """
+
+    def __init__(self, io_workers=IO_WORKERS, call_workers=CALL_WORKERS):
+        self.io_workers = io_workers
+        self.call_workers = call_workers
+        self._loop = None
+        self._thread = None
+        self._io = None
+        self._calls = None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='engine-io')
+                self._calls = ThreadPoolExecutor(max_workers=self.call_workers, thread_name_prefix='engine-call')
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='engine', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def concurrency(self, url):
+        """Requests the scheduler lets run at once against url's host"""
+        return scheduler.SCHEDULER.limiter(urlsplit(url).hostname or '').concurrency
+
+    def _semaphore(self, host):
+        # Only touched from the loop thread
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(scheduler.SCHEDULER.limiter(host).concurrency)
+        return self._semaphores[host]
+
+    # ------------------------------------------
+    # Coroutines (await these on the loop)
+    # ------------------------------------------
+
+    async def request(self, method, url, stage='default', **kwargs):
+        """scheduler.request as a task; waits for a slot on the host first"""
+        async with self._semaphore(urlsplit(url).hostname or ''):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._io, partial(_labelled, stage, scheduler.request, method, url, stage=stage, **kwargs)
+            )
+
+    async def call(self, fn, *args, label=None, **kwargs):
+        """Run a blocking function in the call pool"""
+        work = partial(_labelled, label, fn, *args, **kwargs) if label else partial(fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._calls, work)
+
+    # ------------------------------------------
+    # Synchronous wrappers (call these from any other thread)
+    # ------------------------------------------
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop; returns a concurrent Future"""
+        loop = self.loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("blocking on the engine from its own loop; await instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine to completion and return its result"""
+        return self.submit(coro).result(timeout)
+
+    def gather(self, coros):
+        """Run coroutines concurrently; their results in order"""
+        async def together():
+            return await asyncio.gather(*coros)
+        return self.run(together())
+
+    def imap(self, fn, items, window):
+        """
+        Yield the result of coroutine fn(item) for each item, in order,
+        with up to window of them in flight. Items are drawn one at a time
+        as earlier results are taken, so checks made while producing them
+        (the time budget, an end of results) see the latest state.
+        Closing the generator cancels what is still in flight.
+        """
+        items = iter(items)
+        in_flight = deque()
+
+        def top_up():
+            while len(in_flight) < window:
+                item = next(items, _END)
+                if item is _END:
+                    return
+                in_flight.append(self.submit(fn(item)))
+
+        try:
+            top_up()
+            while in_flight:
+                yield in_flight.popleft().result()
+                top_up()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def close(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._io.shutdown(wait=False)
+            self._calls.shutdown(wait=False)
+            self._loop = None
+            self._semaphores = {}
+
+
+ENGINE = Engine()
+
+
+def run(coro, timeout=None):
+    """Module-level shortcut for the shared engine"""
+    return ENGINE.run(coro, timeout)
@@ -6,9 +6,16 @@ One-time script to import foundational EU legislation from Windsor Framework Ann
 import os
 import re
 import json
-import requests
+import argparse
 from datetime import datetime
 
+import profiling
+import scheduler
+from profiling import Profiler
+from records import Legislation
+from scoring import analysis_for, lookup_celex, match_legislation_stage, score_legislation_stage
+from sinks import FILE_OUTPUTS, build_sinks, parse_outputs
+
 # ============================================
 # CONFIGURATION
 # ============================================
@@ -279,51 +286,6 @@ ANNEX2_BASELINE = [
 ]
 
 
-def fetch_legislation_details(celex):
-    """
-    Fetch additional details from EUR-Lex for a CELEX number
-    """
-    sparql_endpoint = "https://publications.europa.eu/webapi/rdf/sparql"
-    
-    query = f"""
-    PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
-    
-    SELECT ?title ?date WHERE {{
-        ?work cdm:resource_legal_id_celex "{celex}" .
-        ?work cdm:work_date_document ?date .
-        ?expr cdm:expression_belongs_to_work ?work .
-        ?expr cdm:expression_uses_language <http://publications.europa.eu/resource/authority/language/ENG> .
-        ?expr cdm:expression_title ?title .
-    }}
-    LIMIT 1
-    """
-    
-    try:
-        response = requests.post(
-            sparql_endpoint,
-            data={'query': query},
-            headers={
-                'Accept': 'application/sparql-results+json',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'User-Agent': 'NI-EU-Law-Tracker/1.0'
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            results = response.json()
-            bindings = results.get('results', {}).get('bindings', [])
-            if bindings:
-                return {
-                    'title': bindings[0].get('title', {}).get('value'),
-                    'date': bindings[0].get('date', {}).get('value', '')[:10]
-                }
-    except Exception as e:
-        print(f"    Could not fetch details for {celex}: {e}")
-    
-    return None
-
-
 def determine_legislation_type(celex):
     """Determine type from CELEX number"""
     if len(celex) >= 6:
@@ -337,49 +299,44 @@ def determine_legislation_type(celex):
     return 'Other'
 
 
-def save_to_supabase(item):
-    """Save a single legislation item to Supabase"""
+def save_to_supabase(items):
+    """
+    Save baseline legislation to Supabase in one bulk upsert
+    Returns ({celex: legislation id}, errors)
+    """
     if not SUPABASE_KEY:
-        return False
+        return {}, ['No API key']
     
     headers = {
         'apikey': SUPABASE_KEY,
         'Authorization': f'Bearer {SUPABASE_KEY}',
         'Content-Type': 'application/json',
-        'Prefer': 'resolution=merge-duplicates'
+        'Prefer': 'resolution=merge-duplicates,return=representation'
     }
     
-    data = {
-        'celex_number': item['celex'],
-        'title': item['title'],
-        'legislation_type': item['type'],
-        'category_number': item['category'],
-        'is_baseline': True,
-        'is_direct_annex2_match': True,
-        'is_keyword_match': False,
-        'date_published': item.get('date'),
-        'eurlex_url': f"https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:{item['celex']}",
-        'status': 'active',
-        'date_scraped': datetime.now().isoformat()
-    }
+    now = datetime.now().isoformat()
+    data = [item.to_payload(is_baseline=True, status='active', date_scraped=now) for item in items]
     
     try:
-        response = requests.post(
-            f"{SUPABASE_URL}/rest/v1/legislation",
+        response = scheduler.request(
+            'POST',
+            f"{SUPABASE_URL}/rest/v1/legislation?on_conflict=celex_number",
+            stage='save_legislation',
             headers=headers,
             json=data,
-            timeout=30
+            timeout=60
         )
-        return response.status_code in [200, 201, 409]
+        if response.status_code in [200, 201]:
+            return {row['celex_number']: row['id'] for row in response.json()}, []
+        return {}, [f"legislation: {response.status_code}"]
     except Exception as e:
-        print(f"    Error saving {item['celex']}: {e}")
-        return False
+        return {}, [f"legislation: {e}"]
 
 
-def save_analysis(celex, category):
-    """Save analysis results for baseline legislation"""
-    if not SUPABASE_KEY:
-        return False
+def save_analysis(items, legislation_ids):
+    """Save analysis results for baseline legislation, one bulk upsert"""
+    if not legislation_ids:
+        return 0, []
     
     headers = {
         'apikey': SUPABASE_KEY,
@@ -388,46 +345,112 @@ def save_analysis(celex, category):
         'Prefer': 'resolution=merge-duplicates'
     }
     
-    # Get legislation ID
+    # Scored like any other act, so rescoring gives the same answer
+    data = [
+        analysis_for(item, legislation_ids[item.celex_number]).to_payload()
+        for item in items
+        if item.celex_number in legislation_ids
+    ]
+    
     try:
-        response = requests.get(
-            f"{SUPABASE_URL}/rest/v1/legislation?celex_number=eq.{celex}&select=id",
+        response = scheduler.request(
+            'POST',
+            f"{SUPABASE_URL}/rest/v1/analysis_results?on_conflict=legislation_id",
+            stage='save_analysis',
             headers=headers,
-            timeout=30
+            json=data,
+            timeout=60
         )
+        if response.status_code in [200, 201]:
+            return len(data), []
+        return 0, [f"analysis_results: {response.status_code}"]
+    except Exception as e:
+        return 0, [f"analysis_results: {e}"]
+
+
+def write_baseline(items):
+    """Supabase writer for the baseline: the acts, then their analysis rows"""
+    ids, errors = save_to_supabase(items)
+    analysed, analysis_errors = save_analysis(items, ids)
+    return {'inserted': len(ids), 'analysed': analysed, 'errors': errors + analysis_errors}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import the Windsor Framework Annex 2 baseline")
+    parser.add_argument('--output', action='append', metavar='SPEC',
+                        help="where to write: supabase (default), jsonl[:DIR], parquet[:DIR] or corpus[:DIR]; repeat for several")
+    parser.add_argument('--dry-run', action='store_true', help="fetch titles but write nothing to Supabase")
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='DIR',
+                        help="sample the import and write profiles to DIR (default: profile)")
+    args = parser.parse_args(argv)
+    try:
+        args.outputs = parse_outputs(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.dry_run:
+        args.outputs = [output for output in args.outputs if output[0] != 'supabase']
+    return args
+
+
+def fetch_baseline():
+    """Look up titles for every baseline act in batches and build its record"""
+    print(f"Looking up {len(ANNEX2_BASELINE)} acts in CELLAR...")
+    details = lookup_celex(item['celex'] for item in ANNEX2_BASELINE)
+    
+    items = []
+    for i, item in enumerate(ANNEX2_BASELINE):
+        celex = item['celex']
+        category = item['category']
+        found = details.get(celex) or {}
+        
+        print(f"\n[{i+1}/{len(ANNEX2_BASELINE)}] {celex}")
+        
+        if found.get('title'):
+            title = found['title']
+            provenance = {'title': 'cellar-lookup'}
+            print(f"    Found: {title[:60]}...")
+        else:
+            title = item['title']
+            provenance = {'title': 'annex2-list'}
+            print(f"    Using fallback: {title[:60]}...")
+        if found.get('date'):
+            provenance['date_published'] = 'cellar-lookup'
         
-        if response.status_code == 200:
-            results = response.json()
-            if results:
-                leg_id = results[0]['id']
-                
-                # Baseline legislation gets high scores
-                analysis_data = {
-                    'legislation_id': leg_id,
-                    'score_category_match': 10,  # Direct Annex 2 match
-                    'score_consumer_relevance': 3,  # Assume high for baseline
-                    'score_consultation': 0,
-                    'score_dsc': 0,
-                    'score_legislation_type': 2,
-                    'total_score': 15,  # Base score for baseline legislation
-                    'priority_level': 'high',
-                    'calculated_at': datetime.now().isoformat()
-                }
-                
-                response = requests.post(
-                    f"{SUPABASE_URL}/rest/v1/analysis_results",
-                    headers=headers,
-                    json=analysis_data,
-                    timeout=30
-                )
-                return response.status_code in [200, 201, 409]
-    except:
-        pass
-    
-    return False
+        # Prepare item
+        items.append(Legislation(
+            celex_number=celex,
+            title=title,
+            legislation_type=determine_legislation_type(celex),
+            category_number=category,
+            date_published=found.get('date'),
+            is_baseline=True,
+            is_direct_annex2_match=True,
+            provenance=provenance
+        ))
+    
+    # A few acts are listed under two categories; as with the old
+    # one-by-one saves, the later listing wins
+    items = list({item.celex_number: item for item in items}.values())
+    
+    # Same match and score stages as scraped acts; baseline acts keep their
+    # listed category and are scored on it
+    return next(score_legislation_stage(match_legislation_stage([items])))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return run_import(args)
+    
+    profiler = Profiler(args.profile).start()
+    try:
+        return run_import(args)
+    finally:
+        profiler.stop()
+        profiler.print_report()
 
 
-def main():
+def run_import(args):
     print("=" * 60)
     print("NI/EU Law Tracker - Historical Baseline Import")
     print(f"Started at: {datetime.now().isoformat()}")
@@ -435,59 +458,33 @@ def main():
     print(f"SUPABASE_KEY: {'SET' if SUPABASE_KEY else 'NOT SET'}")
     print("=" * 60)
     
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    if ('supabase', None) in args.outputs and (not SUPABASE_URL or not SUPABASE_KEY):
         print("ERROR: Missing Supabase credentials")
         return
     
+    sink = build_sinks(args.outputs, {'legislation': write_baseline}, run_id='baseline', dry_run=args.dry_run)
     print(f"\nImporting {len(ANNEX2_BASELINE)} baseline legislation items...")
     
-    saved = 0
-    errors = 0
+    with profiling.label('baseline-details'):
+        items = fetch_baseline()
     
-    for i, item in enumerate(ANNEX2_BASELINE):
-        celex = item['celex']
-        category = item['category']
-        fallback_title = item['title']
-        
-        print(f"\n[{i+1}/{len(ANNEX2_BASELINE)}] {celex}")
-        
-        # Try to fetch real title from EUR-Lex
-        details = fetch_legislation_details(celex)
-        
-        if details and details.get('title'):
-            title = details['title']
-            date = details.get('date')
-            print(f"    Found: {title[:60]}...")
-        else:
-            title = fallback_title
-            date = None
-            print(f"    Using fallback: {fallback_title[:60]}...")
-        
-        # Prepare item
-        leg_item = {
-            'celex': celex,
-            'title': title,
-            'type': determine_legislation_type(celex),
-            'category': category,
-            'date': date
-        }
-        
-        # Save to database
-        if save_to_supabase(leg_item):
-            if save_analysis(celex, category):
-                saved += 1
-                print(f"    ✓ Saved")
-            else:
-                saved += 1
-                print(f"    ✓ Saved (analysis failed)")
-        else:
-            errors += 1
-            print(f"    ✗ Failed to save")
+    # Save everything in one pass through every output
+    with profiling.label('baseline-save'):
+        results = sink.write('legislation', items)
+        results['errors'] += sink.close()['errors']
     
     print("\n" + "=" * 60)
     print(f"Import complete!")
-    print(f"Saved: {saved}")
-    print(f"Errors: {errors}")
+    if 'inserted' in results:
+        print(f"Saved: {results['inserted']}")
+        print(f"Analysis results saved: {results['analysed']}")
+    for output in FILE_OUTPUTS:
+        if f"{output}_rows" in results:
+            print(f"Exported to {output}: {results[f'{output}_rows']} rows")
+    print(f"Errors: {len(results['errors'])}")
+    for error in results['errors']:
+        print(f"  ✗ {error}")
+    scheduler.SCHEDULER.print_report()
     print("=" * 60)
 
 
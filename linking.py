@@ -0,0 +1,145 @@
+"""
+NI/EU Law Tracker - Consultation Linking
+In-memory index over legislation titles and CELEX numbers, used to link
+each consultation to the acts it is most likely about. Built once per run
+from the local mirror; each lookup is a handful of posting-list walks.
+"""
+
+import re
+import math
+import threading
+from collections import Counter, defaultdict
+
+# Links kept per consultation, and the weakest title similarity kept
+MAX_LINKS = 3
+MIN_LINK_SCORE = 0.3
+
+# Added to the similarity of acts in the consultation's Annex 2 category
+CATEGORY_BONUS = 0.1
+
+# Words too common in EU titles to say anything about the subject
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'into', 'under', 'which', 'that',
+    'this', 'their', 'its', 'are', 'certain', 'other', 'as', 'regards',
+    'regarding', 'concerning', 'relating', 'amending', 'repealing',
+    'laying', 'down', 'rules', 'union', 'european', 'commission', 'council',
+    'parliament', 'regulation', 'directive', 'decision', 'implementing',
+    'delegated', 'proposal', 'initiative', 'revision', 'evaluation',
+    'act', 'acts', 'framework', 'measures', 'provisions', 'no', 'eu', 'ec',
+    'eec', 'corrigendum',
+}
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9-]{2,}")
+
+# "Regulation (EU) 2019/1020", "Directive 2001/95/EC", "Regulation (EC) No 178/2002"
+ACT_RE = re.compile(
+    r"\b(Regulation|Directive|Decision)\s*(?:\((?:EU|EC|EEC|Euratom)\)\s*)?(?:No\.?\s*)?(\d{1,4})/(\d{1,4})",
+    re.IGNORECASE
+)
+CELEX_SECTORS = {'regulation': 'R', 'directive': 'L', 'decision': 'D'}
+
+
+def tokens(title):
+    return [t for t in TOKEN_RE.findall((title or '').lower()) if t not in STOPWORDS]
+
+
+def cited_celex(title):
+    """CELEX numbers of acts cited by number in a title"""
+    found = []
+    for kind, first, second in ACT_RE.findall(title or ''):
+        # Directives and recent acts are cited year/number, older
+        # regulations number/year, and pre-1999 directives with a 2-digit year
+        if _is_year(first):
+            year, number = first, second
+        elif _is_year(second):
+            year, number = second, first
+        elif len(first) == 2:
+            year, number = '19' + first, second
+        else:
+            continue
+        found.append(f"3{year}{CELEX_SECTORS[kind.lower()]}{int(number):04d}")
+    return found
+
+
+def _is_year(digits):
+    return len(digits) == 4 and 1950 <= int(digits) <= 2099
+
+
+class LegislationIndex:
+    """TF-IDF inverted index over legislation titles, plus a CELEX lookup"""
+
+    def __init__(self, rows):
+        self.ids = []
+        self.categories = []
+        self.by_celex = {}
+        postings = defaultdict(list)
+
+        for row in rows:
+            doc = len(self.ids)
+            self.ids.append(row['id'])
+            self.categories.append(row.get('category_number'))
+            self.by_celex[row['celex_number']] = doc
+            for token, count in Counter(tokens(row.get('title'))).items():
+                postings[token].append((doc, count))
+
+        total = len(self.ids)
+        self.idf = {token: math.log((total + 1) / (len(docs) + 1)) + 1 for token, docs in postings.items()}
+        self.postings = dict(postings)
+        norms = [0.0] * total
+        for token, docs in self.postings.items():
+            idf = self.idf[token]
+            for doc, count in docs:
+                norms[doc] += (count * idf) ** 2
+        self.norms = [math.sqrt(n) or 1.0 for n in norms]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def links(self, title, category_number=None, limit=MAX_LINKS):
+        """
+        Best matching acts for a consultation title
+        Returns [(legislation id, score, method)], best first. Acts cited by
+        number score 1.0; the rest are scored by cosine similarity of
+        titles, with CATEGORY_BONUS for the consultation's own category.
+        """
+        found = {}
+        for celex in cited_celex(title):
+            doc = self.by_celex.get(celex)
+            if doc is not None:
+                found[doc] = (1.0, 'celex')
+
+        query = Counter(tokens(title))
+        query_norm = math.sqrt(sum((n * self.idf.get(t, 0)) ** 2 for t, n in query.items())) or 1.0
+        scores = defaultdict(float)
+        for token, count in query.items():
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for doc, doc_count in self.postings[token]:
+                scores[doc] += count * doc_count * idf * idf
+
+        for doc, dot in scores.items():
+            score = dot / (query_norm * self.norms[doc])
+            if category_number and self.categories[doc] == category_number:
+                score += CATEGORY_BONUS
+            if score >= MIN_LINK_SCORE and doc not in found:
+                found[doc] = (min(score, 0.99), 'title')
+
+        best = sorted(found.items(), key=lambda item: (-item[1][0], self.ids[item[0]]))[:limit]
+        return [(self.ids[doc], round(score, 3), method) for doc, (score, method) in best]
+
+
+class LazyIndex:
+    """Builds a LegislationIndex from the mirror on first use, once"""
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._index is None:
+                self._index = LegislationIndex(self.mirror.rows('legislation'))
+                print(f"  Indexed {len(self._index)} legislation titles for consultation linking")
+            return self._index
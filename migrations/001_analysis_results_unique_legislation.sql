@@ -0,0 +1,13 @@
+-- NI/EU Law Tracker - one analysis row per legislation item
+-- The scraper and baseline import upsert analysis_results with
+-- on_conflict=legislation_id, so replaying a batch updates rows in place
+-- instead of appending duplicates.
+
+-- Keep only the most recent analysis for each legislation item
+DELETE FROM analysis_results a
+USING analysis_results b
+WHERE a.legislation_id = b.legislation_id
+  AND (a.calculated_at, a.id) < (b.calculated_at, b.id);
+
+ALTER TABLE analysis_results
+    ADD CONSTRAINT analysis_results_legislation_id_key UNIQUE (legislation_id);
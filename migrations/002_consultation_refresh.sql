@@ -0,0 +1,52 @@
+-- NI/EU Law Tracker - deadline-aware consultation refresh
+-- The scraper records when it last checked each consultation and only
+-- re-polls the ones that are closing soon, just opened or stale. It no
+-- longer rewrites days_remaining every day; read it from
+-- consultations_current (or days_remaining(date_closes)) instead.
+
+ALTER TABLE consultations
+    ADD COLUMN IF NOT EXISTS last_checked timestamptz;
+
+CREATE OR REPLACE FUNCTION days_remaining(closes date)
+RETURNS integer
+LANGUAGE sql STABLE
+AS $$
+    SELECT CASE WHEN closes IS NULL THEN NULL ELSE GREATEST(closes - CURRENT_DATE, 0) END
+$$;
+
+CREATE OR REPLACE VIEW consultations_current AS
+SELECT
+    c.id,
+    c.initiative_id,
+    c.title,
+    c.consultation_url,
+    c.date_opened,
+    c.date_closes,
+    days_remaining(c.date_closes) AS days_remaining,
+    c.status,
+    c.legislation_id,
+    c.last_checked,
+    c.date_scraped
+FROM consultations c;
+
+GRANT SELECT ON consultations_current TO anon;
+
+-- legislation_dashboard.consultation_days_remaining read the stored column
+-- too. The view is redefined from its current definition with every
+-- <alias>.days_remaining read replaced by days_remaining(<alias>.date_closes),
+-- so its other columns stay as they are. Re-running this is a no-op.
+DO $$
+DECLARE
+    definition text;
+BEGIN
+    IF to_regclass('legislation_dashboard') IS NULL THEN
+        RETURN;
+    END IF;
+    definition := pg_get_viewdef('legislation_dashboard'::regclass);
+    IF definition !~ '\m\w+\.days_remaining\M' THEN
+        RETURN;
+    END IF;
+    definition := regexp_replace(definition, '\m(\w+)\.days_remaining\M', 'days_remaining(\1.date_closes)', 'g');
+    EXECUTE 'CREATE OR REPLACE VIEW legislation_dashboard AS ' || definition;
+END
+$$;
@@ -0,0 +1,10 @@
+-- NI/EU Law Tracker - conflict targets for bulk upserts
+-- The scraper now writes legislation and consultations as bulk upserts
+-- (on_conflict=celex_number / on_conflict=initiative_id), which PostgREST
+-- can only do against a unique index on the natural key.
+
+CREATE UNIQUE INDEX IF NOT EXISTS legislation_celex_number_key
+    ON legislation (celex_number);
+
+CREATE UNIQUE INDEX IF NOT EXISTS consultations_initiative_id_key
+    ON consultations (initiative_id);
@@ -0,0 +1,22 @@
+-- NI/EU Law Tracker - indexed consultation linking
+-- Consultations are linked to their best matching acts by an in-memory
+-- title/CELEX index in the scraper. Up to three links per consultation go
+-- in consultation_links; the best one stays on consultations.legislation_id
+-- with its similarity in link_score. method is 'celex' when the act is
+-- cited by number in the consultation title (score 1.0), else 'title'.
+
+CREATE TABLE IF NOT EXISTS consultation_links (
+    initiative_id text NOT NULL,
+    legislation_id bigint NOT NULL REFERENCES legislation (id) ON DELETE CASCADE,
+    score real NOT NULL,
+    rank smallint NOT NULL,
+    method text NOT NULL,
+    linked_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (initiative_id, legislation_id)
+);
+
+CREATE INDEX IF NOT EXISTS consultation_links_legislation_id
+    ON consultation_links (legislation_id);
+
+ALTER TABLE consultations
+    ADD COLUMN IF NOT EXISTS link_score real;
@@ -0,0 +1,7 @@
+-- NI/EU Law Tracker - per-field provenance for fused legislation records
+-- The scraper fuses CELLAR, RSS and batched CELLAR lookups per CELEX and
+-- records where each field came from, e.g.
+-- {"title": "cellar", "date_published": "cellar-lookup"}.
+
+ALTER TABLE legislation
+    ADD COLUMN IF NOT EXISTS provenance jsonb NOT NULL DEFAULT '{}'::jsonb;
@@ -0,0 +1,121 @@
+-- NI/EU Law Tracker - change feed for incremental dashboard sync
+-- Every insert, every real update and every delete of legislation,
+-- analysis_results and consultations is logged with the dashboard row
+-- (legislation id) it affects. Updates that only touch bookkeeping
+-- timestamps are not logged. The scraper sends an X-Change-Op: rescore
+-- header on rescore writes, so those are logged as 'rescore' rather than
+-- 'update'. Deleting an act is logged as 'delete'.
+--
+-- The dashboard caches legislation_dashboard locally and asks for
+-- dashboard_changes_since(the highest change_log id it has seen) instead
+-- of the whole view. Writers to change_log take a transaction-scoped lock
+-- first, so ids are handed out in commit order: once an id is visible,
+-- no lower id can still appear. (changed_at is transaction start time, so
+-- it could not be used as the cursor.) The dashboard reloads in full once
+-- its cache is older than 30 days, so change_log rows older than that can
+-- be deleted at will.
+
+CREATE TABLE IF NOT EXISTS change_log (
+    id bigserial PRIMARY KEY,
+    table_name text NOT NULL,
+    row_id bigint NOT NULL,
+    legislation_id bigint,
+    op text NOT NULL CHECK (op IN ('insert', 'update', 'rescore', 'delete')),
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE change_log DROP CONSTRAINT IF EXISTS change_log_op_check;
+ALTER TABLE change_log ADD CONSTRAINT change_log_op_check
+    CHECK (op IN ('insert', 'update', 'rescore', 'delete'));
+
+CREATE INDEX IF NOT EXISTS change_log_changed_at ON change_log (changed_at);
+
+CREATE OR REPLACE FUNCTION log_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    bookkeeping text[] := ARRAY['date_scraped', 'calculated_at', 'last_checked'];
+    requested text := NULLIF(current_setting('request.headers', true), '')::json ->> 'x-change-op';
+    new_leg bigint;
+    old_leg bigint;
+BEGIN
+    IF TG_OP = 'UPDATE' AND (to_jsonb(NEW) - bookkeeping) = (to_jsonb(OLD) - bookkeeping) THEN
+        RETURN NEW;
+    END IF;
+
+    -- Held to commit: a concurrent writer waits here, so its ids come after ours
+    PERFORM pg_advisory_xact_lock(hashtext('change_log'));
+
+    IF TG_OP = 'DELETE' THEN
+        old_leg := CASE WHEN TG_TABLE_NAME = 'legislation' THEN OLD.id
+                        ELSE (to_jsonb(OLD) ->> 'legislation_id')::bigint END;
+        INSERT INTO change_log (table_name, row_id, legislation_id, op)
+        VALUES (TG_TABLE_NAME, OLD.id, old_leg,
+                CASE WHEN TG_TABLE_NAME = 'legislation' THEN 'delete' ELSE COALESCE(requested, 'update') END);
+        RETURN OLD;
+    END IF;
+
+    new_leg := CASE WHEN TG_TABLE_NAME = 'legislation' THEN NEW.id
+                    ELSE (to_jsonb(NEW) ->> 'legislation_id')::bigint END;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO change_log (table_name, row_id, legislation_id, op)
+        VALUES (TG_TABLE_NAME, NEW.id, new_leg, 'insert');
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO change_log (table_name, row_id, legislation_id, op)
+    VALUES (TG_TABLE_NAME, NEW.id, new_leg, COALESCE(requested, 'update'));
+
+    -- A consultation that moved to another act changes both dashboard rows
+    old_leg := (to_jsonb(OLD) ->> 'legislation_id')::bigint;
+    IF TG_TABLE_NAME = 'consultations' AND old_leg IS DISTINCT FROM new_leg AND old_leg IS NOT NULL THEN
+        INSERT INTO change_log (table_name, row_id, legislation_id, op)
+        VALUES (TG_TABLE_NAME, NEW.id, old_leg, COALESCE(requested, 'update'));
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS legislation_change_log ON legislation;
+CREATE TRIGGER legislation_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON legislation
+    FOR EACH ROW EXECUTE FUNCTION log_change();
+
+DROP TRIGGER IF EXISTS analysis_results_change_log ON analysis_results;
+CREATE TRIGGER analysis_results_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON analysis_results
+    FOR EACH ROW EXECUTE FUNCTION log_change();
+
+DROP TRIGGER IF EXISTS consultations_change_log ON consultations;
+CREATE TRIGGER consultations_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON consultations
+    FOR EACH ROW EXECUTE FUNCTION log_change();
+
+-- "Changes since change id N": one entry per dashboard row touched after
+-- N, with its newest change id and its current row. dashboard_row is NULL
+-- (and op 'delete') for a row that is no longer in the view, whether the
+-- act was deleted or the row left the view, so the client drops it.
+DROP FUNCTION IF EXISTS dashboard_changes_since(timestamptz);
+CREATE OR REPLACE FUNCTION dashboard_changes_since(since bigint)
+RETURNS TABLE (change_id bigint, id bigint, op text, dashboard_row jsonb)
+LANGUAGE sql STABLE
+AS $$
+    SELECT c.change_id, c.legislation_id,
+           CASE WHEN d.id IS NULL THEN 'delete' ELSE c.op END,
+           to_jsonb(d)
+    FROM (
+        SELECT legislation_id, max(id) AS change_id, (array_agg(op ORDER BY id DESC))[1] AS op
+        FROM change_log
+        WHERE id > since AND legislation_id IS NOT NULL
+        GROUP BY legislation_id
+    ) c
+    LEFT JOIN legislation_dashboard d ON d.id = c.legislation_id
+$$;
+
+ALTER TABLE change_log ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "change log is public" ON change_log;
+CREATE POLICY "change log is public" ON change_log FOR SELECT USING (true);
+GRANT SELECT ON change_log TO anon;
+GRANT EXECUTE ON FUNCTION dashboard_changes_since(bigint) TO anon;
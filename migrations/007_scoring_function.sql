@@ -0,0 +1,125 @@
+-- NI/EU Law Tracker - scoring in the database
+-- GENERATED by `python scraper.py score-sql` from ANNEX2_CATEGORIES and the
+-- score weights in scoring.py; do not edit by hand. After changing either,
+-- regenerate and re-apply this file (every statement is CREATE OR REPLACE).
+-- `python scraper.py score-sql --check` fails while it is out of date, and
+-- `python scraper.py score-parity` compares it with calculate_score on a
+-- local Postgres.
+--
+-- legislation_score() is calculate_score plus the analysis_results
+-- breakdown for one act. rescore(ids) rescores the given legislation ids
+-- (all of them for NULL) from their stored match, category and type, and
+-- returns the analysis_results rows it changed. It does not re-match
+-- titles; `python scraper.py rescore` without --in-database does.
+
+CREATE OR REPLACE FUNCTION category_relevance(category integer)
+RETURNS text
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE category
+        WHEN 1 THEN 'low'
+        WHEN 2 THEN 'low'
+        WHEN 3 THEN 'low'
+        WHEN 4 THEN 'low'
+        WHEN 5 THEN 'low'
+        WHEN 6 THEN 'low'
+        WHEN 7 THEN 'medium'
+        WHEN 8 THEN 'high'
+        WHEN 9 THEN 'high'
+        WHEN 10 THEN 'medium'
+        WHEN 11 THEN 'high'
+        WHEN 12 THEN 'medium'
+        WHEN 13 THEN 'high'
+        WHEN 14 THEN 'high'
+        WHEN 15 THEN 'high'
+        WHEN 16 THEN 'high'
+        WHEN 17 THEN 'high'
+        WHEN 18 THEN 'medium'
+        WHEN 19 THEN 'medium'
+        WHEN 20 THEN 'high'
+        WHEN 21 THEN 'high'
+        WHEN 22 THEN 'high'
+        WHEN 23 THEN 'high'
+        WHEN 24 THEN 'high'
+        WHEN 25 THEN 'medium'
+        WHEN 26 THEN 'high'
+        WHEN 27 THEN 'low'
+        WHEN 28 THEN 'low'
+        WHEN 29 THEN 'high'
+        WHEN 30 THEN 'high'
+        WHEN 31 THEN 'high'
+        WHEN 32 THEN 'high'
+        WHEN 33 THEN 'high'
+        WHEN 34 THEN 'medium'
+        WHEN 35 THEN 'high'
+        WHEN 36 THEN 'medium'
+        WHEN 37 THEN 'medium'
+        WHEN 38 THEN 'medium'
+        WHEN 39 THEN 'low'
+        WHEN 40 THEN 'high'
+        WHEN 41 THEN 'medium'
+        WHEN 42 THEN 'low'
+        WHEN 43 THEN 'medium'
+        WHEN 44 THEN 'high'
+        WHEN 45 THEN 'high'
+        WHEN 46 THEN 'medium'
+        WHEN 47 THEN 'medium'
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION legislation_score(
+    is_direct_annex2_match boolean,
+    is_keyword_match boolean,
+    category_number integer,
+    legislation_type text,
+    OUT score_category_match integer,
+    OUT score_consumer_relevance integer,
+    OUT score_legislation_type integer,
+    OUT total_score integer,
+    OUT priority_level text
+)
+LANGUAGE sql IMMUTABLE
+AS $$
+    -- The breakdown shows 1 for acts of any other type; the total adds 0
+    SELECT m, r, COALESCE(t, 1), m + r + COALESCE(t, 0),
+           CASE WHEN m + r + COALESCE(t, 0) >= 18 THEN 'critical' WHEN m + r + COALESCE(t, 0) >= 12 THEN 'high' WHEN m + r + COALESCE(t, 0) >= 6 THEN 'medium' ELSE 'low' END
+    FROM (
+        SELECT
+            CASE WHEN is_direct_annex2_match THEN 10
+                 WHEN is_keyword_match THEN 5 ELSE 0 END AS m,
+            CASE category_relevance(category_number) WHEN 'high' THEN 3 WHEN 'medium' THEN 1 WHEN 'low' THEN 0 ELSE 0 END AS r,
+            CASE legislation_type WHEN 'Regulation' THEN 2 WHEN 'Directive' THEN 1 WHEN 'Decision' THEN 1 END AS t
+    ) points
+$$;
+
+CREATE OR REPLACE FUNCTION rescore(ids bigint[] DEFAULT NULL)
+RETURNS SETOF analysis_results
+LANGUAGE sql
+AS $$
+    INSERT INTO analysis_results AS a (
+        legislation_id, score_category_match, score_consumer_relevance, score_consultation,
+        score_dsc, score_legislation_type, total_score, priority_level, calculated_at
+    )
+    SELECT l.id, s.score_category_match, s.score_consumer_relevance, 0,
+           0, s.score_legislation_type, s.total_score, s.priority_level, now()
+    FROM legislation l
+    CROSS JOIN LATERAL legislation_score(
+        l.is_direct_annex2_match, l.is_keyword_match, l.category_number, l.legislation_type
+    ) s
+    WHERE ids IS NULL OR l.id = ANY (ids)
+    ON CONFLICT (legislation_id) DO UPDATE SET
+        score_category_match = EXCLUDED.score_category_match,
+        score_consumer_relevance = EXCLUDED.score_consumer_relevance,
+        score_consultation = EXCLUDED.score_consultation,
+        score_dsc = EXCLUDED.score_dsc,
+        score_legislation_type = EXCLUDED.score_legislation_type,
+        total_score = EXCLUDED.total_score,
+        priority_level = EXCLUDED.priority_level,
+        calculated_at = EXCLUDED.calculated_at
+    WHERE (a.score_category_match, a.score_consumer_relevance, a.score_legislation_type, a.total_score, a.priority_level) IS DISTINCT FROM (EXCLUDED.score_category_match, EXCLUDED.score_consumer_relevance, EXCLUDED.score_legislation_type, EXCLUDED.total_score, EXCLUDED.priority_level)
+    RETURNING a.*
+$$;
+
+-- Writes scores: the scraper's service role only
+REVOKE EXECUTE ON FUNCTION rescore(bigint[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rescore(bigint[]) TO service_role;
@@ -0,0 +1,27 @@
+-- NI/EU Law Tracker - incremental consultation feedback
+-- The scraper counts the public feedback on open consultations (and those
+-- closed in the last week) and keeps the count on the consultation row.
+-- Feedback is fetched newest first and only down to feedback_last_id, the
+-- highest feedback id already counted for the initiative, so a run pages
+-- through new feedback only. With --feedback-items the feedback itself is
+-- also stored in consultation_feedback.
+
+ALTER TABLE consultations
+    ADD COLUMN IF NOT EXISTS feedback_count integer,
+    ADD COLUMN IF NOT EXISTS feedback_last_id bigint;
+
+CREATE TABLE IF NOT EXISTS consultation_feedback (
+    id bigint PRIMARY KEY,
+    initiative_id text NOT NULL,
+    publication_id bigint,
+    date_feedback timestamptz,
+    user_type text,
+    country text,
+    language text,
+    organization text,
+    feedback text,
+    fetched_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS consultation_feedback_initiative_id
+    ON consultation_feedback (initiative_id);
@@ -0,0 +1,493 @@
+"""
+NI/EU Law Tracker - Local Supabase Mirror
+SQLite copy of the legislation, analysis_results and consultations tables.
+It is synced incrementally from PostgREST, answers the scraper's lookups
+locally, and turns writes into bulk upserts of only the rows that changed.
+Syncs follow the change_log feed (migrations/006_change_log.sql), whose
+ids are handed out in commit order, so a row written by a transaction
+that commits late is still picked up. A table is read in full, by keyset
+on (tracked column, id), the first time and when there is no feed.
+The file lives in the state directory, which the workflow caches between
+runs.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from urllib.parse import quote
+
+import engine
+import scheduler
+from checkpoint import STATE_DIR
+from spool import error_class
+
+MIRROR_FILE = os.path.join(STATE_DIR, 'mirror.sqlite')
+
+# table -> (natural key, change-tracking column)
+TABLES = {
+    'legislation': ('celex_number', 'date_scraped'),
+    'analysis_results': ('legislation_id', 'calculated_at'),
+    'consultations': ('initiative_id', 'date_scraped'),
+}
+
+# Columns that change on every write and so are ignored when diffing
+VOLATILE_COLUMNS = {'id', 'date_scraped', 'calculated_at', 'last_checked'}
+
+SYNC_PAGE_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+# Rows fetched by id per request when following the change feed
+SYNC_ID_BATCH = 200
+
+
+class Mirror:
+    """
+    Thread-safe SQLite mirror
+    Each table is stored as (id, key, category_number, tracked, data) where
+    data is the full PostgREST row as JSON. With a spool, failed writes are
+    spooled for replay() instead of only being reported.
+    """
+
+    def __init__(self, supabase_url, supabase_key, path=MIRROR_FILE, spool=None):
+        self.url = supabase_url
+        self.key = supabase_key
+        self.path = path
+        self.spool = spool
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        for table in TABLES:
+            self._db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT UNIQUE,
+                    category_number INTEGER,
+                    tracked TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+        # Per table: the last change_log id applied, or with no feed the
+        # last (tracked, id) read; only sync moves these, never writes
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                tbl TEXT PRIMARY KEY,
+                change_id INTEGER,
+                tracked TEXT,
+                last_id INTEGER
+            )
+        """)
+        self._db.commit()
+
+    def _headers(self, **extra):
+        headers = {
+            'apikey': self.key,
+            'Authorization': f'Bearer {self.key}',
+            'Content-Type': 'application/json',
+        }
+        headers.update(extra)
+        return headers
+
+    # ------------------------------------------
+    # Sync
+    # ------------------------------------------
+
+    def _store(self, table, rows):
+        key_column, tracked_column = TABLES[table]
+        with self._lock:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO {table} (id, key, category_number, tracked, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (row['id'], str(row[key_column]), row.get('category_number'), row.get(tracked_column), json.dumps(row))
+                    for row in rows
+                ]
+            )
+            self._db.commit()
+
+    def _forget(self, table, ids):
+        with self._lock:
+            self._db.executemany(f"DELETE FROM {table} WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+
+    def sync_state(self, table):
+        """(change_id, tracked, last_id) the last sync of table got to"""
+        with self._lock:
+            row = self._db.execute("SELECT change_id, tracked, last_id FROM sync_state WHERE tbl = ?", (table,)).fetchone()
+        return row or (None, None, None)
+
+    def _save_sync_state(self, table, change_id=None, tracked=None, last_id=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (tbl, change_id, tracked, last_id) VALUES (?, ?, ?, ?)",
+                (table, change_id, tracked, last_id)
+            )
+            self._db.commit()
+
+    async def _get(self, path):
+        """GET a PostgREST path as an engine task; the rows, or None on failure"""
+        response = await engine.ENGINE.request(
+            'GET', f"{self.url}/rest/v1/{path}", stage='mirror_sync', headers=self._headers(), timeout=60
+        )
+        if response.status_code != 200:
+            response.close()
+            return None
+        return response.json()
+
+    async def _pull_all(self, table, tracked=None, last_id=None):
+        """
+        Read a table by keyset on (tracked column, id) from a position; a
+        row rewritten mid-read moves past the position and is read later
+        Returns (rows pulled, final position), or None if a page failed.
+        """
+        tracked_column = TABLES[table][1]
+        pulled = 0
+        while True:
+            query = f"select=*&order={tracked_column}.asc.nullsfirst,id.asc&limit={SYNC_PAGE_SIZE}"
+            if last_id is not None:
+                if tracked is None:
+                    after = f"{tracked_column}.not.is.null,and({tracked_column}.is.null,id.gt.{last_id})"
+                else:
+                    value = quote(f'"{tracked}"')
+                    after = f"{tracked_column}.gt.{value},and({tracked_column}.eq.{value},id.gt.{last_id})"
+                query += f"&or=({after})"
+            rows = await self._get(f"{table}?{query}")
+            if rows is None:
+                print(f"  Mirror sync of {table} failed part-way")
+                return None
+            await engine.ENGINE.call(self._store, table, rows, label='mirror_sync')
+            pulled += len(rows)
+            if rows:
+                tracked, last_id = rows[-1].get(tracked_column), rows[-1]['id']
+            if len(rows) < SYNC_PAGE_SIZE:
+                return pulled, (tracked, last_id)
+
+    async def _follow_changes(self, table, change_id):
+        """
+        Apply the change_log entries for table after change_id: changed
+        rows are fetched by id, and rows that are gone are dropped
+        Returns (rows pulled, last change id applied), or None on failure.
+        """
+        pulled = 0
+        while True:
+            changes = await self._get(
+                f"change_log?select=id,row_id&table_name=eq.{table}&id=gt.{change_id}&order=id.asc&limit={SYNC_PAGE_SIZE}"
+            )
+            if changes is None:
+                return None
+            ids = sorted({c['row_id'] for c in changes})
+            for start in range(0, len(ids), SYNC_ID_BATCH):
+                batch = ids[start:start + SYNC_ID_BATCH]
+                rows = await self._get(f"{table}?select=*&id=in.({','.join(map(str, batch))})")
+                if rows is None:
+                    return None
+                await engine.ENGINE.call(self._store, table, rows, label='mirror_sync')
+                self._forget(table, set(batch) - {row['id'] for row in rows})
+                pulled += len(rows)
+            if changes:
+                change_id = changes[-1]['id']
+                self._save_sync_state(table, change_id=change_id)
+            if len(changes) < SYNC_PAGE_SIZE:
+                return pulled, change_id
+
+    async def sync_table(self, table):
+        """Pull one table's rows changed since the last sync, as an engine task"""
+        change_id, tracked, last_id = self.sync_state(table)
+        if change_id is not None:
+            result = await self._follow_changes(table, change_id)
+            if result is not None:
+                return result[0]
+            print(f"  Mirror sync of {table} failed")
+            return 0
+
+        # First sync (or no change feed): note the head of the feed, then
+        # read the whole table; changes committed meanwhile are applied by
+        # the next sync
+        head = await self._get("change_log?select=id&order=id.desc&limit=1")
+        result = await self._pull_all(table, *((None, None) if head is not None else (tracked, last_id)))
+        if result is None:
+            return 0
+        pulled, (tracked, last_id) = result
+        if head is not None:
+            self._save_sync_state(table, change_id=head[0]['id'] if head else 0)
+        else:
+            self._save_sync_state(table, tracked=tracked, last_id=last_id)
+        return pulled
+
+    def sync(self, tables=TABLES):
+        """Pull rows changed since the last sync, all tables at once; returns {table: rows pulled}"""
+        tables = list(tables)
+        return dict(zip(tables, engine.ENGINE.gather(self.sync_table(table) for table in tables)))
+
+    # ------------------------------------------
+    # Lookups
+    # ------------------------------------------
+
+    def get(self, table, key):
+        with self._lock:
+            row = self._db.execute(f"SELECT data FROM {table} WHERE key = ?", (str(key),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def rows(self, table):
+        with self._lock:
+            data = self._db.execute(f"SELECT data FROM {table} ORDER BY id").fetchall()
+        return [json.loads(row[0]) for row in data]
+
+    def iter_rows(self, table, page_size=SYNC_PAGE_SIZE, start=None, stop=None):
+        """Stream a table in id order, one list of rows per page, optionally only start <= id < stop"""
+        last_id = start - 1 if start is not None else -1
+        while True:
+            with self._lock:
+                data = self._db.execute(
+                    f"SELECT id, data FROM {table} WHERE id > ? AND id < ? ORDER BY id LIMIT ?",
+                    (last_id, stop if stop is not None else float('inf'), page_size)
+                ).fetchall()
+            if not data:
+                return
+            last_id = data[-1][0]
+            yield [json.loads(row[1]) for row in data]
+
+    def legislation_id(self, celex):
+        row = self.get('legislation', celex)
+        return row['id'] if row else None
+
+    def count(self, table):
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # ------------------------------------------
+    # Diffed bulk writes
+    # ------------------------------------------
+
+    def changed(self, table, payload):
+        """True if payload differs from the mirrored row in any stable column"""
+        stored = self.get(table, payload[TABLES[table][0]])
+        if stored is None:
+            return True
+        return any(
+            stored.get(column) != value
+            for column, value in payload.items()
+            if column not in VOLATILE_COLUMNS
+        )
+
+    def _spool_upsert(self, table, batch, change_op, attempts, error, cls):
+        if self.spool is None:
+            return
+        key_column = TABLES[table][0]
+        self.spool.add([
+            {'op': 'upsert', 'table': table, 'key': p[key_column], 'change_op': change_op,
+             'attempts': attempts.get(p[key_column], 0), 'payload': p}
+            for p in batch
+        ], error, cls)
+
+    def upsert(self, table, payloads, stage=None, force=(), change_op=None, attempts=None):
+        """
+        Bulk upsert payloads that differ from the mirror (or whose key is
+        in force). Returns (written, errors). Written rows come back from
+        PostgREST with their ids and are stored in the mirror.
+        change_op, if given, is sent as X-Change-Op for the change_log
+        trigger, which otherwise logs updates as 'update'. attempts maps
+        keys to earlier failed tries, for rows replayed from the spool.
+        """
+        key_column = TABLES[table][0]
+        pending = [p for p in payloads if p[key_column] in force or self.changed(table, p)]
+        attempts = attempts or {}
+        written = 0
+        errors = []
+        prefer = {'Prefer': 'resolution=merge-duplicates,return=representation'}
+        if change_op:
+            prefer['X-Change-Op'] = change_op
+
+        batches = [pending[start:start + WRITE_BATCH_SIZE] for start in range(0, len(pending), WRITE_BATCH_SIZE)]
+        batches.reverse()
+        while batches:
+            batch = batches.pop()
+            try:
+                response = scheduler.request(
+                    'POST',
+                    f"{self.url}/rest/v1/{table}?on_conflict={key_column}",
+                    stage=stage or f"save_{table}",
+                    headers=self._headers(**prefer),
+                    json=batch,
+                    timeout=60
+                )
+            except Exception as e:
+                errors.extend(f"{p[key_column]}: {e}" for p in batch)
+                self._spool_upsert(table, batch, change_op, attempts, f"{type(e).__name__}: {e}", error_class(exc=e))
+                continue
+
+            if response.status_code in [200, 201]:
+                rows = response.json()
+                self._store(table, rows)
+                written += len(rows)
+            elif error_class(response.status_code) == 'rejected' and len(batch) > 1:
+                # One bad row refuses the whole batch: halve it until the
+                # bad rows are on their own and the rest go through
+                middle = len(batch) // 2
+                batches.extend([batch[middle:], batch[:middle]])
+            else:
+                errors.extend(f"{p[key_column]}: {response.status_code}" for p in batch)
+                self._spool_upsert(
+                    table, batch, change_op, attempts,
+                    f"HTTP {response.status_code}: {response.text[:200]}", error_class(response.status_code)
+                )
+
+        return written, errors
+
+    def replace_rows(self, table, parent_column, parents, rows, stage=None, attempts=0):
+        """
+        Replace every row of an unmirrored child table that belongs to
+        parents with rows: one bulk delete, then one bulk insert.
+        Returns (written, errors).
+        """
+        if not parents:
+            return 0, []
+        values = ','.join(quote(f'"{p}"') for p in sorted(set(map(str, parents))))
+        stage = stage or f"save_{table}"
+        try:
+            response = scheduler.request(
+                'DELETE',
+                f"{self.url}/rest/v1/{table}?{parent_column}=in.({values})",
+                stage=stage,
+                headers=self._headers(),
+                timeout=60
+            )
+            if response.status_code in [200, 204] and rows:
+                response = scheduler.request(
+                    'POST',
+                    f"{self.url}/rest/v1/{table}",
+                    stage=stage,
+                    headers=self._headers(Prefer='return=minimal'),
+                    json=rows,
+                    timeout=60
+                )
+        except Exception as e:
+            error, cls = f"{type(e).__name__}: {e}", error_class(exc=e)
+        else:
+            if response.status_code in [200, 201, 204]:
+                return len(rows), []
+            error, cls = f"HTTP {response.status_code}: {response.text[:200]}", error_class(response.status_code)
+
+        if self.spool is not None:
+            self.spool.add([{
+                'op': 'replace', 'table': table, 'parent_column': parent_column,
+                'parents': list(parents), 'rows': rows, 'attempts': attempts,
+            }], error, cls)
+        return 0, [f"{table}: {error}"]
+
+    def insert_new(self, table, rows, key_column, stage=None):
+        """
+        Bulk insert rows into an unmirrored table, ignoring rows whose key
+        is already there. Failures are not spooled: callers only record
+        progress past rows once they are written, and fetch them again.
+        Returns (written, errors).
+        """
+        written = 0
+        errors = []
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            batch = rows[start:start + WRITE_BATCH_SIZE]
+            try:
+                response = scheduler.request(
+                    'POST',
+                    f"{self.url}/rest/v1/{table}?on_conflict={key_column}",
+                    stage=stage or f"save_{table}",
+                    headers=self._headers(Prefer='resolution=ignore-duplicates,return=minimal'),
+                    json=batch,
+                    timeout=60
+                )
+            except Exception as e:
+                errors.append(f"{table}: {type(e).__name__}: {e}")
+                continue
+            if response.status_code in [200, 201, 204]:
+                written += len(batch)
+            else:
+                errors.append(f"{table}: HTTP {response.status_code}: {response.text[:200]}")
+        return written, errors
+
+    def rescore(self, ids=None, stage='rescore'):
+        """
+        Rescore legislation in the database with one call to the rescore()
+        SQL function (migrations/007_scoring_function.sql), for the given
+        legislation ids or, with None, all of them. The analysis_results
+        rows it changed come back and are stored. Returns (changed, errors).
+        """
+        try:
+            response = scheduler.request(
+                'POST',
+                f"{self.url}/rest/v1/rpc/rescore",
+                stage=stage,
+                headers=self._headers(**{'X-Change-Op': 'rescore'}),
+                json={'ids': list(ids) if ids is not None else None},
+                timeout=300
+            )
+        except Exception as e:
+            return 0, [f"rescore: {e}"]
+        if response.status_code != 200:
+            return 0, [f"rescore: HTTP {response.status_code}: {response.text[:200]}"]
+        rows = response.json()
+        self._store('analysis_results', rows)
+        return len(rows), []
+
+    # ------------------------------------------
+    # Spool replay
+    # ------------------------------------------
+
+    def replay(self):
+        """
+        Retry every spooled write in bulk
+        Upserts are merged per row, last failure winning, and skipped if a
+        later write of the row has gone through since; replacements are
+        merged per child table. Whatever fails again is respooled by the
+        write itself. Returns {'replayed', 'failed', 'dead'}.
+        """
+        if self.spool is None:
+            return {'replayed': 0, 'failed': 0, 'dead': 0}
+        entries = self.spool.take()
+        dead_before = self.spool.count(dead=True)
+
+        latest = {}
+        replacements = {}
+        for entry in entries:
+            if entry['op'] == 'upsert':
+                latest[(entry['table'], entry['key'])] = entry
+            else:
+                replacements.setdefault((entry['table'], entry['parent_column']), []).append(entry)
+
+        groups = {}
+        for (table, key), entry in latest.items():
+            tracked = TABLES[table][1]
+            stored = self.get(table, key)
+            if stored and str(stored.get(tracked) or '') >= str(entry['payload'].get(tracked) or ''):
+                continue
+            groups.setdefault((table, entry.get('change_op')), []).append(entry)
+
+        replayed = 0
+        failed = 0
+        for (table, change_op), group in groups.items():
+            written, errors = self.upsert(
+                table, [e['payload'] for e in group], stage='replay',
+                force={e['key'] for e in group}, change_op=change_op,
+                attempts={e['key']: e['attempts'] for e in group}
+            )
+            replayed += written
+            failed += len(errors)
+
+        for (table, parent_column), group in replacements.items():
+            # Later replacements of a parent supersede earlier ones
+            parents = {}
+            for entry in group:
+                for parent in entry['parents']:
+                    parents[str(parent)] = [r for r in entry['rows'] if str(r[parent_column]) == str(parent)]
+            rows = [row for parent_rows in parents.values() for row in parent_rows]
+            written, errors = self.replace_rows(
+                table, parent_column, list(parents), rows, stage='replay',
+                attempts=max(e['attempts'] for e in group)
+            )
+            replayed += written
+            failed += len(errors)
+
+        self.spool.done()
+        return {'replayed': replayed, 'failed': failed, 'dead': self.spool.count(dead=True) - dead_before}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
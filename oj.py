@@ -0,0 +1,186 @@
+"""
+NI/EU Law Tracker - Official Journal Daily Ingest
+Reads the daily contents of the Official Journal L series, one download
+per day, and turns every act listed in it into a (CELEX, title, date)
+entry. The page is parsed as it streams in. The URL is a template, so a
+run can be pointed at recorded pages served locally (see --record).
+Recorded pages kept in fixtures/ check the parser (oj --check).
+"""
+
+import os
+import re
+import json
+from html.parser import HTMLParser
+
+import scheduler
+
+# {date} is the publication date; any strftime format can be used on it
+DAILY_URL = os.environ.get(
+    'OJ_DAILY_URL',
+    'https://eur-lex.europa.eu/oj/daily-view/L-series/default.html?ojDate={date:%d%m%Y}'
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# Recorded contents pages (oj-YYYY-MM-DD.html), each next to the acts it
+# must parse to (oj-YYYY-MM-DD.json); see check_fixtures
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Chunk sizes the fixtures are also fed in, so links and titles get split
+# at every point
+FIXTURE_CHUNK_SIZES = range(1, 65)
+
+# Links an act can be listed under in the contents
+CELEX_LINK = re.compile(r"CELEX(?::|%3A)(3\d{4}[RLD]\d{4,})", re.IGNORECASE)
+ELI_LINK = re.compile(r"/eli/(reg|dir|dec)[a-z_]*/(\d{4})/(\d+)", re.IGNORECASE)
+# Act-by-act OJ references since October 2023: OJ:L_YYYYNNNNN
+OJ_LINK = re.compile(r"OJ(?::|%3A)L_(\d{4})(\d{5})", re.IGNORECASE)
+
+ELI_TYPES = {'reg': 'R', 'dir': 'L', 'dec': 'D'}
+TITLE_TYPES = re.compile(r"\b(Regulation|Directive|Decision)\b")
+TITLE_CODES = {'Regulation': 'R', 'Directive': 'L', 'Decision': 'D'}
+
+
+def act_celex(href, title):
+    """CELEX number of the act an OJ contents link points to, or None"""
+    found = CELEX_LINK.search(href)
+    if found:
+        return found.group(1).upper()
+    found = ELI_LINK.search(href)
+    if found:
+        kind, year, number = found.groups()
+        return f"3{year}{ELI_TYPES[kind.lower()]}{int(number):04d}"
+    found = OJ_LINK.search(href)
+    kind = TITLE_TYPES.search(title or '')
+    if found and kind and not (title or '').lower().startswith('corrigendum'):
+        year, number = found.groups()
+        return f"3{year}{TITLE_CODES[kind.group(1)]}{int(number):04d}"
+    return None
+
+
+class ContentsParser(HTMLParser):
+    """
+    Streaming parser for one day's contents
+    Feed it text as it arrives and drain entries as they complete: each
+    link to an act gives (celex, title), the title being the link text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self._seen = set()
+        self._href = None
+        self._depth = 0
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._href is not None:
+            self._depth += tag == 'a'
+            return
+        if tag == 'a':
+            href = dict(attrs).get('href') or ''
+            if CELEX_LINK.search(href) or ELI_LINK.search(href) or OJ_LINK.search(href):
+                self._href = href
+                self._depth = 1
+                self._text = []
+
+    def handle_endtag(self, tag):
+        if self._href is None or tag != 'a':
+            return
+        self._depth -= 1
+        if self._depth:
+            return
+        title = ' '.join(''.join(self._text).split())
+        celex = act_celex(self._href, title)
+        if celex and title and celex not in self._seen:
+            self._seen.add(celex)
+            self.entries.append((celex, title))
+        self._href = None
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def drain(self):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def fetch_day(day, record_dir=None, timeout=60):
+    """
+    Yield (celex, title) for each act in the L series published on day
+    Raises for a failed download; a day with no OJ yields nothing. With
+    record_dir, the page is also saved there as oj-YYYY-MM-DD.html.
+    """
+    response = scheduler.request(
+        'GET',
+        DAILY_URL.format(date=day),
+        stage='oj',
+        headers={'User-Agent': 'Mozilla/5.0 (compatible; NI-EU-Law-Tracker/1.0)'},
+        stream=True,
+        timeout=timeout
+    )
+    record = None
+    try:
+        if response.status_code == 404:
+            return
+        if response.status_code != 200:
+            raise RuntimeError(f"OJ contents for {day}: HTTP {response.status_code}")
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+            record = open(os.path.join(record_dir, f"oj-{day:%Y-%m-%d}.html"), 'w', encoding='utf-8')
+
+        # requests assumes Latin-1 for text/html without a charset
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            response.encoding = 'utf-8'
+        parser = ContentsParser()
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True):
+            if record:
+                record.write(chunk)
+            parser.feed(chunk)
+            yield from parser.drain()
+        parser.close()
+        yield from parser.drain()
+    finally:
+        if record:
+            record.close()
+        response.close()
+
+
+def parse(text, chunk_size=CHUNK_SIZE):
+    """(celex, title) for each act in a contents page, fed chunk_size characters at a time"""
+    parser = ContentsParser()
+    entries = []
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+        entries += parser.drain()
+    parser.close()
+    return entries + parser.drain()
+
+
+def check_fixtures(directory=FIXTURE_DIR):
+    """
+    Parse every recorded page in directory, whole and in small chunks, and
+    compare what it gives with the acts it is expected to give
+    Returns True if every page matches.
+    """
+    pages = sorted(name for name in os.listdir(directory) if name.startswith('oj-') and name.endswith('.html'))
+    if not pages:
+        print(f"No OJ contents fixtures in {directory}")
+        return False
+    ok = True
+    for name in pages:
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            text = f.read()
+        with open(os.path.join(directory, name[:-len('.html')] + '.json'), encoding='utf-8') as f:
+            expected = [(act['celex'], act['title']) for act in json.load(f)]
+        wrong = [size for size in (len(text), *FIXTURE_CHUNK_SIZES) if parse(text, size) != expected]
+        if wrong:
+            ok = False
+            found = parse(text, wrong[0])
+            print(f"{name}: {len(found)} acts in chunks of {wrong[0]}, expected {len(expected)}")
+            for celex, title in sorted(set(found) ^ set(expected)):
+                print(f"  {'missing' if (celex, title) in expected else 'unexpected'}: {celex} {title[:80]}")
+        else:
+            print(f"{name}: {len(expected)} acts, parsed whole and in chunks of 1-{max(FIXTURE_CHUNK_SIZES)}")
+    return ok
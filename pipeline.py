@@ -0,0 +1,183 @@
+"""
+NI/EU Law Tracker - Streaming Pipeline
+Runs scraper stages as threads connected by bounded queues, so pages flow
+from fetch to sink as they arrive instead of being collected up front
+"""
+
+import queue
+import threading
+import time
+
+import profiling
+
+# Sentinel marking the end of a stage's output
+_DONE = object()
+
+# How long a blocked put/get waits before re-checking for shutdown
+_POLL_SECONDS = 0.5
+
+
+class Page(list):
+    """
+    A list of records with a stable key (e.g. 'legislation:oj:2024-05-02')
+    Stages edit pages in place so the key survives to the sink, where it
+    is used to checkpoint the page once its writes are committed.
+    """
+
+    def __init__(self, key, items=()):
+        super().__init__(items)
+        self.key = key
+
+
+class StageError(Exception):
+    """Raised by Pipeline.run when a stage fails"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Pipeline:
+    """
+    Chain of streaming stages: source -> stages... -> sink
+
+    source  - iterable of pages (lists of records)
+    stages  - list of (name, fn) where fn takes an iterator of pages and
+              yields pages; each runs in its own thread
+    sink    - (name, fn) where fn is called once per page and returns a dict
+              of counters that are summed into the metrics
+    maxsize - pages buffered between two stages; bounds peak memory
+    """
+
+    def __init__(self, source, stages, sink, maxsize=2, name='pipeline'):
+        self.source = source
+        self.stages = list(stages)
+        self.sink = sink
+        self.maxsize = maxsize
+        self.name = name
+        self._stop = threading.Event()
+        self._errors = []
+        self.metrics = {'stages': {}, 'sink': {}, 'elapsed': 0.0}
+
+    # ------------------------------------------
+    # Queue helpers (shutdown-aware)
+    # ------------------------------------------
+
+    def _put(self, q, page):
+        while not self._stop.is_set():
+            try:
+                q.put(page, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_queue(self, q):
+        while not self._stop.is_set():
+            try:
+                page = q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if page is _DONE:
+                return
+            yield page
+
+    def _count(self, name, key, page):
+        counts = self.metrics['stages'].setdefault(name, {'pages_in': 0, 'items_in': 0, 'pages_out': 0, 'items_out': 0})
+        counts['pages_' + key] += 1
+        counts['items_' + key] += len(page)
+
+    def _fail(self, stage, error):
+        self._errors.append(StageError(stage, error))
+        self._stop.set()
+
+    # ------------------------------------------
+    # Stage runners
+    # ------------------------------------------
+
+    def _run_source(self, out_q):
+        try:
+            for page in self.source:
+                self._count('source', 'out', page)
+                if not self._put(out_q, page):
+                    return
+        except Exception as e:
+            self._fail('source', e)
+        finally:
+            self._put(out_q, _DONE)
+
+    def _run_stage(self, name, fn, in_q, out_q):
+        def counted_input():
+            for page in self._iter_queue(in_q):
+                self._count(name, 'in', page)
+                yield page
+
+        try:
+            for page in fn(counted_input()):
+                if not page:
+                    continue
+                self._count(name, 'out', page)
+                if not self._put(out_q, page):
+                    return
+        except Exception as e:
+            self._fail(name, e)
+        finally:
+            self._put(out_q, _DONE)
+
+    def _run_sink(self, in_q):
+        name, fn = self.sink
+        totals = self.metrics['sink']
+        try:
+            with profiling.label(f"{self.name}-{name}"):
+                for page in self._iter_queue(in_q):
+                    self._count(name, 'in', page)
+                    result = fn(page) or {}
+                    for key, value in result.items():
+                        if isinstance(value, list):
+                            totals.setdefault(key, []).extend(value)
+                        else:
+                            totals[key] = totals.get(key, 0) + value
+        except Exception as e:
+            self._fail(name, e)
+
+    def stop(self):
+        """Ask every stage to finish; in-flight requests still run to their timeout"""
+        self._fail('pipeline', TimeoutError(f"{self.name} stopped"))
+
+    def run(self):
+        """Run all stages to completion and return the metrics dict"""
+        started = time.monotonic()
+        queues = [queue.Queue(maxsize=self.maxsize) for _ in range(len(self.stages) + 1)]
+
+        threads = [threading.Thread(target=self._run_source, args=(queues[0],), name=f"{self.name}-source", daemon=True)]
+        for i, (name, fn) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._run_stage, args=(name, fn, queues[i], queues[i + 1]),
+                name=f"{self.name}-{name}", daemon=True
+            ))
+
+        for thread in threads:
+            thread.start()
+        # The sink runs on the calling thread so writes stay in order
+        self._run_sink(queues[-1])
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.metrics['elapsed'] = time.monotonic() - started
+        if self._errors:
+            raise self._errors[0]
+        return self.metrics
+
+
+def batched(items, size):
+    """Group an iterable of records into lists of at most `size`"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
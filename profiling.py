@@ -0,0 +1,177 @@
+"""
+NI/EU Law Tracker - Profiling
+A sampling profiler plus tracemalloc for --profile runs. Samples are
+attributed to a label per thread (the pipeline stage running on it), and
+each label gets a flamegraph-ready .folded file and a .pstats file. Nothing
+runs unless a Profiler is started; label() is a dict write otherwise.
+Traced memory is process-wide: tracemalloc cannot tell threads apart, so
+a stage's memory figure is the process total while it was busy, not what
+the stage itself allocated.
+"""
+
+import os
+import sys
+import time
+import marshal
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# Seconds between samples
+SAMPLE_INTERVAL = 0.005
+
+# Frames in these files mean the thread is blocked on a pipeline queue
+_WAIT_FILES = ('queue.py', 'threading.py')
+
+# thread id -> label, set by label(); threads without one use their name
+_labels = {}
+
+
+@contextmanager
+def label(name):
+    """Attribute samples taken on this thread to name while the block runs"""
+    ident = threading.get_ident()
+    previous = _labels.get(ident)
+    _labels[ident] = name
+    try:
+        yield
+    finally:
+        if previous is None:
+            _labels.pop(ident, None)
+        else:
+            _labels[ident] = previous
+
+
+def _frame_key(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _frame_name(key):
+    filename, lineno, name = key
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class StageSamples:
+    """Everything sampled for one label"""
+
+    def __init__(self):
+        self.samples = 0
+        self.waiting = 0
+        # Highest process-wide traced memory sampled while this label was busy
+        self.busy_memory = 0
+        self.stacks = Counter()
+
+
+class Profiler:
+    """
+    Samples every thread's stack each interval and tracks traced memory
+    Call start() before the work and stop() after it; stop() writes
+    <label>.folded and <label>.pstats into directory.
+    """
+
+    def __init__(self, directory, interval=SAMPLE_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.stages = {}
+        self.started = None
+        self.elapsed = 0.0
+        self.ticks = 0
+        self.peak_memory = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        tracemalloc.start()
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            memory = tracemalloc.get_traced_memory()[0]
+            self.ticks += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stage = self.stages.setdefault(_labels.get(ident) or names.get(ident, str(ident)), StageSamples())
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                stage.samples += 1
+                stage.stacks[tuple(stack)] += 1
+                if os.path.basename(stack[-1][0]) in _WAIT_FILES:
+                    stage.waiting += 1
+                else:
+                    stage.busy_memory = max(stage.busy_memory, memory)
+
+    def stop(self):
+        """Stop sampling and write the per-stage files; returns the report rows"""
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.monotonic() - self.started
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        for name, stage in self.stages.items():
+            path = os.path.join(self.directory, name.replace(os.sep, '_'))
+            self._write_folded(path + '.folded', stage)
+            self._write_pstats(path + '.pstats', stage)
+        return self.report()
+
+    def _seconds_per_sample(self):
+        return self.elapsed / self.ticks if self.ticks else self.interval
+
+    def _write_folded(self, path, stage):
+        # Brendan Gregg's collapsed format: "root;...;leaf count"
+        with open(path, 'w') as f:
+            for stack, count in stage.stacks.most_common():
+                f.write(';'.join(_frame_name(key) for key in stack) + f" {count}\n")
+
+    def _write_pstats(self, path, stage):
+        """
+        Samples as a pstats file (load with pstats.Stats or snakeviz)
+        Call counts are sample counts; times are samples x interval.
+        """
+        per_sample = self._seconds_per_sample()
+        stats = {}
+        for stack, count in stage.stacks.items():
+            for key in set(stack):
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                entry[0] += count
+                entry[1] += count
+                entry[3] += count * per_sample
+            stats[stack[-1]][2] += count * per_sample
+            for caller, callee in zip(stack, stack[1:]):
+                callers = stats[callee][4]
+                callers[caller] = callers.get(caller, 0) + count
+        with open(path, 'wb') as f:
+            marshal.dump({key: tuple(entry) for key, entry in stats.items()}, f)
+
+    def report(self):
+        per_sample = self._seconds_per_sample()
+        rows = []
+        for name, stage in sorted(self.stages.items(), key=lambda item: -item[1].samples):
+            rows.append({
+                'stage': name,
+                'seconds': stage.samples * per_sample,
+                'busy': (stage.samples - stage.waiting) / stage.samples if stage.samples else 0.0,
+                'process_mb_while_busy': stage.busy_memory / 1e6,
+            })
+        return rows
+
+    def print_report(self):
+        print(f"\nProfile ({self.elapsed:.1f}s, {self.ticks} samples, peak traced memory "
+              f"{self.peak_memory / 1e6:.1f} MB) -> {self.directory}")
+        print(f"  {'stage':<32} {'wall s':>7} {'busy':>5} {'proc MB':>8}")
+        for row in self.report():
+            print(f"  {row['stage'][:32]:<32} {row['seconds']:>7.1f} {row['busy']:>5.0%} "
+                  f"{row['process_mb_while_busy']:>8.1f}")
+        print("  proc MB: the whole process's traced memory at its highest while the stage was busy; "
+              "stages running at the same time share it")
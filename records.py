@@ -0,0 +1,190 @@
+"""
+NI/EU Law Tracker - Record Types
+Slotted record types shared by the scraper and the baseline import.
+Field names match the Supabase columns, so a record serializes to its
+PostgREST payload straight from its slots with no intermediate dict.
+"""
+
+from dataclasses import dataclass, field, fields
+from datetime import date
+
+
+def eurlex_url(celex):
+    return f"https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:{celex}"
+
+
+def consultation_url(initiative_id):
+    return f"https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives/{initiative_id}_en"
+
+
+def days_until(iso_date, today=None):
+    """Whole days from today to an ISO date (negative once past), or None"""
+    if not iso_date:
+        return None
+    try:
+        return (date.fromisoformat(str(iso_date)[:10]) - (today or date.today())).days
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class Legislation:
+    """One EU act, from any source, plus its Annex 2 match and score"""
+
+    celex_number: str
+    title: str
+    legislation_type: str = None
+    date_published: str = None
+    eurlex_url: str = None
+    category_number: int = None
+    is_baseline: bool = False
+    is_direct_annex2_match: bool = False
+    is_keyword_match: bool = False
+    matched_keywords: list = field(default_factory=list)
+    consumer_relevance: str = None
+    total_score: int = None
+    priority_level: str = None
+    # field name -> source it came from ('cellar', 'cellar-lookup', 'rss')
+    provenance: dict = field(default_factory=dict)
+
+    # Columns written to the legislation table; is_baseline is only ever
+    # set by the baseline import, so a scrape never clears it
+    COLUMNS = (
+        'celex_number', 'title', 'legislation_type', 'category_number',
+        'is_direct_annex2_match', 'is_keyword_match', 'matched_keywords',
+        'date_published', 'eurlex_url', 'provenance',
+    )
+
+    def __post_init__(self):
+        if self.eurlex_url is None:
+            self.eurlex_url = eurlex_url(self.celex_number)
+
+    @classmethod
+    def from_row(cls, row):
+        """Rebuild a record from a stored legislation row"""
+        return cls(**{f.name: row[f.name] for f in fields(cls) if row.get(f.name) is not None})
+
+    def to_payload(self, **extra):
+        payload = {name: getattr(self, name) for name in self.COLUMNS}
+        payload.update(extra)
+        return payload
+
+
+@dataclass(slots=True)
+class Consultation:
+    """One Have Your Say initiative with an open feedback period"""
+
+    initiative_id: str
+    title: str
+    consultation_url: str = None
+    date_opened: str = None
+    date_closes: str = None
+    status: str = 'open'
+    policy_areas: list = field(default_factory=list)
+    category_number: int = None
+
+    # days_remaining is derived from date_closes at read time, never stored
+    COLUMNS = (
+        'title', 'initiative_id', 'consultation_url', 'date_opened', 'date_closes',
+        'status',
+    )
+
+    def __post_init__(self):
+        if self.consultation_url is None:
+            self.consultation_url = consultation_url(self.initiative_id)
+
+    @property
+    def days_remaining(self):
+        days = days_until(self.date_closes)
+        return None if days is None else max(days, 0)
+
+    def to_payload(self, **extra):
+        payload = {name: getattr(self, name) for name in self.COLUMNS}
+        payload.update(extra)
+        return payload
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    """One analysis_results row: the score breakdown for a legislation id"""
+
+    legislation_id: int
+    score_category_match: int = 0
+    score_consumer_relevance: int = 0
+    score_consultation: int = 0
+    score_dsc: int = 0
+    score_legislation_type: int = 0
+    total_score: int = 0
+    priority_level: str = 'low'
+    calculated_at: str = None
+
+    COLUMNS = (
+        'legislation_id', 'score_category_match', 'score_consumer_relevance',
+        'score_consultation', 'score_dsc', 'score_legislation_type',
+        'total_score', 'priority_level', 'calculated_at',
+    )
+
+    def to_payload(self, **extra):
+        payload = {name: getattr(self, name) for name in self.COLUMNS}
+        payload.update(extra)
+        return payload
+
+
+@dataclass(slots=True)
+class Feedback:
+    """One piece of public feedback on a Have Your Say initiative"""
+
+    id: int
+    initiative_id: str
+    publication_id: int = None
+    date_feedback: str = None
+    user_type: str = None
+    country: str = None
+    language: str = None
+    organization: str = None
+    feedback: str = None
+
+    COLUMNS = (
+        'id', 'initiative_id', 'publication_id', 'date_feedback', 'user_type',
+        'country', 'language', 'organization', 'feedback',
+    )
+
+    @classmethod
+    def from_api(cls, item, initiative_id, publication_id):
+        """From an item of the Better Regulation allFeedback API"""
+        return cls(
+            id=int(item['id']),
+            initiative_id=str(initiative_id),
+            publication_id=publication_id,
+            date_feedback=item.get('dateFeedback'),
+            user_type=item.get('userType'),
+            country=item.get('country'),
+            language=item.get('language'),
+            organization=item.get('organization'),
+            feedback=item.get('feedback')
+        )
+
+    def to_payload(self, **extra):
+        payload = {name: getattr(self, name) for name in self.COLUMNS}
+        payload.update(extra)
+        return payload
+
+
+@dataclass(slots=True)
+class FeedbackCount:
+    """
+    The feedback count for one consultation, as updated by a run, and the
+    feedback that was new since its last count
+    """
+
+    initiative_id: str
+    feedback_count: int = 0
+    feedback_last_id: int = None
+    items: list = field(default_factory=list)
+
+    COLUMNS = ('initiative_id', 'feedback_count', 'feedback_last_id')
+
+    def to_payload(self, **extra):
+        payload = {name: getattr(self, name) for name in self.COLUMNS}
+        payload.update(extra)
+        return payload
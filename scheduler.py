@@ -0,0 +1,278 @@
+"""
+NI/EU Law Tracker - Request Scheduler
+Every outbound HTTP request goes through here. Each host gets a token
+bucket and a concurrency cap; 429/503 responses halve the host's rate and
+honour Retry-After, and successes slowly restore it. Throttle events are
+kept for the run report. Timeouts are capped by the run's time budget.
+"""
+
+import os
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import budget
+
+# ============================================
+# HOST LIMITS
+# rate = sustained requests per second, burst = bucket size,
+# concurrency = requests in flight at once
+# ============================================
+DEFAULT_LIMITS = {'rate': 2.0, 'burst': 4, 'concurrency': 2}
+
+HOST_LIMITS = {
+    'publications.europa.eu': {'rate': 2.0, 'burst': 4, 'concurrency': 2},
+    'eur-lex.europa.eu': {'rate': 1.0, 'burst': 2, 'concurrency': 1},
+    'ec.europa.eu': {'rate': 2.0, 'burst': 4, 'concurrency': 2},
+    '.supabase.co': {'rate': 20.0, 'burst': 40, 'concurrency': 4},
+}
+
+# Our own database: requests to it are writes (or syncs) and may use the
+# time budget's write reserve; every other host is an upstream fetch
+WRITE_HOSTS = ('.supabase.co',)
+
+# Statuses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+# Never adapt below this fraction of the configured rate
+MIN_RATE_FRACTION = 0.05
+
+# Cap on how long a single Retry-After is honoured
+MAX_RETRY_AFTER = 120
+
+
+def parse_limit_overrides(spec):
+    """
+    Parse SCRAPER_RATE_LIMITS, e.g.
+    "publications.europa.eu=4:8:3,.supabase.co=20:40:8" (rate:burst:concurrency)
+    """
+    overrides = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        host, _, values = entry.partition('=')
+        rate, burst, concurrency = (values.split(':') + ['', '', ''])[:3]
+        limits = dict(HOST_LIMITS.get(host, DEFAULT_LIMITS))
+        if rate:
+            limits['rate'] = float(rate)
+        if burst:
+            limits['burst'] = int(burst)
+        if concurrency:
+            limits['concurrency'] = int(concurrency)
+        overrides[host] = limits
+    return overrides
+
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """Token bucket + concurrency cap for one host, shared fairly by stages"""
+
+    def __init__(self, host, rate, burst, concurrency):
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.active = 0
+        self.served = {}
+        self.waiting = {}
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0, 'errors': 0, 'waited': 0.0}
+        self._cond = threading.Condition()
+        # Connections are kept open between requests, up to one per slot
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _my_turn(self, stage):
+        # The stage that has been served least among those waiting goes first
+        fewest = min(self.served.get(s, 0) for s, n in self.waiting.items() if n)
+        return self.served.get(stage, 0) <= fewest
+
+    def acquire(self, stage):
+        started = time.monotonic()
+        with self._cond:
+            self.waiting[stage] = self.waiting.get(stage, 0) + 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.blocked_until:
+                        self._cond.wait(self.blocked_until - now)
+                    elif self.active >= self.concurrency or not self._my_turn(stage):
+                        self._cond.wait(1.0)
+                    elif self.tokens < 1:
+                        self._cond.wait((1 - self.tokens) / self.rate)
+                    else:
+                        break
+                self.tokens -= 1
+                self.active += 1
+                self.served[stage] = self.served.get(stage, 0) + 1
+                self.stats['requests'] += 1
+            finally:
+                self.waiting[stage] -= 1
+        waited = time.monotonic() - started
+        with self._cond:
+            self.stats['waited'] += waited
+        return waited
+
+    def count(self, name):
+        """Add one to a stats counter; requests on other threads update them too"""
+        with self._cond:
+            self.stats[name] += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def throttled(self, retry_after):
+        """Multiplicative decrease, and pause the host for Retry-After"""
+        with self._cond:
+            self.stats['throttled'] += 1
+            self.rate = max(self.rate / 2, self.max_rate * MIN_RATE_FRACTION)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + min(retry_after, MAX_RETRY_AFTER))
+            self._cond.notify_all()
+            return self.rate
+
+    def succeeded(self):
+        """Additive increase back towards the configured rate"""
+        with self._cond:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class Scheduler:
+    """Routes requests through per-host limiters and records throttle events"""
+
+    def __init__(self, limits=None, max_retries=3, backoff=2.0):
+        self.limits = dict(HOST_LIMITS)
+        self.limits.update(limits or {})
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.events = []
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                limits = self.limits.get(host)
+                if limits is None:
+                    limits = next((v for k, v in self.limits.items() if k.startswith('.') and host.endswith(k)), DEFAULT_LIMITS)
+                self._hosts[host] = HostLimiter(host, **limits)
+            return self._hosts[host]
+
+    def _event(self, limiter, stage, kind, detail, rate=None):
+        with self._lock:
+            self.events.append({
+                'at': time.time(),
+                'host': limiter.host,
+                'stage': stage,
+                'event': kind,
+                'detail': detail,
+                'rate': round(rate if rate is not None else limiter.rate, 3),
+            })
+
+    def request(self, method, url, stage='default', **kwargs):
+        """
+        Send a request under the host's limits
+        429/503 and connection errors are retried with backoff (Retry-After
+        wins when given). The last response is returned, or the last
+        connection error re-raised, so callers keep their own handling.
+        Past the time budget's deadline BudgetExhausted is raised instead.
+        """
+        host = urlsplit(url).hostname or ''
+        limiter = self.limiter(host)
+        timeout = kwargs.get('timeout')
+        fetching = not host.endswith(WRITE_HOSTS)
+
+        for attempt in range(self.max_retries + 1):
+            kwargs['timeout'] = budget.BUDGET.timeout(timeout, fetching)
+            limiter.acquire(stage)
+            try:
+                response = limiter.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                limiter.count('errors')
+                # A fetch is not retried into the time budget's write reserve
+                if attempt == self.max_retries or (fetching and not budget.BUDGET.allows()):
+                    raise
+                self._event(limiter, stage, 'error', type(e).__name__)
+                response = None
+            finally:
+                limiter.release()
+
+            if response is None:
+                limiter.count('retries')
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code not in THROTTLE_STATUSES:
+                limiter.succeeded()
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            rate = limiter.throttled(retry_after or self.backoff * 2 ** attempt)
+            self._event(limiter, stage, f"http {response.status_code}", f"retry-after={retry_after}", rate)
+            if attempt == self.max_retries:
+                return response
+            # Give the connection back to the pool before retrying (streamed
+            # responses hold it until closed)
+            response.close()
+            limiter.count('retries')
+
+        return response
+
+    def report(self):
+        """Per-host counters plus the throttle event log"""
+        hosts = {}
+        for host, limiter in sorted(self._hosts.items()):
+            with limiter._cond:
+                stats = dict(limiter.stats)
+            hosts[host] = dict(stats, rate=round(limiter.rate, 3), max_rate=limiter.max_rate,
+                               concurrency=limiter.concurrency, by_stage=dict(limiter.served))
+        return {'hosts': hosts, 'events': list(self.events)}
+
+    def print_report(self):
+        report = self.report()
+        if not report['hosts']:
+            return
+        print("\nRequest scheduler:")
+        print(f"  {'host':<28} {'reqs':>5} {'thrtl':>5} {'retry':>5} {'err':>4} {'wait s':>7} {'rate':>11}")
+        for host, s in report['hosts'].items():
+            print(f"  {host[:28]:<28} {s['requests']:>5} {s['throttled']:>5} {s['retries']:>5} "
+                  f"{s['errors']:>4} {s['waited']:>7.1f} {s['rate']:>5}/{s['max_rate']:<5}")
+        for event in report['events'][-10:]:
+            print(f"  ! {event['host']} [{event['stage']}] {event['event']} {event['detail']} -> {event['rate']}/s")
+
+
+SCHEDULER = Scheduler(parse_limit_overrides(os.environ.get('SCRAPER_RATE_LIMITS', '')))
+
+
+def request(method, url, stage='default', **kwargs):
+    """Module-level shortcut for the shared scheduler"""
+    return SCHEDULER.request(method, url, stage=stage, **kwargs)
@@ -0,0 +1,208 @@
+"""
+NI/EU Law Tracker - SQL Scoring Function
+Generates the migration that puts calculate_score into Postgres, so the
+database can rescore legislation itself (POST /rest/v1/rpc/rescore). The
+category relevances, score weights and priority thresholds are written
+out from scoring.py, so the SQL is regenerated rather than edited, and
+checked against the Python on a local Postgres with score-parity.
+"""
+
+import os
+import itertools
+
+from records import Legislation
+from scoring import (
+    ANNEX2_CATEGORIES, CATEGORIES_BY_NUMBER, MATCH_WEIGHTS, PRIORITY_THRESHOLDS,
+    RELEVANCE_WEIGHTS, TYPE_WEIGHTS, analysis_for, calculate_score,
+)
+
+MIGRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', '007_scoring_function.sql')
+
+# Columns legislation_score() returns, in order
+SCORE_COLUMNS = (
+    'score_category_match', 'score_consumer_relevance', 'score_legislation_type',
+    'total_score', 'priority_level',
+)
+
+HEADER = """\
+-- NI/EU Law Tracker - scoring in the database
+-- GENERATED by `python scraper.py score-sql` from ANNEX2_CATEGORIES and the
+-- score weights in scoring.py; do not edit by hand. After changing either,
+-- regenerate and re-apply this file (every statement is CREATE OR REPLACE).
+-- `python scraper.py score-sql --check` fails while it is out of date, and
+-- `python scraper.py score-parity` compares it with calculate_score on a
+-- local Postgres.
+--
+-- legislation_score() is calculate_score plus the analysis_results
+-- breakdown for one act. rescore(ids) rescores the given legislation ids
+-- (all of them for NULL) from their stored match, category and type, and
+-- returns the analysis_results rows it changed. It does not re-match
+-- titles; `python scraper.py rescore` without --in-database does.
+"""
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def scoring_functions_sql():
+    """category_relevance() and legislation_score(), which need no tables"""
+    relevance = '\n'.join(
+        f"        WHEN {c['number']} THEN {_literal(c['relevance'])}" for c in ANNEX2_CATEGORIES
+    )
+    relevance_points = ' '.join(f"WHEN {_literal(level)} THEN {points}" for level, points in RELEVANCE_WEIGHTS.items())
+    type_points = ' '.join(f"WHEN {_literal(kind)} THEN {points}" for kind, points in TYPE_WEIGHTS.items())
+    priority = ' '.join(f"WHEN m + r + COALESCE(t, 0) >= {lowest} THEN {_literal(level)}"
+                        for level, lowest in PRIORITY_THRESHOLDS)
+    return f"""\
+CREATE OR REPLACE FUNCTION category_relevance(category integer)
+RETURNS text
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE category
+{relevance}
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION legislation_score(
+    is_direct_annex2_match boolean,
+    is_keyword_match boolean,
+    category_number integer,
+    legislation_type text,
+    OUT score_category_match integer,
+    OUT score_consumer_relevance integer,
+    OUT score_legislation_type integer,
+    OUT total_score integer,
+    OUT priority_level text
+)
+LANGUAGE sql IMMUTABLE
+AS $$
+    -- The breakdown shows 1 for acts of any other type; the total adds 0
+    SELECT m, r, COALESCE(t, 1), m + r + COALESCE(t, 0),
+           CASE {priority} ELSE 'low' END
+    FROM (
+        SELECT
+            CASE WHEN is_direct_annex2_match THEN {MATCH_WEIGHTS['direct']}
+                 WHEN is_keyword_match THEN {MATCH_WEIGHTS['keyword']} ELSE 0 END AS m,
+            CASE category_relevance(category_number) {relevance_points} ELSE 0 END AS r,
+            CASE legislation_type {type_points} END AS t
+    ) points
+$$;
+"""
+
+
+def rescore_function_sql():
+    """rescore(ids), which writes analysis_results"""
+    changed = ', '.join(f"a.{column}" for column in SCORE_COLUMNS)
+    excluded = ', '.join(f"EXCLUDED.{column}" for column in SCORE_COLUMNS)
+    return f"""\
+CREATE OR REPLACE FUNCTION rescore(ids bigint[] DEFAULT NULL)
+RETURNS SETOF analysis_results
+LANGUAGE sql
+AS $$
+    INSERT INTO analysis_results AS a (
+        legislation_id, score_category_match, score_consumer_relevance, score_consultation,
+        score_dsc, score_legislation_type, total_score, priority_level, calculated_at
+    )
+    SELECT l.id, s.score_category_match, s.score_consumer_relevance, 0,
+           0, s.score_legislation_type, s.total_score, s.priority_level, now()
+    FROM legislation l
+    CROSS JOIN LATERAL legislation_score(
+        l.is_direct_annex2_match, l.is_keyword_match, l.category_number, l.legislation_type
+    ) s
+    WHERE ids IS NULL OR l.id = ANY (ids)
+    ON CONFLICT (legislation_id) DO UPDATE SET
+        score_category_match = EXCLUDED.score_category_match,
+        score_consumer_relevance = EXCLUDED.score_consumer_relevance,
+        score_consultation = EXCLUDED.score_consultation,
+        score_dsc = EXCLUDED.score_dsc,
+        score_legislation_type = EXCLUDED.score_legislation_type,
+        total_score = EXCLUDED.total_score,
+        priority_level = EXCLUDED.priority_level,
+        calculated_at = EXCLUDED.calculated_at
+    WHERE ({changed}) IS DISTINCT FROM ({excluded})
+    RETURNING a.*
+$$;
+
+-- Writes scores: the scraper's service role only
+REVOKE EXECUTE ON FUNCTION rescore(bigint[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rescore(bigint[]) TO service_role;
+"""
+
+
+def migration_sql():
+    return HEADER + '\n' + scoring_functions_sql() + '\n' + rescore_function_sql()
+
+
+def write_migration(check=False, path=MIGRATION_FILE):
+    """
+    Write the migration, or with check only compare it with the file
+    Returns True if the file is (now) up to date.
+    """
+    sql = migration_sql()
+    try:
+        with open(path) as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+    if current == sql:
+        print(f"{path} is up to date")
+        return True
+    if check:
+        print(f"{path} is out of date with scoring.py; run: python scraper.py score-sql")
+        return False
+    with open(path, 'w') as f:
+        f.write(sql)
+    print(f"Wrote {path}")
+    return True
+
+
+def score_cases():
+    """Every combination of the inputs the score depends on"""
+    categories = [c['number'] for c in ANNEX2_CATEGORIES] + [None, 0]
+    kinds = list(TYPE_WEIGHTS) + ['Other', None]
+    return itertools.product([True, False], [True, False], categories, kinds)
+
+
+def python_scores(direct, keyword, category_number, legislation_type):
+    """SCORE_COLUMNS as the scraper computes them"""
+    item = Legislation(
+        celex_number='parity', title='', legislation_type=legislation_type, category_number=category_number,
+        is_direct_annex2_match=direct, is_keyword_match=keyword
+    )
+    category = CATEGORIES_BY_NUMBER.get(category_number)
+    item.consumer_relevance = category['relevance'] if category else None
+    item.total_score, item.priority_level = calculate_score(item)
+    row = analysis_for(item, 0).to_payload()
+    return tuple(row[column] for column in SCORE_COLUMNS)
+
+
+def parity(dsn=''):
+    """
+    Load the scoring functions into a local Postgres (rolled back after)
+    and compare them with the Python for every input combination.
+    Needs psycopg, which is imported only here. Returns True on parity.
+    """
+    try:
+        import psycopg
+    except ImportError:
+        print("score-parity needs psycopg (pip install 'psycopg[binary]')")
+        return False
+
+    cases = list(score_cases())
+    mismatches = []
+    with psycopg.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(scoring_functions_sql())
+            for case in cases:
+                cur.execute(f"SELECT {', '.join(SCORE_COLUMNS)} FROM legislation_score(%s::boolean, %s::boolean, %s::integer, %s::text)", case)
+                in_sql = tuple(cur.fetchone())
+                in_python = python_scores(*case)
+                if in_sql != in_python:
+                    mismatches.append((case, in_python, in_sql))
+        conn.rollback()
+
+    for case, in_python, in_sql in mismatches[:20]:
+        print(f"  MISMATCH {case}: python {in_python}, sql {in_sql}")
+    print(f"Scoring parity: {len(cases) - len(mismatches)} of {len(cases)} input combinations agree")
+    return not mismatches
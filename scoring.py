@@ -0,0 +1,260 @@
+"""
+NI/EU Law Tracker - Annex 2 Matching and Scoring
+The Annex 2 categories, the score weights, and matching and scoring of
+legislation against them, shared by the scraper, the baseline import and
+the SQL scoring function (score_sql.py). Also the batched CELEX lookup
+the scraper and the baseline import both enrich acts with.
+"""
+
+from datetime import datetime
+
+import celex_cache
+import sparql
+from records import AnalysisResult
+
+# ============================================
+# ANNEX 2 CATEGORIES WITH KEYWORDS
+# ============================================
+ANNEX2_CATEGORIES = [
+    {"number": 1, "name": "General customs aspects", "relevance": "low", "keywords": ["customs", "customs code", "mutual assistance", "recovery of claims"]},
+    {"number": 2, "name": "Protection of the Union's financial interests", "relevance": "low", "keywords": ["anti-fraud", "OLAF", "financial interests"]},
+    {"number": 3, "name": "Trade statistics", "relevance": "low", "keywords": ["trade statistics", "trading of goods", "external trade"]},
+    {"number": 4, "name": "General trade related aspects", "relevance": "low", "keywords": ["tariff preferences", "exports", "imports", "textile", "conflict minerals"]},
+    {"number": 5, "name": "Trade defence instruments", "relevance": "low", "keywords": ["anti-dumping", "anti-subsidy", "safeguard", "subsidised imports"]},
+    {"number": 6, "name": "Regulations on bilateral safeguards", "relevance": "low", "keywords": ["bilateral safeguards", "stabilisation", "association agreement"]},
+    {"number": 7, "name": "Others", "relevance": "medium", "keywords": ["compulsory licensing", "patents", "pharmaceutical products", "public health"]},
+    {"number": 8, "name": "Goods - general provisions", "relevance": "high", "keywords": ["technical regulations", "standardisation", "market surveillance", "product safety", "CE marking", "general product safety"]},
+    {"number": 9, "name": "Motor vehicles", "relevance": "high", "keywords": ["motor vehicles", "type-approval", "vehicle safety", "emissions", "Euro 5", "Euro 6", "tractors", "agricultural vehicles"]},
+    {"number": 10, "name": "Lifting and mechanical handling appliances", "relevance": "medium", "keywords": ["lifts", "wire-ropes", "chains", "hooks", "lifting equipment"]},
+    {"number": 11, "name": "Gas appliances", "relevance": "high", "keywords": ["gas appliances", "boilers", "hot-water boilers", "gaseous fuels"]},
+    {"number": 12, "name": "Pressure vessels", "relevance": "medium", "keywords": ["pressure vessels", "aerosol", "transportable pressure equipment"]},
+    {"number": 13, "name": "Measuring instruments", "relevance": "high", "keywords": ["measuring instruments", "metrological", "weighing", "prepackaged products"]},
+    {"number": 14, "name": "Construction products, machinery, cableways, PPE", "relevance": "high", "keywords": ["construction products", "machinery", "cableways", "personal protective equipment", "PPE"]},
+    {"number": 15, "name": "Electrical and radio equipment", "relevance": "high", "keywords": ["electrical equipment", "radio equipment", "electromagnetic compatibility", "voltage", "low voltage"]},
+    {"number": 16, "name": "Textiles, footwear", "relevance": "high", "keywords": ["textiles", "footwear", "fibre composition", "labelling"]},
+    {"number": 17, "name": "Cosmetics, toys", "relevance": "high", "keywords": ["cosmetics", "toys", "toy safety", "cosmetic products"]},
+    {"number": 18, "name": "Recreational craft", "relevance": "medium", "keywords": ["recreational craft", "personal watercraft", "boats"]},
+    {"number": 19, "name": "Explosives and pyrotechnic articles", "relevance": "medium", "keywords": ["explosives", "pyrotechnic", "fireworks"]},
+    {"number": 20, "name": "Medicinal products", "relevance": "high", "keywords": ["medicinal products", "medicines", "pharmaceuticals", "veterinary medicinal", "clinical trials", "pharmacovigilance"]},
+    {"number": 21, "name": "Medical devices", "relevance": "high", "keywords": ["medical devices", "in vitro diagnostic", "implantable"]},
+    {"number": 22, "name": "Substances of human origin", "relevance": "high", "keywords": ["blood", "tissues", "cells", "organs", "transplantation"]},
+    {"number": 23, "name": "Chemicals and related", "relevance": "high", "keywords": ["chemicals", "REACH", "fertilisers", "detergents", "batteries", "hazardous substances", "chemical substances"]},
+    {"number": 24, "name": "Pesticides, biocides", "relevance": "high", "keywords": ["pesticides", "biocides", "plant protection products", "maximum residue levels", "MRL"]},
+    {"number": 25, "name": "Waste", "relevance": "medium", "keywords": ["waste", "shipments of waste", "packaging waste", "ship recycling", "waste management"]},
+    {"number": 26, "name": "Environment, energy efficiency", "relevance": "high", "keywords": ["environment", "energy efficiency", "invasive species", "ecolabel", "fluorinated gases", "energy labelling", "F-gases"]},
+    {"number": 27, "name": "Marine equipment", "relevance": "low", "keywords": ["marine equipment", "ship equipment"]},
+    {"number": 28, "name": "Rail transport", "relevance": "low", "keywords": ["rail", "railway", "interoperability"]},
+    {"number": 29, "name": "Food - general", "relevance": "high", "keywords": ["food law", "food safety", "EFSA", "food information", "nutrition claims", "health claims"]},
+    {"number": 30, "name": "Food - hygiene", "relevance": "high", "keywords": ["food hygiene", "hygiene of foodstuffs", "food of animal origin"]},
+    {"number": 31, "name": "Food - ingredients, traces, residues", "relevance": "high", "keywords": ["food additives", "flavourings", "contaminants", "novel foods", "infant food", "food supplements"]},
+    {"number": 32, "name": "Food contact material", "relevance": "high", "keywords": ["food contact", "food contact material", "materials intended to come into contact with food"]},
+    {"number": 33, "name": "Food - other", "relevance": "high", "keywords": ["ionising radiation", "organic production", "organic products", "mineral waters"]},
+    {"number": 34, "name": "Feed - products and hygiene", "relevance": "medium", "keywords": ["animal feed", "feed", "feed additives", "medicated feedingstuffs"]},
+    {"number": 35, "name": "GMOs", "relevance": "high", "keywords": ["GMO", "genetically modified", "GM food", "GM feed", "traceability"]},
+    {"number": 36, "name": "Live animals, germinal products", "relevance": "medium", "keywords": ["live animals", "animal health", "bovine", "swine", "poultry", "semen", "embryos"]},
+    {"number": 37, "name": "Animal disease control", "relevance": "medium", "keywords": ["animal disease", "zoonosis", "TSE", "BSE", "avian influenza", "swine fever"]},
+    {"number": 38, "name": "Animal identification", "relevance": "medium", "keywords": ["animal identification", "registration", "traceability", "beef labelling"]},
+    {"number": 39, "name": "Animal breeding", "relevance": "low", "keywords": ["animal breeding", "zootechnical", "breeding animals"]},
+    {"number": 40, "name": "Animal welfare", "relevance": "high", "keywords": ["animal welfare", "protection of animals", "transport of animals", "slaughter"]},
+    {"number": 41, "name": "Plant health", "relevance": "medium", "keywords": ["plant health", "pests of plants", "harmful organisms", "phytosanitary"]},
+    {"number": 42, "name": "Plant reproductive material", "relevance": "low", "keywords": ["seed", "cereal seed", "vegetable seed", "forest reproductive material"]},
+    {"number": 43, "name": "Official controls, veterinary checks", "relevance": "medium", "keywords": ["official controls", "veterinary checks", "border inspection"]},
+    {"number": 44, "name": "Sanitary and phytosanitary - Other", "relevance": "high", "keywords": ["hormones", "beta-agonists", "residue monitoring"]},
+    {"number": 45, "name": "Intellectual property", "relevance": "high", "keywords": ["geographical indications", "PDO", "PGI", "spirit drinks", "wine"]},
+    {"number": 46, "name": "Fisheries and aquaculture", "relevance": "medium", "keywords": ["fisheries", "aquaculture", "fish", "IUU fishing", "bluefin tuna"]},
+    {"number": 47, "name": "Other", "relevance": "medium", "keywords": ["crude oil", "euro coins", "tobacco", "cultural goods", "dual-use items", "weapons", "firearms"]}
+]
+
+CATEGORIES_BY_NUMBER = {c['number']: c for c in ANNEX2_CATEGORIES}
+
+# Score points, used by calculate_score and by the SQL scoring function
+# generated from them (score_sql.py): Annex 2 match, category relevance,
+# legislation type, and the lowest total for each priority level
+MATCH_WEIGHTS = {'direct': 10, 'keyword': 5}
+RELEVANCE_WEIGHTS = {'high': 3, 'medium': 1, 'low': 0}
+TYPE_WEIGHTS = {'Regulation': 2, 'Directive': 1, 'Decision': 1}
+PRIORITY_THRESHOLDS = (('critical', 18), ('high', 12), ('medium', 6))
+
+# Acts per batched CELEX lookup query
+LOOKUP_BATCH_SIZE = 50
+
+
+# ============================================
+# MATCHING AND SCORING
+# ============================================
+
+def match_to_category(title):
+    """Match legislation title to Annex 2 category based on keywords"""
+    title_lower = title.lower()
+    
+    best_match = None
+    best_score = 0
+    matched_keywords = []
+    
+    for category in ANNEX2_CATEGORIES:
+        score = 0
+        keywords_found = []
+        
+        for keyword in category['keywords']:
+            if keyword.lower() in title_lower:
+                score += 1
+                keywords_found.append(keyword)
+        
+        if score > best_score:
+            best_score = score
+            best_match = category['number']
+            matched_keywords = keywords_found
+    
+    is_direct_match = best_score >= 2
+    
+    return best_match, is_direct_match, matched_keywords
+
+
+def match_consultation_to_category(title, policy_areas=None):
+    """Match a consultation to an Annex 2 category"""
+    title_lower = title.lower()
+    
+    best_match = None
+    best_score = 0
+    
+    for category in ANNEX2_CATEGORIES:
+        score = 0
+        for keyword in category['keywords']:
+            if keyword.lower() in title_lower:
+                score += 1
+        
+        if score > best_score:
+            best_score = score
+            best_match = category['number']
+    
+    return best_match if best_score > 0 else None
+
+
+def calculate_score(item):
+    """Calculate priority score"""
+    score = 0
+    
+    if item.is_direct_annex2_match:
+        score += MATCH_WEIGHTS['direct']
+    elif item.is_keyword_match:
+        score += MATCH_WEIGHTS['keyword']
+    
+    category = CATEGORIES_BY_NUMBER.get(item.category_number)
+    if category:
+        score += RELEVANCE_WEIGHTS.get(category['relevance'], 0)
+    
+    score += TYPE_WEIGHTS.get(item.legislation_type, 0)
+    
+    priority = next((level for level, lowest in PRIORITY_THRESHOLDS if score >= lowest), 'low')
+    return score, priority
+
+
+def analysis_for(item, legislation_id):
+    """Score breakdown for one legislation record as an analysis_results row"""
+    if item.total_score is None:
+        item.total_score, item.priority_level = calculate_score(item)
+    
+    match = 'direct' if item.is_direct_annex2_match else ('keyword' if item.is_keyword_match else None)
+    return AnalysisResult(
+        legislation_id=legislation_id,
+        score_category_match=MATCH_WEIGHTS.get(match, 0),
+        score_consumer_relevance=RELEVANCE_WEIGHTS.get(item.consumer_relevance, 0),
+        # The breakdown has always shown 1 for acts of any other type
+        score_legislation_type=TYPE_WEIGHTS.get(item.legislation_type, 1),
+        total_score=item.total_score,
+        priority_level=item.priority_level,
+        calculated_at=datetime.now().isoformat()
+    )
+
+
+def match_legislation_stage(pages):
+    """
+    Match stage: attach Annex 2 category and keywords to legislation
+    Baseline acts keep the category they are listed under in Annex 2.
+    """
+    for page in pages:
+        for item in page:
+            if not item.is_baseline:
+                category_num, is_direct, keywords = match_to_category(item.title)
+                item.category_number = category_num
+                item.is_direct_annex2_match = is_direct
+                item.is_keyword_match = bool(keywords) and not is_direct
+                item.matched_keywords = keywords
+            
+            category = CATEGORIES_BY_NUMBER.get(item.category_number)
+            if category:
+                item.consumer_relevance = category['relevance']
+        yield page
+
+
+def score_legislation_stage(pages):
+    """Score stage: attach total score and priority level"""
+    for page in pages:
+        for item in page:
+            item.total_score, item.priority_level = calculate_score(item)
+        yield page
+
+
+# ============================================
+# CELEX LOOKUP
+# ============================================
+
+def lookup_celex(celex_numbers, cache=None):
+    """
+    English title, document date, resource type and amended acts for many
+    acts at once. The metadata cache is read first; the rest are asked
+    for in one SPARQL query with a VALUES block per LOOKUP_BATCH_SIZE acts,
+    and what comes back (or does not) is cached.
+    Returns {celex: {'title', 'date', 'type', 'amends'}} for the acts found.
+    """
+    cache = cache or celex_cache.CACHE
+    celex_numbers = sorted(set(celex_numbers))
+    cached = cache.get_many(celex_numbers)
+    details = {celex: found for celex, found in cached.items() if found}
+    missing = [celex for celex in celex_numbers if celex not in cached]
+    if cached:
+        print(f"  {len(cached)} of {len(celex_numbers)} acts from the metadata cache")
+    
+    for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+        batch = missing[start:start + LOOKUP_BATCH_SIZE]
+        values = ' '.join(f'"{celex}"' for celex in batch)
+        query = f"""
+    PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
+    
+    SELECT ?celex ?title ?date ?type ?amends WHERE {{
+        VALUES ?celex {{ {values} }}
+        ?work cdm:resource_legal_id_celex ?celex .
+        OPTIONAL {{ ?work cdm:work_date_document ?date . }}
+        OPTIONAL {{ ?work cdm:work_has_resource-type ?type . }}
+        OPTIONAL {{
+            ?work cdm:resource_legal_amends_resource_legal ?amended .
+            ?amended cdm:resource_legal_id_celex ?amends .
+        }}
+        OPTIONAL {{
+            ?expr cdm:expression_belongs_to_work ?work .
+            ?expr cdm:expression_uses_language <http://publications.europa.eu/resource/authority/language/ENG> .
+            ?expr cdm:expression_title ?title .
+        }}
+    }}
+    """
+        try:
+            response = sparql.post(query, stage='cellar_lookup')
+            if response.status_code != 200:
+                print(f"  CELEX lookup failed: {response.status_code}")
+                response.close()
+                continue
+            found_in_batch = {}
+            for row in sparql.rows(response):
+                found = found_in_batch.setdefault(row['celex'], {'title': None, 'date': None, 'type': None, 'amends': []})
+                found['title'] = found['title'] or row.get('title') or None
+                found['date'] = found['date'] or (row.get('date') or '')[:10] or None
+                # Resource types are authority IRIs ending in a code such as REG
+                found['type'] = found['type'] or (row.get('type') or '').rsplit('/', 1)[-1] or None
+                if row.get('amends') and row['amends'] not in found['amends']:
+                    found['amends'].append(row['amends'])
+        except Exception as e:
+            print(f"  CELEX lookup error: {e}")
+            continue
+        details.update(found_in_batch)
+        cache.put_many({celex: found_in_batch.get(celex) for celex in batch})
+    return details
@@ -6,151 +6,318 @@ Fetches EU legislation and consultations, matches against Windsor Framework Anne
 import os
 import re
 import json
+import time
+import sys
+import shlex
+import argparse
+import importlib.util
 import requests
-from datetime import datetime, timedelta
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from datetime import date, datetime, timedelta
 from xml.etree import ElementTree
 
+import budget
+import engine
+import profiling
+import scheduler
+import sparql
+from checkpoint import NullState, PartitionLog, RunState
+from mirror import Mirror
+from pipeline import Page, Pipeline
+from sinks import FILE_OUTPUTS, build_sinks, parse_outputs
+from spool import Spool
+from records import Consultation, Feedback, FeedbackCount, Legislation, days_until
+from scoring import (
+    ANNEX2_CATEGORIES, CATEGORIES_BY_NUMBER, PRIORITY_THRESHOLDS, RELEVANCE_WEIGHTS,
+    analysis_for, lookup_celex, match_consultation_to_category, match_legislation_stage, score_legislation_stage,
+)
+
 # ============================================
 # CONFIGURATION
 # ============================================
 SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
 SUPABASE_KEY = os.environ.get('SUPABASE_SERVICE_KEY', '')
 
-# ============================================
-# ANNEX 2 CATEGORIES WITH KEYWORDS
-# ============================================
-ANNEX2_CATEGORIES = [
-    {"number": 1, "name": "General customs aspects", "relevance": "low", "keywords": ["customs", "customs code", "mutual assistance", "recovery of claims"]},
-    {"number": 2, "name": "Protection of the Union's financial interests", "relevance": "low", "keywords": ["anti-fraud", "OLAF", "financial interests"]},
-    {"number": 3, "name": "Trade statistics", "relevance": "low", "keywords": ["trade statistics", "trading of goods", "external trade"]},
-    {"number": 4, "name": "General trade related aspects", "relevance": "low", "keywords": ["tariff preferences", "exports", "imports", "textile", "conflict minerals"]},
-    {"number": 5, "name": "Trade defence instruments", "relevance": "low", "keywords": ["anti-dumping", "anti-subsidy", "safeguard", "subsidised imports"]},
-    {"number": 6, "name": "Regulations on bilateral safeguards", "relevance": "low", "keywords": ["bilateral safeguards", "stabilisation", "association agreement"]},
-    {"number": 7, "name": "Others", "relevance": "medium", "keywords": ["compulsory licensing", "patents", "pharmaceutical products", "public health"]},
-    {"number": 8, "name": "Goods - general provisions", "relevance": "high", "keywords": ["technical regulations", "standardisation", "market surveillance", "product safety", "CE marking", "general product safety"]},
-    {"number": 9, "name": "Motor vehicles", "relevance": "high", "keywords": ["motor vehicles", "type-approval", "vehicle safety", "emissions", "Euro 5", "Euro 6", "tractors", "agricultural vehicles"]},
-    {"number": 10, "name": "Lifting and mechanical handling appliances", "relevance": "medium", "keywords": ["lifts", "wire-ropes", "chains", "hooks", "lifting equipment"]},
-    {"number": 11, "name": "Gas appliances", "relevance": "high", "keywords": ["gas appliances", "boilers", "hot-water boilers", "gaseous fuels"]},
-    {"number": 12, "name": "Pressure vessels", "relevance": "medium", "keywords": ["pressure vessels", "aerosol", "transportable pressure equipment"]},
-    {"number": 13, "name": "Measuring instruments", "relevance": "high", "keywords": ["measuring instruments", "metrological", "weighing", "prepackaged products"]},
-    {"number": 14, "name": "Construction products, machinery, cableways, PPE", "relevance": "high", "keywords": ["construction products", "machinery", "cableways", "personal protective equipment", "PPE"]},
-    {"number": 15, "name": "Electrical and radio equipment", "relevance": "high", "keywords": ["electrical equipment", "radio equipment", "electromagnetic compatibility", "voltage", "low voltage"]},
-    {"number": 16, "name": "Textiles, footwear", "relevance": "high", "keywords": ["textiles", "footwear", "fibre composition", "labelling"]},
-    {"number": 17, "name": "Cosmetics, toys", "relevance": "high", "keywords": ["cosmetics", "toys", "toy safety", "cosmetic products"]},
-    {"number": 18, "name": "Recreational craft", "relevance": "medium", "keywords": ["recreational craft", "personal watercraft", "boats"]},
-    {"number": 19, "name": "Explosives and pyrotechnic articles", "relevance": "medium", "keywords": ["explosives", "pyrotechnic", "fireworks"]},
-    {"number": 20, "name": "Medicinal products", "relevance": "high", "keywords": ["medicinal products", "medicines", "pharmaceuticals", "veterinary medicinal", "clinical trials", "pharmacovigilance"]},
-    {"number": 21, "name": "Medical devices", "relevance": "high", "keywords": ["medical devices", "in vitro diagnostic", "implantable"]},
-    {"number": 22, "name": "Substances of human origin", "relevance": "high", "keywords": ["blood", "tissues", "cells", "organs", "transplantation"]},
-    {"number": 23, "name": "Chemicals and related", "relevance": "high", "keywords": ["chemicals", "REACH", "fertilisers", "detergents", "batteries", "hazardous substances", "chemical substances"]},
-    {"number": 24, "name": "Pesticides, biocides", "relevance": "high", "keywords": ["pesticides", "biocides", "plant protection products", "maximum residue levels", "MRL"]},
-    {"number": 25, "name": "Waste", "relevance": "medium", "keywords": ["waste", "shipments of waste", "packaging waste", "ship recycling", "waste management"]},
-    {"number": 26, "name": "Environment, energy efficiency", "relevance": "high", "keywords": ["environment", "energy efficiency", "invasive species", "ecolabel", "fluorinated gases", "energy labelling", "F-gases"]},
-    {"number": 27, "name": "Marine equipment", "relevance": "low", "keywords": ["marine equipment", "ship equipment"]},
-    {"number": 28, "name": "Rail transport", "relevance": "low", "keywords": ["rail", "railway", "interoperability"]},
-    {"number": 29, "name": "Food - general", "relevance": "high", "keywords": ["food law", "food safety", "EFSA", "food information", "nutrition claims", "health claims"]},
-    {"number": 30, "name": "Food - hygiene", "relevance": "high", "keywords": ["food hygiene", "hygiene of foodstuffs", "food of animal origin"]},
-    {"number": 31, "name": "Food - ingredients, traces, residues", "relevance": "high", "keywords": ["food additives", "flavourings", "contaminants", "novel foods", "infant food", "food supplements"]},
-    {"number": 32, "name": "Food contact material", "relevance": "high", "keywords": ["food contact", "food contact material", "materials intended to come into contact with food"]},
-    {"number": 33, "name": "Food - other", "relevance": "high", "keywords": ["ionising radiation", "organic production", "organic products", "mineral waters"]},
-    {"number": 34, "name": "Feed - products and hygiene", "relevance": "medium", "keywords": ["animal feed", "feed", "feed additives", "medicated feedingstuffs"]},
-    {"number": 35, "name": "GMOs", "relevance": "high", "keywords": ["GMO", "genetically modified", "GM food", "GM feed", "traceability"]},
-    {"number": 36, "name": "Live animals, germinal products", "relevance": "medium", "keywords": ["live animals", "animal health", "bovine", "swine", "poultry", "semen", "embryos"]},
-    {"number": 37, "name": "Animal disease control", "relevance": "medium", "keywords": ["animal disease", "zoonosis", "TSE", "BSE", "avian influenza", "swine fever"]},
-    {"number": 38, "name": "Animal identification", "relevance": "medium", "keywords": ["animal identification", "registration", "traceability", "beef labelling"]},
-    {"number": 39, "name": "Animal breeding", "relevance": "low", "keywords": ["animal breeding", "zootechnical", "breeding animals"]},
-    {"number": 40, "name": "Animal welfare", "relevance": "high", "keywords": ["animal welfare", "protection of animals", "transport of animals", "slaughter"]},
-    {"number": 41, "name": "Plant health", "relevance": "medium", "keywords": ["plant health", "pests of plants", "harmful organisms", "phytosanitary"]},
-    {"number": 42, "name": "Plant reproductive material", "relevance": "low", "keywords": ["seed", "cereal seed", "vegetable seed", "forest reproductive material"]},
-    {"number": 43, "name": "Official controls, veterinary checks", "relevance": "medium", "keywords": ["official controls", "veterinary checks", "border inspection"]},
-    {"number": 44, "name": "Sanitary and phytosanitary - Other", "relevance": "high", "keywords": ["hormones", "beta-agonists", "residue monitoring"]},
-    {"number": 45, "name": "Intellectual property", "relevance": "high", "keywords": ["geographical indications", "PDO", "PGI", "spirit drinks", "wine"]},
-    {"number": 46, "name": "Fisheries and aquaculture", "relevance": "medium", "keywords": ["fisheries", "aquaculture", "fish", "IUU fishing", "bluefin tuna"]},
-    {"number": 47, "name": "Other", "relevance": "medium", "keywords": ["crude oil", "euro coins", "tobacco", "cultural goods", "dual-use items", "weapons", "firearms"]}
-]
+# Per-part wall clock limits (seconds) when PART 1 and PART 2 run together
+LEGISLATION_TIMEOUT = int(os.environ.get('LEGISLATION_TIMEOUT', 1200))
+CONSULTATION_TIMEOUT = int(os.environ.get('CONSULTATION_TIMEOUT', 600))
+
+# Where --profile writes per-stage profiles when no directory is given
+PROFILE_DIR = 'profile'
 
+# Stored rows per page when rescoring
+RESCORE_PAGE_SIZE = 2000
 
 # ============================================
 # LEGISLATION FETCHING (EUR-Lex)
 # ============================================
 
-def fetch_eurlex_cellar_api():
-    """Fetch from EUR-Lex CELLAR API using SPARQL"""
-    print("Fetching from CELLAR SPARQL API...")
-    legislation = []
-    
-    sparql_endpoint = "https://publications.europa.eu/webapi/rdf/sparql"
-    
-    query = """
+# Sixth CELEX character -> legislation type, for the sector-3 acts we track
+CELEX_TYPE_CODES = {'R': 'Regulation', 'L': 'Directive', 'D': 'Decision'}
+
+# How much filtering the CELLAR query does server-side:
+#   off      - CELEX year/date only; type filtering happens client-side
+#   type     - also only R/L/D acts, with the type code returned by the endpoint
+#   keywords - also only titles matching an Annex 2 keyword
+PUSHDOWN_LEVELS = ('off', 'type', 'keywords')
+
+# Field-level source precedence when records for one CELEX are fused
+SOURCE_RANK = {'cellar': 3, 'cellar-lookup': 2, 'oj': 2, 'rss': 1, 'annex2-list': 1}
+FUSED_FIELDS = ('title', 'date_published')
+
+# Sources selectable with --source
+LEGISLATION_SOURCES = ('cellar', 'rss')
+CONSULTATION_SOURCES = ('portal', 'refresh', 'feedback')
+
+# Publication days the oj command covers when --from is not given
+OJ_DAYS = int(os.environ.get('OJ_DAYS', 7))
+
+
+def keyword_regex():
+    """Coarse case-insensitive alternation of every Annex 2 keyword (XPath regex syntax)"""
+    keywords = sorted({k.lower() for c in ANNEX2_CATEGORIES for k in c['keywords']}, key=len, reverse=True)
+    return '|'.join(re.sub(r'([.^$*+?()\[\]{}|\\])', r'\\\1', k) for k in keywords)
+
+
+def cellar_filter(years=None, date_range=None, pushdown='type'):
+    """
+    Build the SPARQL FILTER expression for the CELLAR query
+    date_range=(start, end) selects sector-3 acts dated start <= date < end
+    (ISO dates); otherwise CELEX numbers from the given years are matched,
+    defaulting to the current year and the two before it. The pushdown
+    level adds the type and keyword filters (see PUSHDOWN_LEVELS).
+    """
+    if date_range:
+        start, end = date_range
+        clauses = [
+            'STRSTARTS(STR(?celex), "3")',
+            f'?date >= "{start}"^^xsd:date && ?date < "{end}"^^xsd:date',
+        ]
+    else:
+        if years is None:
+            this_year = datetime.now().year
+            years = range(this_year - 2, this_year + 1)
+        clauses = ['(' + " || ".join(f'STRSTARTS(STR(?celex), "3{year}")' for year in years) + ')']
+    
+    if pushdown in ('type', 'keywords'):
+        codes = ', '.join(f'"{code}"' for code in CELEX_TYPE_CODES)
+        clauses.append(f'?typecode IN ({codes})')
+    if pushdown == 'keywords':
+        pattern = keyword_regex().replace('\\', '\\\\')
+        clauses.append(f'REGEX(?title, "{pattern}", "i")')
+    
+    return " &&\n            ".join(clauses)
+
+
+def cellar_query(years=None, date_range=None, pushdown='type', by_value=False):
+    """
+    The paged CELLAR SELECT, with {limit} and {after} left to fill in
+    by_value puts Regulations ahead of the other acts, newest first within
+    each, for runs that may not get through every page. Pages are read by
+    keyset: {after} is cellar_after() of the last row of the page before,
+    so a page starts at the same act however many were added since.
+    """
+    order = 'DESC(?typecode = "R") DESC(?date) ?celex' if by_value else 'DESC(?date) ?celex'
+    return """
     PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
     PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
     
-    SELECT DISTINCT ?celex ?title ?date WHERE {
+    SELECT DISTINCT ?celex ?title ?date ?typecode WHERE {{{{
         ?work cdm:resource_legal_id_celex ?celex .
         ?work cdm:work_date_document ?date .
         ?expr cdm:expression_belongs_to_work ?work .
         ?expr cdm:expression_uses_language <http://publications.europa.eu/resource/authority/language/ENG> .
         ?expr cdm:expression_title ?title .
+        BIND(SUBSTR(STR(?celex), 6, 1) AS ?typecode)
         
         FILTER(
-            STRSTARTS(STR(?celex), "32024") || 
-            STRSTARTS(STR(?celex), "32025") || 
-            STRSTARTS(STR(?celex), "32026")
+            {filter}{{after}}
         )
-    }
-    ORDER BY DESC(?date)
-    LIMIT 150
+    }}}}
+    ORDER BY {order}
+    LIMIT {{limit}}
+    """.format(filter=cellar_filter(years, date_range, pushdown), order=order)
+
+
+def cellar_cursor(row, by_value=False):
     """
-    
-    try:
-        response = requests.post(
-            sparql_endpoint,
-            data={'query': query},
-            headers={
-                'Accept': 'application/sparql-results+json',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'User-Agent': 'Mozilla/5.0 (compatible; NI-EU-Law-Tracker/1.0)'
-            },
-            timeout=60
-        )
-        
-        print(f"  SPARQL response status: {response.status_code}")
-        
-        if response.status_code == 200:
-            results = response.json()
-            bindings = results.get('results', {}).get('bindings', [])
-            print(f"  Found {len(bindings)} results from SPARQL")
+    Keyset position of a CELLAR result row: 'date|celex', led by 'R|' or
+    '-|' in value order. Rows past it in the query's order come after it.
+    """
+    position = f"{row.get('date', '')}|{row.get('celex', '')}"
+    if by_value:
+        return ('R|' if (row.get('typecode') or '').upper() == 'R' else '-|') + position
+    return position
+
+
+def cellar_after(cursor, by_value=False):
+    """The FILTER condition for the rows after a cursor ('' for the first page)"""
+    if not cursor:
+        return ''
+    *flag, date, celex = (part.replace('\\', '\\\\').replace('"', '\\"') for part in cursor.split('|'))
+    later = f'(?date < "{date}"^^xsd:date || (?date = "{date}"^^xsd:date && STR(?celex) > "{celex}"))'
+    if by_value:
+        if flag == ['R']:
+            later = f'((?typecode = "R" && {later}) || ?typecode != "R")'
+        else:
+            later = f'(?typecode != "R" && {later})'
+    return f" &&\n            {later}"
+
+
+def cellar_record(row, pushdown='type'):
+    """Legislation record for one CELLAR result row, or None if it is not one we track"""
+    celex = row.get('celex')
+    title = row.get('title')
+    if not (celex and title):
+        return None
+    if pushdown == 'off':
+        # Nothing was filtered server-side
+        if not is_relevant_celex(celex):
+            return None
+        leg_type = determine_legislation_type(celex, title)
+    else:
+        leg_type = CELEX_TYPE_CODES[row['typecode'].upper()]
+    
+    return Legislation(
+        celex_number=celex,
+        title=clean_title(title),
+        date_published=(row.get('date') or '')[:10] or None,
+        legislation_type=leg_type,
+        provenance={'title': 'cellar', 'date_published': 'cellar'}
+    )
+
+
+class CellarError(RuntimeError):
+    """A CELLAR page could not be fetched, so the results past it are unknown"""
+
+
+def cellar_order(state):
+    """
+    Order CELLAR pages are read in: most valuable first when there is a
+    time budget, else by date. It is saved with the run, so a resumed run
+    pages (and keys its pages) the same way whatever its own budget.
+    """
+    return state.setting('order', 'value' if budget.BUDGET.deadline is not None else 'date')
+
+
+def fetch_eurlex_cellar_api(page_size=50, max_items=150, skip_page=None, page_next=None,
+                            years=None, date_range=None, key_prefix='legislation:cellar',
+                            pushdown='type', carried=(), order='date'):
+    """
+    Fetch from EUR-Lex CELLAR API using SPARQL
+    Yields one page of legislation at a time so saving can start early.
+    Pages are keyed by the keyset cursor they start after, so a page key
+    names the same acts from one run to the next. Pages for which
+    skip_page(key) is true were committed by an earlier attempt of this
+    run and are not yielded again; page_next(key) gives the page's
+    page.next_page as it was committed, so it is not fetched either.
+    max_items=None fetches every page (used
+    by backfill partitions). Each page records its payload size on the
+    wire and its read-and-parse time, so push-down levels and result
+    formats can be compared. order is 'date', or 'value' for the most
+    valuable acts first (see cellar_order). carried holds the runs of
+    pages the last run deferred, as (cursor, items) with items None for
+    no limit; they are fetched before the rest. Once the time budget runs
+    short, the pages not yet fetched are deferred the same way. A page
+    that fails for any other reason raises CellarError.
+    """
+    print(f"Fetching from CELLAR SPARQL API ({key_prefix}, push-down: {pushdown})...")
+    
+    by_value = order == 'value'
+    query_template = cellar_query(years, date_range, pushdown, by_value=by_value)
+    # Each run of pages: (cursor to start after, rows wanted or None). The
+    # carried rows count towards max_items, as they did for the last run
+    runs = [tuple(run) for run in carried]
+    rest = None if max_items is None else max_items - sum(items or 0 for _, items in runs)
+    if rest is None or rest > 0:
+        runs.append((None, rest))
+    
+    def defer_runs(cursor, items, later):
+        budget.BUDGET.defer('cellar', *(
+            {'prefix': key_prefix, 'order': order, 'cursor': c, 'items': n} for c, n in [(cursor, items), *later]
+        ))
+        print(f"  Time budget short, deferring the pages after {cursor or 'the first'}")
+    
+    for n, (cursor, items) in enumerate(runs):
+        fetched = 0
+        while items is None or fetched < items:
+            key = f"{key_prefix}:{order}:{cursor or 'first'}"
+            limit = page_size if items is None else min(page_size, items - fetched)
+            committed = skip_page and page_next and skip_page(key) and page_next(key)
+            if committed:
+                print(f"  Skipping committed page after {cursor or 'the first'}")
+                cursor, returned = committed
+                fetched += returned
+                if cursor is None:
+                    break
+                continue
+            if not budget.BUDGET.allows():
+                defer_runs(cursor, None if items is None else items - fetched, runs[n + 1:])
+                return
+            query = query_template.format(limit=limit, after=cellar_after(cursor, by_value))
+            try:
+                response = sparql.post(query, stage='cellar')
+                print(f"  SPARQL response status: {response.status_code} (after {cursor or 'the first'})")
+                if response.status_code != 200:
+                    response.close()
+                    raise CellarError(f"SPARQL response status {response.status_code} after {cursor or 'the first'}")
+                page, returned, last = read_cellar_page(response, key, pushdown, by_value)
+                # Where the results carry on, for a resumed run to step over this page
+                page.next_page = [last if returned == limit else None, returned]
+            except Exception as e:
+                print(f"  SPARQL error: {e}")
+                if not budget.BUDGET.allows():
+                    # Cut short by the budget's shrunken timeout
+                    defer_runs(cursor, None if items is None else items - fetched, runs[n + 1:])
+                    return
+                # The pages after this one are unknown, so the fetch failed
+                raise e if isinstance(e, CellarError) else CellarError(f"{e} after {cursor or 'the first'}")
             
-            for binding in bindings:
-                celex = binding.get('celex', {}).get('value', '')
-                title = binding.get('title', {}).get('value', '')
-                date = binding.get('date', {}).get('value', '')[:10] if binding.get('date', {}).get('value') else None
-                
-                if celex and title and is_relevant_celex(celex):
-                    leg_type = determine_legislation_type(celex, title)
-                    legislation.append({
-                        'celex_number': celex,
-                        'title': clean_title(title),
-                        'date_published': date,
-                        'legislation_type': leg_type,
-                        'eurlex_url': f"https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:{celex}"
-                    })
-                    
-    except Exception as e:
-        print(f"  SPARQL error: {e}")
-    
-    return legislation
+            if skip_page and skip_page(key):
+                print(f"  Skipping committed page after {cursor or 'the first'}")
+            else:
+                yield page
+            
+            fetched += returned
+            if returned < limit:
+                break
+            cursor = last
+
+
+def read_cellar_page(response, key, pushdown='type', by_value=False):
+    """
+    Read one streamed CELLAR response into a page
+    Returns (page, rows returned, cursor of the last row); the page records
+    its payload size on the wire and its read-and-parse time.
+    """
+    legislation = Page(key)
+    returned = 0
+    last = None
+    parse_started = time.perf_counter()
+    for row in sparql.rows(response):
+        returned += 1
+        last = row
+        record = cellar_record(row, pushdown)
+        if record is not None:
+            legislation.append(record)
+    
+    legislation.payload_bytes = sparql.wire_bytes(response)
+    legislation.parse_seconds = time.perf_counter() - parse_started
+    print(f"  Found {returned} results from SPARQL "
+          f"({legislation.payload_bytes / 1024:.0f} KB, read and parsed in {legislation.parse_seconds * 1000:.0f} ms)")
+    return legislation, returned, last and cellar_cursor(last, by_value)
 
 
 def fetch_eurlex_rss():
     """Fetch recent legislation from EUR-Lex RSS feeds"""
     print("Fetching from EUR-Lex RSS feeds...")
-    legislation = []
+    legislation = Page('legislation:rss')
     
     rss_url = "https://eur-lex.europa.eu/rss.do?rssId=legislation"
     
     try:
-        response = requests.get(rss_url, timeout=30, headers={
+        response = scheduler.request('GET', rss_url, stage='rss', timeout=30, headers={
             'User-Agent': 'Mozilla/5.0 (compatible; NI-EU-Law-Tracker/1.0)'
         })
         
@@ -173,13 +340,12 @@ def fetch_eurlex_rss():
                     
                     if celex and is_relevant_celex(celex):
                         leg_type = determine_legislation_type(celex, title)
-                        legislation.append({
-                            'celex_number': celex,
-                            'title': clean_title(title),
-                            'date_published': None,
-                            'legislation_type': leg_type,
-                            'eurlex_url': f"https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:{celex}"
-                        })
+                        legislation.append(Legislation(
+                            celex_number=celex,
+                            title=clean_title(title),
+                            legislation_type=leg_type,
+                            provenance={'title': 'rss'}
+                        ))
                         
     except Exception as e:
         print(f"  RSS error: {e}")
@@ -187,88 +353,128 @@ def fetch_eurlex_rss():
     return legislation
 
 
+def fetch_oj_day(day, record_dir=None):
+    """
+    Acts published in the Official Journal L series on one day, as a page
+    A failed download raises, so the day is not checkpointed and is
+    fetched again by a resumed run.
+    """
+    import oj
+    
+    legislation = Page(f"legislation:oj:{day.isoformat()}")
+    for celex, title in oj.fetch_day(day, record_dir):
+        if is_relevant_celex(celex):
+            legislation.append(Legislation(
+                celex_number=celex,
+                title=clean_title(title),
+                date_published=day.isoformat(),
+                legislation_type=determine_legislation_type(celex, title),
+                provenance={'title': 'oj', 'date_published': 'oj'}
+            ))
+    print(f"  OJ L {day.isoformat()}: {len(legislation)} acts")
+    return legislation
+
+
+def fuse_fields(record, values, sources):
+    """
+    Merge values into record where the record has nothing yet or the new
+    source ranks higher (SOURCE_RANK); provenance follows each field.
+    Returns True if anything changed.
+    """
+    changed = False
+    for name, value in values.items():
+        if value is None:
+            continue
+        source = sources.get(name)
+        current = record.provenance.get(name)
+        if getattr(record, name) is None or SOURCE_RANK.get(source, 0) > SOURCE_RANK.get(current, 0):
+            if getattr(record, name) != value or current != source:
+                setattr(record, name, value)
+                record.provenance[name] = source
+                changed = True
+    return changed
+
+
 # ============================================
 # CONSULTATION FETCHING (EU Have Your Say)
 # ============================================
 
-def fetch_eu_consultations():
+def fetch_eu_consultations(skip_page=None):
     """
     Fetch open consultations from EU Have Your Say portal
     Uses the eu_consultations package
+    Yields one page of consultations per topic area, skipping topics for
+    which skip_page(key) is true
     """
     print("\n" + "=" * 50)
     print("Fetching EU Consultations...")
     print("=" * 50)
     
-    consultations = []
-    
     # Try the eu_consultations package
     try:
         print("  Importing eu_consultations package...")
         from eu_consultations.scrape import scrape
-        
-        # Scrape consultations - the package handles the API access
-        # We'll search for topics relevant to Windsor Framework / consumer protection
-        topics_to_search = [
-            "AGRI",      # Agriculture
-            "FOOD",      # Food safety
-            "ENV",       # Environment
-            "CLIMA",     # Climate
-            "GROW",      # Internal market
-            "SANTE",     # Health
-            "JUST",      # Justice and consumers
-            "TRADE",     # Trade
-            "ENER",      # Energy
-            "MOVE",      # Transport
-        ]
-        
-        print(f"  Scraping consultations for {len(topics_to_search)} topic areas...")
-        
-        for topic in topics_to_search:
-            try:
-                print(f"    Checking topic: {topic}")
-                initiatives = scrape(
-                    topic_list=[topic],
-                    max_pages=1,  # Limit to first page for speed
-                    max_feedback=None,
-                    output_folder=None,  # Don't save to disk
-                    filename=None
-                )
-                
-                if initiatives:
-                    print(f"      Found {len(initiatives)} initiatives")
-                    for init in initiatives:
-                        consultation = process_initiative_from_package(init)
-                        if consultation:
-                            # Check if we already have this one
-                            existing_ids = [c['initiative_id'] for c in consultations]
-                            if consultation['initiative_id'] not in existing_ids:
-                                consultations.append(consultation)
-                                
-            except Exception as e:
-                print(f"      Error scraping {topic}: {e}")
-                continue
-        
-        print(f"  Total unique consultations found: {len(consultations)}")
-                
     except ImportError as e:
         print(f"  eu_consultations package not available: {e}")
         print("  Falling back to direct API...")
-        consultations = fetch_consultations_api()
-    except Exception as e:
-        print(f"  Package error: {e}")
-        print("  Falling back to direct API...")
-        consultations = fetch_consultations_api()
+        if not (skip_page and skip_page('consultations:api')) and budget.BUDGET.allows('topics', 'api'):
+            yield fetch_consultations_api()
+        return
+    
+    # Scrape consultations - the package handles the API access
+    # We'll search for topics relevant to Windsor Framework / consumer protection
+    topics_to_search = [
+        "AGRI",      # Agriculture
+        "FOOD",      # Food safety
+        "ENV",       # Environment
+        "CLIMA",     # Climate
+        "GROW",      # Internal market
+        "SANTE",     # Health
+        "JUST",      # Justice and consumers
+        "TRADE",     # Trade
+        "ENER",      # Energy
+        "MOVE",      # Transport
+    ]
     
-    print(f"\nTotal consultations found: {len(consultations)}")
+    # Topics the last run ran out of time for go first
+    carried = budget.BUDGET.take('topics')
+    topics_to_search.sort(key=lambda topic: topic not in carried)
     
-    if consultations:
-        print("\nSample consultations:")
-        for c in consultations[:5]:
-            days = c.get('days_remaining', '?')
-            print(f"  - {c['title'][:50]}... (closes in {days} days)")
+    print(f"  Scraping consultations for {len(topics_to_search)} topic areas...")
     
-    return consultations
+    for topic in topics_to_search:
+        key = f"consultations:topic:{topic}"
+        if skip_page and skip_page(key):
+            print(f"    Skipping committed topic: {topic}")
+            continue
+        if not budget.BUDGET.allows('topics', topic):
+            print(f"    Time budget short, deferring topic: {topic}")
+            continue
+        
+        consultations = Page(key)
+        try:
+            print(f"    Checking topic: {topic}")
+            initiatives = scrape(
+                topic_list=[topic],
+                max_pages=1,  # Limit to first page for speed
+                max_feedback=None,
+                output_folder=None,  # Don't save to disk
+                filename=None
+            )
+            
+            if initiatives:
+                print(f"      Found {len(initiatives)} initiatives")
+                for init in initiatives:
+                    consultation = process_initiative_from_package(init)
+                    if consultation:
+                        consultations.append(consultation)
+                        
+        except Exception as e:
+            print(f"      Error scraping {topic}: {e}")
+            continue
+        
+        if consultations:
+            yield consultations
 
 
 def process_initiative_from_package(init):
@@ -304,28 +510,17 @@ def process_initiative_from_package(init):
         if not has_open:
             return None
         
-        # Calculate days remaining
-        days_remaining = 30  # Default
-        if end_date:
-            try:
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-                days_remaining = (end_dt - datetime.now()).days
-            except:
-                pass
-        
-        if days_remaining < 0:
+        # Skip periods that have already closed
+        days_left = days_until(end_date)
+        if days_left is not None and days_left < 0:
             return None
         
-        return {
-            'title': str(title),
-            'initiative_id': initiative_id,
-            'consultation_url': f"https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives/{initiative_id}_en",
-            'date_opens': start_date,
-            'date_closes': end_date,
-            'days_remaining': max(days_remaining, 0),
-            'status': 'open',
-            'policy_areas': []
-        }
+        return Consultation(
+            initiative_id=initiative_id,
+            title=str(title),
+            date_opened=start_date,
+            date_closes=end_date
+        )
         
     except Exception as e:
         print(f"      Error processing initiative: {e}")
@@ -335,7 +530,7 @@ def process_initiative_from_package(init):
 def fetch_consultations_api():
     """Fetch consultations directly from the Better Regulation API"""
     print("  Trying Better Regulation API...")
-    consultations = []
+    consultations = Page('consultations:api')
     
     api_url = "https://ec.europa.eu/info/law/better-regulation/brpapi/searchInitiatives"
     
@@ -347,8 +542,10 @@ def fetch_consultations_api():
     }
     
     try:
-        response = requests.get(
+        response = scheduler.request(
+            'GET',
             api_url,
+            stage='consultations',
             params=params,
             headers={
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -411,28 +608,269 @@ def process_initiative(init):
             start_date = period.get('startDate', '')[:10] if period.get('startDate') else None
             break
     
-    # Calculate days remaining
-    days_remaining = 30  # Default
-    if end_date:
-        try:
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            days_remaining = (end_dt - datetime.now()).days
-        except:
-            pass
+    # Skip periods that have already closed
+    days_left = days_until(end_date)
+    if days_left is not None and days_left < 0:
+        return None
     
-    if days_remaining < 0:
+    return Consultation(
+        initiative_id=initiative_id,
+        title=title,
+        date_opened=start_date,
+        date_closes=end_date,
+        policy_areas=init.get('topics', [])
+    )
+
+
+INITIATIVE_API = "https://ec.europa.eu/info/law/better-regulation/brpapi/groupInitiatives"
+
+
+async def fetch_initiative_async(initiative_id):
+    """
+    Re-poll a single initiative from the Better Regulation API
+    Returns (ok, consultation): consultation is None when the initiative
+    no longer has an open feedback period.
+    """
+    api_url = f"{INITIATIVE_API}/{initiative_id}"
+    
+    try:
+        response = await engine.ENGINE.request(
+            'GET',
+            api_url,
+            stage='consultations',
+            params={'language': 'EN'},
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'Accept': 'application/json',
+                'Referer': 'https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives_en'
+            },
+            timeout=30
+        )
+        if response.status_code != 200:
+            print(f"    Re-poll {initiative_id}: {response.status_code}")
+            return False, None
+        return True, process_initiative(response.json())
+    except Exception as e:
+        print(f"    Re-poll {initiative_id} failed: {e}")
+        return False, None
+
+
+def fetch_initiative(initiative_id):
+    """Blocking fetch_initiative_async()"""
+    return engine.run(fetch_initiative_async(initiative_id))
+
+
+# ============================================
+# CONSULTATION REFRESH SCHEDULING
+# Known consultations are only re-polled when their status could have
+# changed, and only rows that are new or changed are written
+# ============================================
+
+CLOSING_SOON_DAYS = 7
+JUST_OPENED_DAYS = 3
+STALE_AFTER_DAYS = int(os.environ.get('CONSULTATION_STALE_DAYS', 7))
+
+
+def load_known_consultations(mirror):
+    """All stored consultations keyed by initiative id"""
+    return {str(row['initiative_id']): row for row in mirror.rows('consultations')}
+
+
+def refresh_reason(row, today=None):
+    """Why a stored consultation should be re-checked today, or None"""
+    if row.get('status') != 'open':
         return None
     
-    return {
-        'title': title,
-        'initiative_id': initiative_id,
-        'consultation_url': f"https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives/{initiative_id}_en",
-        'date_opens': start_date,
-        'date_closes': end_date,
-        'days_remaining': max(days_remaining, 0),
-        'status': 'open',
-        'policy_areas': init.get('topics', [])
-    }
+    closes = days_until(row.get('date_closes'), today)
+    if closes is not None and closes < 0:
+        return 'closed'
+    if closes is not None and closes <= CLOSING_SOON_DAYS:
+        return 'closing soon'
+    
+    opened = days_until(row.get('date_opened'), today)
+    if opened is not None and -JUST_OPENED_DAYS <= opened <= 0:
+        return 'just opened'
+    
+    last_checked = days_until(row.get('last_checked'), today)
+    if last_checked is None or last_checked <= -STALE_AFTER_DAYS:
+        return 'stale'
+    return None
+
+
+def consultation_value(row):
+    """
+    Worth of re-checking a stored consultation early when time is short:
+    its category's relevance, then how soon it closes
+    """
+    category = CATEGORIES_BY_NUMBER.get(row.get('category_number') or match_consultation_to_category(row.get('title') or ''))
+    closes = days_until(row.get('date_closes'))
+    return (RELEVANCE_WEIGHTS.get(category['relevance'], 0) if category else 0,
+            -closes if closes is not None else -CLOSING_SOON_DAYS * 10)
+
+
+def refresh_known_consultations(known, seen, skip_page=None):
+    """
+    Source stage: re-poll stored open consultations that are due
+    Initiatives already returned by discovery this run (seen) are not
+    polled again. Consultations past their closing date are closed
+    without an upstream call. The rest are polled most valuable first
+    (re-checks the last run deferred ahead of everything), and those
+    the time budget has no room for are deferred.
+    """
+    key = 'consultations:refresh'
+    if skip_page and skip_page(key):
+        return
+    
+    carried = set(budget.BUDGET.take('refresh'))
+    reasons = {}
+    for initiative_id, row in known.items():
+        reason = refresh_reason(row) or ('deferred' if initiative_id in carried and row.get('status') == 'open' else None)
+        if reason and initiative_id not in seen:
+            reasons[initiative_id] = reason
+    order = sorted(reasons, key=lambda i: (i not in carried, [-v for v in consultation_value(known[i])]))
+    
+    page = Page(key)
+    due = {}
+    for initiative_id in order:
+        reason = reasons[initiative_id]
+        due[reason] = due.get(reason, 0) + 1
+        if reason == 'closed':
+            page.append(stored_consultation(known[initiative_id], status='closed'))
+    
+    def polled():
+        for initiative_id in order:
+            if reasons[initiative_id] != 'closed' and budget.BUDGET.allows('refresh', initiative_id):
+                yield initiative_id
+    
+    async def poll(initiative_id):
+        return initiative_id, await fetch_initiative_async(initiative_id)
+    
+    # Polled as engine tasks, as many at once as the API host allows
+    window = engine.ENGINE.concurrency(INITIATIVE_API)
+    for initiative_id, (ok, consultation) in engine.ENGINE.imap(poll, polled(), window):
+        if consultation:
+            page.append(consultation)
+        elif ok:
+            page.append(stored_consultation(known[initiative_id], status='closed'))
+    
+    summary = ', '.join(f"{n} {reason}" for reason, n in sorted(due.items())) or 'none'
+    print(f"  Re-checking {sum(due.values())} of {len(known)} stored consultations ({summary})")
+    yield page
+
+
+def stored_consultation(row, **changes):
+    """Rebuild a Consultation from a stored row"""
+    consultation = Consultation(
+        initiative_id=str(row['initiative_id']),
+        title=row.get('title') or '',
+        date_opened=row.get('date_opened'),
+        date_closes=row.get('date_closes'),
+        status=row.get('status') or 'open'
+    )
+    for name, value in changes.items():
+        setattr(consultation, name, value)
+    return consultation
+
+
+def consultation_changed(consultation, row):
+    """True if a fetched consultation differs from its stored row"""
+    return (
+        consultation.title != row.get('title') or
+        consultation.status != row.get('status') or
+        (consultation.date_opened or None) != (str(row['date_opened'])[:10] if row.get('date_opened') else None) or
+        (consultation.date_closes or None) != (str(row['date_closes'])[:10] if row.get('date_closes') else None)
+    )
+
+
+# ============================================
+# CONSULTATION FEEDBACK
+# Feedback is counted incrementally: each initiative's feedback is read
+# newest first, only down to the highest feedback id counted before, and
+# not at all when the initiative's totals show nothing new. A steady-state
+# run pages through new feedback only.
+# ============================================
+
+FEEDBACK_API = "https://ec.europa.eu/info/law/better-regulation/api/allFeedback"
+FEEDBACK_PAGE_SIZE = int(os.environ.get('FEEDBACK_PAGE_SIZE', 100))
+
+# Consultations are still counted for this many days after they close
+FEEDBACK_GRACE_DAYS = 7
+
+FEEDBACK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Referer': 'https://ec.europa.eu/info/law/better-regulation/have-your-say/initiatives_en'
+}
+
+
+def feedback_due(row, today=None):
+    """True if a stored consultation's feedback should be counted this run"""
+    if row.get('status') == 'open':
+        return True
+    closes = days_until(row.get('date_closes'), today)
+    return closes is not None and closes >= -FEEDBACK_GRACE_DAYS
+
+
+async def fetch_feedback_async(initiative_id, count=None, last_id=None):
+    """
+    Feedback on one initiative newer than last_id, from each of its
+    publications, newest first. count and last_id are what the stored row
+    has. Returns (ok, FeedbackCount), the count being None when nothing
+    changed.
+    """
+    try:
+        response = await engine.ENGINE.request(
+            'GET', f"{INITIATIVE_API}/{initiative_id}", stage='feedback',
+            params={'language': 'EN'}, headers=FEEDBACK_HEADERS, timeout=30
+        )
+        if response.status_code != 200:
+            print(f"    Feedback {initiative_id}: {response.status_code}")
+            return False, None
+        publications = [p for p in response.json().get('publications') or [] if p.get('id')]
+        totals = [p.get('totalFeedback') for p in publications]
+        total = None if None in totals else sum(totals)
+        if total is not None and total == count:
+            return True, None
+        
+        items = []
+        for publication in publications:
+            if publication.get('totalFeedback') == 0:
+                continue
+            page = 0
+            while True:
+                response = await engine.ENGINE.request(
+                    'GET', FEEDBACK_API, stage='feedback',
+                    params={'publicationId': publication['id'], 'page': page, 'size': FEEDBACK_PAGE_SIZE,
+                            'sort': 'id,DESC', 'language': 'EN'},
+                    headers=FEEDBACK_HEADERS, timeout=30
+                )
+                if response.status_code != 200:
+                    print(f"    Feedback {initiative_id} (publication {publication['id']}): {response.status_code}")
+                    return False, None
+                data = response.json()
+                batch = data.get('_embedded', {}).get('feedback', [])
+                new = [f for f in batch if last_id is None or int(f['id']) > last_id]
+                items.extend(Feedback.from_api(f, initiative_id, publication['id']) for f in new)
+                page += 1
+                # Newest first, so the first already-counted id ends the publication
+                if len(new) < len(batch) or len(batch) < FEEDBACK_PAGE_SIZE:
+                    break
+                if page >= data.get('page', {}).get('totalPages', page + 1):
+                    break
+    except Exception as e:
+        print(f"    Feedback {initiative_id} failed: {e}")
+        return False, None
+    
+    newest = max((f.id for f in items), default=last_id)
+    new_count = total if total is not None else (count or 0) + len(items)
+    if new_count == count and newest == last_id:
+        return True, None
+    return True, FeedbackCount(str(initiative_id), new_count, newest, items)
+
+
+def fetch_feedback(initiative_id, count=None, last_id=None):
+    """Blocking fetch_feedback_async()"""
+    return engine.run(fetch_feedback_async(initiative_id, count, last_id))
 
 
 # ============================================
@@ -499,380 +937,1108 @@ def clean_title(title):
     return title
 
 
-def match_to_category(title):
-    """Match legislation title to Annex 2 category based on keywords"""
-    title_lower = title.lower()
-    
-    best_match = None
-    best_score = 0
-    matched_keywords = []
-    
-    for category in ANNEX2_CATEGORIES:
-        score = 0
-        keywords_found = []
-        
-        for keyword in category['keywords']:
-            if keyword.lower() in title_lower:
-                score += 1
-                keywords_found.append(keyword)
-        
-        if score > best_score:
-            best_score = score
-            best_match = category['number']
-            matched_keywords = keywords_found
-    
-    is_direct_match = best_score >= 2
-    
-    return best_match, is_direct_match, matched_keywords
-
-
-def match_consultation_to_category(title, policy_areas=None):
-    """Match a consultation to an Annex 2 category"""
-    title_lower = title.lower()
-    
-    best_match = None
-    best_score = 0
-    
-    for category in ANNEX2_CATEGORIES:
-        score = 0
-        for keyword in category['keywords']:
-            if keyword.lower() in title_lower:
-                score += 1
-        
-        if score > best_score:
-            best_score = score
-            best_match = category['number']
-    
-    return best_match if best_score > 0 else None
-
-
-def calculate_score(item):
-    """Calculate priority score"""
-    score = 0
-    
-    if item.get('is_direct_annex2_match'):
-        score += 10
-    elif item.get('is_keyword_match'):
-        score += 5
-    
-    category_num = item.get('category_number')
-    if category_num:
-        category = next((c for c in ANNEX2_CATEGORIES if c['number'] == category_num), None)
-        if category:
-            if category['relevance'] == 'high':
-                score += 3
-            elif category['relevance'] == 'medium':
-                score += 1
-    
-    leg_type = item.get('legislation_type')
-    if leg_type == 'Regulation':
-        score += 2
-    elif leg_type in ['Directive', 'Decision']:
-        score += 1
-    
-    if score >= 18:
-        priority = 'critical'
-    elif score >= 12:
-        priority = 'high'
-    elif score >= 6:
-        priority = 'medium'
-    else:
-        priority = 'low'
-    
-    return score, priority
-
-
 # ============================================
 # DATABASE FUNCTIONS
 # ============================================
 
-def save_to_supabase(legislation):
-    """Save legislation to Supabase database"""
+def save_to_supabase(legislation, mirror, change_op=None):
+    """
+    Save legislation to Supabase database
+    Rows identical to the mirror are skipped; the rest go in bulk upserts.
+    """
     if not SUPABASE_KEY:
         print("ERROR: SUPABASE_SERVICE_KEY not set")
         return {'inserted': 0, 'errors': ['No API key']}
     
-    headers = {
-        'apikey': SUPABASE_KEY,
-        'Authorization': f'Bearer {SUPABASE_KEY}',
-        'Content-Type': 'application/json',
-        'Prefer': 'resolution=merge-duplicates'
-    }
-    
-    inserted = 0
-    errors = []
-    
-    for item in legislation:
-        data = {
-            'celex_number': item['celex_number'],
-            'title': item['title'],
-            'legislation_type': item.get('legislation_type'),
-            'category_number': item.get('category_number'),
-            'is_direct_annex2_match': item.get('is_direct_annex2_match', False),
-            'is_keyword_match': item.get('is_keyword_match', False),
-            'matched_keywords': item.get('matched_keywords', []),
-            'date_published': item.get('date_published'),
-            'eurlex_url': item.get('eurlex_url'),
-            'status': 'active',
-            'date_scraped': datetime.now().isoformat()
-        }
-        
-        try:
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/legislation",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code in [200, 201, 409]:
-                inserted += 1
-            else:
-                errors.append(f"{item['celex_number']}: {response.status_code}")
-                
-        except Exception as e:
-            errors.append(f"{item['celex_number']}: {str(e)}")
-    
+    now = datetime.now().isoformat()
+    payloads = [item.to_payload(status='active', date_scraped=now) for item in legislation]
+    inserted, errors = mirror.upsert('legislation', payloads, stage='save_legislation', change_op=change_op)
     return {'inserted': inserted, 'errors': errors}
 
 
-def save_analysis_results(legislation):
+def save_analysis_results(legislation, mirror, change_op=None):
     """Save calculated scores to analysis_results table"""
     if not SUPABASE_KEY:
         return {'saved': 0, 'errors': ['No API key']}
     
-    headers = {
-        'apikey': SUPABASE_KEY,
-        'Authorization': f'Bearer {SUPABASE_KEY}',
-        'Content-Type': 'application/json',
-        'Prefer': 'resolution=merge-duplicates'
-    }
-    
-    saved = 0
+    payloads = []
     errors = []
-    
     for item in legislation:
-        try:
-            response = requests.get(
-                f"{SUPABASE_URL}/rest/v1/legislation?celex_number=eq.{item['celex_number']}&select=id",
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                results = response.json()
-                if results:
-                    leg_id = results[0]['id']
-                    score, priority = calculate_score(item)
-                    
-                    analysis_data = {
-                        'legislation_id': leg_id,
-                        'score_category_match': 10 if item.get('is_direct_annex2_match') else (5 if item.get('is_keyword_match') else 0),
-                        'score_consumer_relevance': 3 if item.get('consumer_relevance') == 'high' else (1 if item.get('consumer_relevance') == 'medium' else 0),
-                        'score_consultation': 0,
-                        'score_dsc': 0,
-                        'score_legislation_type': 2 if item.get('legislation_type') == 'Regulation' else 1,
-                        'total_score': score,
-                        'priority_level': priority,
-                        'calculated_at': datetime.now().isoformat()
-                    }
-                    
-                    response = requests.post(
-                        f"{SUPABASE_URL}/rest/v1/analysis_results",
-                        headers=headers,
-                        json=analysis_data,
-                        timeout=30
-                    )
-                    
-                    if response.status_code in [200, 201, 409]:
-                        saved += 1
-                        
-        except Exception as e:
-            errors.append(f"{item['celex_number']}: {str(e)}")
-    
-    return {'saved': saved, 'errors': errors}
+        leg_id = mirror.legislation_id(item.celex_number)
+        if leg_id is None:
+            errors.append(f"{item.celex_number}: not in legislation table")
+            continue
+        payloads.append(analysis_for(item, leg_id).to_payload())
+    
+    # One analysis row per legislation id, so replays update in place
+    saved, write_errors = mirror.upsert('analysis_results', payloads, stage='save_analysis', change_op=change_op)
+    return {'saved': saved, 'errors': errors + write_errors}
 
 
-def save_consultations(consultations):
-    """Save consultations to Supabase"""
+def save_consultations(consultations, mirror, index):
+    """
+    Save consultations to Supabase, with their links to legislation
+    Unchanged rows are skipped unless they were due a check, so that
+    last_checked still moves on. Each consultation is linked to its best
+    matching acts from the legislation index; the best one also goes on
+    the consultation row, and all of them into consultation_links.
+    """
     if not SUPABASE_KEY:
         return {'saved': 0, 'updated': 0, 'errors': ['No API key']}
     
-    headers = {
-        'apikey': SUPABASE_KEY,
-        'Authorization': f'Bearer {SUPABASE_KEY}',
-        'Content-Type': 'application/json',
-        'Prefer': 'resolution=merge-duplicates'
-    }
-    
+    now = datetime.now().isoformat()
+    legislation_index = index.get()
+    payloads = []
+    links = []
+    force = set()
     saved = 0
     updated = 0
-    errors = []
-    
     for consultation in consultations:
-        try:
-            # Check if exists
-            check_response = requests.get(
-                f"{SUPABASE_URL}/rest/v1/consultations?initiative_id=eq.{consultation['initiative_id']}&select=id",
-                headers=headers,
-                timeout=30
-            )
-            
-            existing = check_response.json() if check_response.status_code == 200 else []
-            
-            data = {
-                'title': consultation['title'],
-                'initiative_id': consultation['initiative_id'],
-                'consultation_url': consultation['consultation_url'],
-                'date_opened': consultation.get('date_opens'),
-                'date_closes': consultation.get('date_closes'),
-                'days_remaining': consultation.get('days_remaining'),
-                'status': consultation.get('status', 'open'),
-                'date_scraped': datetime.now().isoformat()
-            }
-            
-            # Try to link to legislation
-            category_num = match_consultation_to_category(consultation['title'])
-            if category_num:
-                leg_response = requests.get(
-                    f"{SUPABASE_URL}/rest/v1/legislation?category_number=eq.{category_num}&select=id&limit=1",
-                    headers=headers,
-                    timeout=30
-                )
-                if leg_response.status_code == 200:
-                    leg_items = leg_response.json()
-                    if leg_items:
-                        data['legislation_id'] = leg_items[0]['id']
-            
-            if existing:
-                response = requests.patch(
-                    f"{SUPABASE_URL}/rest/v1/consultations?initiative_id=eq.{consultation['initiative_id']}",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
-                if response.status_code in [200, 204]:
-                    updated += 1
-            else:
-                response = requests.post(
-                    f"{SUPABASE_URL}/rest/v1/consultations",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
-                if response.status_code in [200, 201]:
-                    saved += 1
-                    
-        except Exception as e:
-            errors.append(f"{consultation.get('initiative_id', 'unknown')}: {str(e)}")
+        data = consultation.to_payload(date_scraped=now, last_checked=now)
+        
+        matches = legislation_index.links(consultation.title, consultation.category_number)
+        data['legislation_id'], data['link_score'] = matches[0][:2] if matches else (None, None)
+        links.extend(
+            {'initiative_id': consultation.initiative_id, 'legislation_id': leg_id,
+             'score': score, 'rank': rank, 'method': method}
+            for rank, (leg_id, score, method) in enumerate(matches, 1)
+        )
+        
+        stored = mirror.get('consultations', consultation.initiative_id)
+        if stored:
+            updated += 1
+            if refresh_reason(stored):
+                force.add(consultation.initiative_id)
+        else:
+            saved += 1
+        payloads.append(data)
+    
+    written, errors = mirror.upsert('consultations', payloads, stage='save_consultations', force=force)
+    if errors:
+        return {'saved': 0, 'updated': 0, 'written': written, 'linked': 0, 'errors': errors}
+    
+    linked, errors = mirror.replace_rows(
+        'consultation_links', 'initiative_id',
+        [c.initiative_id for c in consultations], links, stage='save_consultations'
+    )
+    return {'saved': saved, 'updated': updated, 'written': written, 'linked': linked, 'errors': errors}
+
+
+def write_legislation(legislation, mirror, change_op=None):
+    """Supabase writer for legislation: the acts, then their analysis rows"""
+    results = save_to_supabase(legislation, mirror, change_op)
+    if results['errors']:
+        return {'inserted': 0, 'analysed': 0, 'errors': results['errors']}
+    analysis = save_analysis_results(legislation, mirror, change_op)
+    return {'inserted': results['inserted'], 'analysed': analysis['saved'], 'errors': analysis['errors']}
+
+
+def save_feedback(counts, mirror, items=False):
+    """
+    Save feedback counts onto their consultation rows
+    With items, the new feedback itself is stored first, and the counts
+    (which move feedback_last_id on) only once it is in.
+    """
+    if not SUPABASE_KEY:
+        return {'counted': 0, 'errors': ['No API key']}
+    
+    stored = 0
+    if items:
+        rows = [f.to_payload() for c in counts for f in c.items]
+        stored, errors = mirror.insert_new('consultation_feedback', rows, 'id', stage='save_feedback')
+        if errors:
+            return {'counted': 0, 'feedback_stored': 0, 'errors': errors}
+    
+    # Upserted with the row's own columns, which the insert half needs
+    payloads = []
+    for c in counts:
+        row = mirror.get('consultations', c.initiative_id)
+        if row is not None:
+            payloads.append(dict({name: row.get(name) for name in Consultation.COLUMNS}, **c.to_payload()))
+    counted, errors = mirror.upsert('consultations', payloads, stage='save_feedback')
+    return {'counted': counted, 'feedback_stored': stored, 'errors': errors}
+
+
+def supabase_writers(mirror, change_op=None, feedback_items=False):
+    """
+    Per-kind writers backing the supabase output
+    change_op tags the change_log entries of the writes ('rescore');
+    feedback_items also stores the feedback, not only its counts.
+    """
+    from linking import LazyIndex
     
-    return {'saved': saved, 'updated': updated, 'errors': errors}
+    return {
+        'legislation': partial(write_legislation, mirror=mirror, change_op=change_op),
+        'consultations': partial(save_consultations, mirror=mirror, index=LazyIndex(mirror)),
+        'feedback': partial(save_feedback, mirror=mirror, items=feedback_items),
+    }
 
 
 # ============================================
-# MAIN FUNCTION
+# PIPELINE STAGES
+# Each stage takes an iterator of pages (lists of records) and yields pages
 # ============================================
 
-def main():
-    """Main scraper function"""
-    print("=" * 50)
-    print("NI/EU Law Tracker - Scraper")
-    print(f"Started at: {datetime.now().isoformat()}")
-    print(f"SUPABASE_URL: {'SET' if SUPABASE_URL else 'NOT SET'}")
-    print(f"SUPABASE_KEY: {'SET' if SUPABASE_KEY else 'NOT SET'}")
-    print("=" * 50)
+def iter_legislation_pages(state, pushdown='type', sources=None):
+    """
+    Source stage: CELLAR pages, topped up from RSS if SPARQL is thin
+    sources narrows this to 'cellar' and/or 'rss'; naming sources turns
+    the automatic top-up off. Work the last run deferred goes first.
+    """
+    rss_carried = bool(budget.BUDGET.take('rss'))
+    if rss_carried and (sources is None or 'rss' in sources) and not state.page_done('legislation:rss'):
+        yield fetch_eurlex_rss()
+    
+    found = 0
+    failed = None
+    if sources is None or 'cellar' in sources:
+        # Cursors only carry over between runs that page in the same order
+        order = cellar_order(state)
+        carried = [(e['cursor'], e['items']) for e in budget.BUDGET.take('cellar')
+                   if e['prefix'] == 'legislation:cellar' and e.get('order') == order]
+        try:
+            for page in fetch_eurlex_cellar_api(skip_page=state.page_done, page_next=state.page_next,
+                                            pushdown=pushdown, carried=carried, order=order):
+                found += len(page)
+                yield page
+        except CellarError as e:
+            # RSS still tops up what was found; the part fails after it
+            failed = e
+    
+    wants_rss = 'rss' in sources if sources is not None else found < 20
+    if wants_rss and not rss_carried and not state.page_done('legislation:rss'):
+        if budget.BUDGET.allows('rss', 'legislation:rss'):
+            yield fetch_eurlex_rss()
+    if failed:
+        raise failed
+
+
+def iter_oj_pages(state, start, end, record_dir=None):
+    """
+    Source stage: one page per Official Journal day from start to end
+    Days the last run deferred go first. Days that fail to download are
+    skipped and reported once the rest are through.
+    """
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    carried = set(budget.BUDGET.take('oj'))
+    days.sort(key=lambda day: day.isoformat() not in carried)
+    print(f"Fetching the Official Journal L series, {start.isoformat()} to {end.isoformat()}...")
+    
+    failed = []
+    for day in days:
+        if state.page_done(f"legislation:oj:{day.isoformat()}"):
+            continue
+        if not budget.BUDGET.allows('oj', day.isoformat()):
+            continue
+        try:
+            yield fetch_oj_day(day, record_dir)
+        except (requests.RequestException, RuntimeError) as e:
+            print(f"  OJ L {day.isoformat()}: {e}")
+            # Cut off by the time budget: deferred (by allows), not failed
+            if budget.BUDGET.allows('oj', day.isoformat()):
+                failed.append(day.isoformat())
+    if failed:
+        raise RuntimeError(f"Official Journal days not fetched: {', '.join(failed)}")
+
+
+def iter_stored_legislation(state, mirror, page_size=RESCORE_PAGE_SIZE):
+    """
+    Source stage for rescoring: legislation rows streamed from the mirror
+    Starts from the first page the last run deferred, then wraps round.
+    """
+    print(f"Rescoring {mirror.count('legislation')} stored legislation items...")
+    carried = [int(key.split(':')[1]) for key in budget.BUDGET.take('rescore')]
+    start = min(carried) if carried else None
+    passes = [(start, None), (None, start)] if start else [(None, None)]
+    for first, stop in passes:
+        for rows in mirror.iter_rows('legislation', page_size, start=first, stop=stop):
+            key = f"rescore:{rows[0]['id']}"
+            if state.page_done(key):
+                continue
+            if not budget.BUDGET.allows('rescore', key):
+                print("  Time budget short, deferring the remaining rescore pages")
+                return
+            yield Page(key, (Legislation.from_row(row) for row in rows))
+
+
+def dedupe_stage(key):
+    """Normalize stage: drop records whose key was already seen this run"""
+    def stage(pages):
+        seen = set()
+        for page in pages:
+            unique = []
+            for item in page:
+                value = getattr(item, key)
+                if value not in seen:
+                    seen.add(value)
+                    unique.append(item)
+            page[:] = unique
+            yield page
+    return stage
+
+
+def fuse_legislation_stage(pages):
+    """
+    Normalize stage: one record per CELEX across pages and sources
+    The first record for a CELEX passes through; later ones are fused into
+    it field by field, and it is passed on again only if that changed it.
+    """
+    seen = {}
+    for page in pages:
+        fused = []
+        queued = set()
+        for item in page:
+            first = seen.get(item.celex_number)
+            if first is None:
+                seen[item.celex_number] = first = item
+            elif not fuse_fields(first, {name: getattr(item, name) for name in FUSED_FIELDS}, item.provenance):
+                continue
+            if item.celex_number not in queued:
+                queued.add(item.celex_number)
+                fused.append(first)
+        page[:] = fused
+        yield page
+
+
+def enrich_legislation_stage(pages):
+    """
+    Enrich stage: fill in dates and titles for records that only came from
+    RSS, with one batched CELEX lookup per page
+    """
+    for page in pages:
+        missing = [item for item in page if item.date_published is None or item.provenance.get('title') == 'rss']
+        page.enriched = 0
+        if missing and budget.BUDGET.allows('enrich', *(item.celex_number for item in missing)):
+            details = lookup_celex(item.celex_number for item in missing)
+            for item in missing:
+                found = details.get(item.celex_number)
+                if not found:
+                    continue
+                values = {
+                    'title': clean_title(found['title']) if found['title'] else None,
+                    'date_published': found['date'],
+                }
+                if fuse_fields(item, values, dict.fromkeys(FUSED_FIELDS, 'cellar-lookup')):
+                    page.enriched += 1
+        yield page
+
+
+def save_legislation_page(page, state, sink):
+    """
+    Sink: write one page of scored legislation to every output
+    Each output's write is checkpointed on its own, and the page is marked
+    complete once all of them have committed.
+    """
+    for item in page[:3]:
+        print(f"  - {item.celex_number}: {item.title[:60]}...")
+    
+    totals = {
+        'found': len(page),
+        'matched': sum(1 for item in page if item.category_number),
+        'enriched': getattr(page, 'enriched', 0),
+        'payload_bytes': getattr(page, 'payload_bytes', 0),
+        'parse_seconds': getattr(page, 'parse_seconds', 0.0),
+    }
+    totals.update(sink.write('legislation', page))
+    if sink.batch_done(page):
+        state.complete_page(page.key, getattr(page, 'next_page', None))
+    return totals
+
+
+def iter_consultation_pages(state, known, mirror, sources=None):
+    """
+    Source stage: discovery by topic, then re-polls of due stored consultations
+    sources narrows this to 'portal' and/or 'refresh'
+    """
+    known.update(load_known_consultations(mirror))
     
-    # ==========================================
-    # PART 1: LEGISLATION
-    # ==========================================
-    print("\n" + "=" * 50)
-    print("PART 1: EUR-Lex Legislation")
-    print("=" * 50)
+    seen = set()
+    if sources is None or 'portal' in sources:
+        for page in fetch_eu_consultations(skip_page=state.page_done):
+            seen.update(c.initiative_id for c in page)
+            yield page
     
-    legislation = []
-    legislation.extend(fetch_eurlex_cellar_api())
+    if sources is None or 'refresh' in sources:
+        yield from refresh_known_consultations(known, seen, skip_page=state.page_done)
+
+
+def diff_consultation_stage(known):
+    """Diff stage: keep consultations that are new, changed, or due a check"""
+    def stage(pages):
+        for page in pages:
+            page[:] = [
+                c for c in page
+                if c.initiative_id not in known
+                or consultation_changed(c, known[c.initiative_id])
+                or refresh_reason(known[c.initiative_id])
+            ]
+            yield page
+    return stage
+
+
+def match_consultation_stage(pages):
+    """Match stage: attach Annex 2 category to consultations"""
+    for page in pages:
+        for c in page:
+            cat = match_consultation_to_category(c.title)
+            if cat:
+                c.category_number = cat
+        yield page
+
+
+def save_consultation_page(page, state, sink):
+    """Sink: write one page of consultations to every output"""
+    for c in page[:3]:
+        print(f"  - {c.title[:50]}... ({c.status}, closes in {c.days_remaining} days)")
+    
+    totals = {
+        'found': len(page),
+        'matched': sum(1 for c in page if c.category_number),
+    }
+    results = sink.write('consultations', page)
+    results.pop('written', None)
+    totals.update(results)
+    if sink.batch_done(page):
+        state.complete_page(page.key)
+    return totals
+
+
+def iter_feedback_pages(state, mirror):
+    """
+    Source stage: one page per consultation whose feedback count changed
+    Stored consultations that are open (or just closed) are counted as
+    engine tasks, as many at once as the API host allows, most valuable
+    first and those the last run deferred ahead of everything. Those the
+    time budget has no room for are deferred.
+    """
+    rows = {str(row['initiative_id']): row for row in mirror.rows('consultations') if feedback_due(row)}
+    carried = set(budget.BUDGET.take('feedback'))
+    order = sorted(rows, key=lambda i: (i not in carried, [-v for v in consultation_value(rows[i])]))
+    print(f"Counting feedback on {len(order)} consultations...")
+    
+    def wanted():
+        for initiative_id in order:
+            if state.page_done(f"feedback:{initiative_id}"):
+                continue
+            if budget.BUDGET.allows('feedback', initiative_id):
+                yield initiative_id
     
-    if len(legislation) < 20:
-        legislation.extend(fetch_eurlex_rss())
+    async def count(initiative_id):
+        row = rows[initiative_id]
+        return initiative_id, await fetch_feedback_async(
+            initiative_id, row.get('feedback_count'), row.get('feedback_last_id')
+        )
     
-    # Remove duplicates
-    seen = set()
-    unique_legislation = []
-    for item in legislation:
-        if item['celex_number'] not in seen:
-            seen.add(item['celex_number'])
-            unique_legislation.append(item)
+    failed = 0
+    window = engine.ENGINE.concurrency(FEEDBACK_API)
+    for initiative_id, (ok, counted) in engine.ENGINE.imap(count, wanted(), window):
+        if not ok:
+            failed += 1
+        elif counted:
+            yield Page(f"feedback:{initiative_id}", [counted])
+    if failed:
+        print(f"  Feedback not counted for {failed} consultations; the next run tries them again")
+
+
+def save_feedback_page(page, state, sink):
+    """Sink: write one page of feedback counts to every output"""
+    for c in page:
+        print(f"  - {c.initiative_id}: {c.feedback_count} feedback ({len(c.items)} new)")
+    
+    totals = {
+        'initiatives': len(page),
+        'new_feedback': sum(len(c.items) for c in page),
+    }
+    totals.update(sink.write('feedback', page))
+    if sink.batch_done(page):
+        state.complete_page(page.key)
+    return totals
+
+
+def legislation_pipeline(state, sink, source=None, name='legislation', pushdown='type'):
+    """fetch -> fuse -> enrich -> match -> score -> sink for EUR-Lex legislation"""
+    return Pipeline(
+        source if source is not None else iter_legislation_pages(state, pushdown),
+        [
+            ('normalize', fuse_legislation_stage),
+            ('enrich', enrich_legislation_stage),
+            ('match', match_legislation_stage),
+            ('score', score_legislation_stage),
+        ],
+        ('sink', partial(save_legislation_page, state=state, sink=sink)),
+        name=name
+    )
+
+
+def consultation_pipeline(state, mirror, sink, sources=None):
+    """fetch -> normalize -> diff -> match -> sink for EU consultations"""
+    # Filled by the source before its first page, read by the later stages
+    known = {}
+    return Pipeline(
+        iter_consultation_pages(state, known, mirror, sources),
+        [
+            ('normalize', dedupe_stage('initiative_id')),
+            ('diff', diff_consultation_stage(known)),
+            ('match', match_consultation_stage),
+        ],
+        ('sink', partial(save_consultation_page, state=state, sink=sink)),
+        name='consultations'
+    )
+
+
+def feedback_pipeline(state, mirror, sink):
+    """count -> sink for feedback on stored consultations"""
+    return Pipeline(
+        iter_feedback_pages(state, mirror),
+        [],
+        ('sink', partial(save_feedback_page, state=state, sink=sink)),
+        name='feedback'
+    )
+
+
+def rescore_pipeline(state, mirror, sink):
+    """stored rows -> match -> score -> sink; unchanged rows are not rewritten"""
+    return Pipeline(
+        iter_stored_legislation(state, mirror),
+        [
+            ('match', match_legislation_stage),
+            ('score', score_legislation_stage),
+        ],
+        ('sink', partial(save_legislation_page, state=state, sink=sink)),
+        name='rescore'
+    )
+
+
+# ============================================
+# HISTORICAL BACKFILL
+# ============================================
+
+def month_partitions(from_year, to_year):
+    """'YYYY-MM' partitions covering whole years, stopping at the current month"""
+    today = datetime.now()
+    partitions = []
+    for year in range(from_year, to_year + 1):
+        for month in range(1, 13):
+            if (year, month) > (today.year, today.month):
+                return partitions
+            partitions.append(f"{year}-{month:02d}")
+    return partitions
+
+
+def partition_range(partition):
+    """'2024-12' -> ('2024-12-01', '2025-01-01')"""
+    year, month = (int(part) for part in partition.split('-'))
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year}-{month:02d}-01", f"{next_year}-{next_month:02d}-01"
+
+
+def run_partition(partition, state, partitions, sink, pushdown='type'):
+    """Run the legislation pipeline for one month; record it if fully committed"""
+    if not budget.BUDGET.allows('partitions', partition):
+        return {'deferred': True}
+    source = fetch_eurlex_cellar_api(
+        page_size=100,
+        max_items=None,
+        skip_page=state.page_done,
+        page_next=state.page_next,
+        date_range=partition_range(partition),
+        key_prefix=f"backfill:{partition}",
+        pushdown=pushdown,
+        order=cellar_order(state)
+    )
+    # A failed page raises here, so the month is never recorded as complete
+    metrics = legislation_pipeline(state, sink, source=source, name=f"backfill-{partition}").run()
+    totals = metrics['sink']
+    
+    # A month cut short by the time budget is left for the next run
+    prefix = f"backfill:{partition}"
+    if any(e['prefix'] == prefix for e in budget.BUDGET.deferred.get('cellar', [])):
+        budget.BUDGET.defer('partitions', partition)
+        return dict(totals, deferred=True)
+    
+    # The current month is still filling up, so it is never marked complete
+    month_is_closed = partition_range(partition)[1] <= datetime.now().strftime('%Y-%m-%d')
+    if month_is_closed and not totals.get('errors'):
+        partitions.complete(partition, state.run_id, totals.get('found', 0))
+    return totals
+
+
+def run_backfill(from_year, to_year, workers, state, sink, pushdown='type'):
+    """
+    Fetch, match, score and save every act from from_year to to_year
+    Months run as parallel partitions under the shared rate limits; months
+    already recorded as complete are skipped.
+    """
+    partitions = PartitionLog()
+    todo = [p for p in month_partitions(from_year, to_year) if not partitions.is_done(p)]
+    # Months the last run ran out of time for go first
+    carried = budget.BUDGET.take('partitions')
+    todo.sort(key=lambda p: p not in carried)
+    print(f"Backfill {from_year}-{to_year}: {len(todo)} partitions to fetch with {workers} workers")
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill') as executor:
+        futures = {executor.submit(run_partition, p, state, partitions, sink, pushdown): p for p in todo}
+        for future in as_completed(futures):
+            partition = futures[future]
+            try:
+                totals = future.result()
+                results[partition] = totals
+                if totals.get('deferred'):
+                    print(f"  {partition}: deferred to the next run")
+                    continue
+                errors = len(totals.get('errors', []))
+                print(f"  {partition}: {totals.get('found', 0)} found, {totals.get('inserted', 0)} saved, {errors} errors")
+            except Exception as e:
+                results[partition] = {'error': str(e)}
+                print(f"  {partition}: failed - {e}")
     
-    legislation = unique_legislation
-    print(f"\nTotal unique legislation items: {len(legislation)}")
+    failed = sorted(p for p, totals in results.items() if totals.get('error') or totals.get('errors'))
+    return {'partitions': results, 'failed': failed}
+
+
+# ============================================
+# MAIN FUNCTION
+# ============================================
+
+def report_exports(totals):
+    """Rows written to the file outputs, if any"""
+    for output in FILE_OUTPUTS:
+        if f"{output}_rows" in totals:
+            print(f"Exported to {output}: {totals[f'{output}_rows']} rows")
+
+
+def report_legislation(totals, title="PART 1: EUR-Lex Legislation"):
+    """Print the PART 1 summary"""
+    print("\n" + "=" * 50)
+    print(title)
+    print("=" * 50)
     
-    if legislation:
-        print("\nSample legislation found:")
-        for item in legislation[:5]:
-            print(f"  - {item['celex_number']}: {item['title'][:60]}...")
-        
-        # Match to categories
-        print("\nMatching to Annex 2 categories...")
-        matched_count = 0
-        for item in legislation:
-            category_num, is_direct, keywords = match_to_category(item['title'])
-            item['category_number'] = category_num
-            item['is_direct_annex2_match'] = is_direct
-            item['is_keyword_match'] = bool(keywords) and not is_direct
-            item['matched_keywords'] = keywords
-            
-            if category_num:
-                matched_count += 1
-                category = next((c for c in ANNEX2_CATEGORIES if c['number'] == category_num), None)
-                if category:
-                    item['consumer_relevance'] = category['relevance']
-        
-        print(f"Matched {matched_count} items to Annex 2 categories")
-        
-        # Save
-        print("\nSaving legislation to Supabase...")
-        save_results = save_to_supabase(legislation)
-        print(f"Saved: {save_results['inserted']} legislation items")
-        
-        print("\nCalculating priority scores...")
-        analysis_results = save_analysis_results(legislation)
-        print(f"Analysis results saved: {analysis_results['saved']}")
+    if totals.get('found'):
+        print(f"Total unique legislation items: {totals['found']}")
+        print(f"Matched {totals['matched']} items to Annex 2 categories")
+        if totals.get('enriched'):
+            print(f"Filled in from CELLAR lookups: {totals['enriched']} items")
+        if 'inserted' in totals:
+            print(f"Saved: {totals['inserted']} new or changed legislation items")
+            print(f"Analysis results saved: {totals['analysed']}")
+        report_exports(totals)
+        if totals.get('payload_bytes'):
+            print(f"CELLAR payload: {totals['payload_bytes'] / 1024:.0f} KB, "
+                  f"read and parsed in {totals['parse_seconds'] * 1000:.0f} ms")
     else:
         print("No legislation found from any source.")
-    
-    # ==========================================
-    # PART 2: CONSULTATIONS
-    # ==========================================
+
+
+def report_consultations(metrics):
+    """Print the PART 2 summary"""
     print("\n" + "=" * 50)
     print("PART 2: EU Consultations")
     print("=" * 50)
     
-    consultations = fetch_eu_consultations()
-    
-    if consultations:
-        print("\nMatching consultations to Annex 2 categories...")
-        matched = 0
-        for c in consultations:
-            cat = match_consultation_to_category(c['title'])
-            if cat:
-                c['category_number'] = cat
-                matched += 1
-        print(f"Matched {matched} consultations to categories")
-        
-        print("\nSaving consultations to Supabase...")
-        results = save_consultations(consultations)
-        print(f"New consultations saved: {results['saved']}")
-        print(f"Consultations updated: {results['updated']}")
+    totals = metrics['sink']
+    diff = metrics['stages'].get('diff', {})
+    if diff.get('items_in'):
+        print(f"Total consultations found: {diff['items_in']}")
+        print(f"Unchanged (not written): {diff['items_in'] - diff['items_out']}")
+    
+    if totals.get('found'):
+        print(f"Consultations to write: {totals['found']}")
+        print(f"Matched {totals['matched']} consultations to categories")
+        if 'saved' in totals:
+            print(f"New consultations saved: {totals['saved']}")
+            print(f"Consultations updated: {totals['updated']}")
+            print(f"Links to legislation written: {totals['linked']}")
+        report_exports(totals)
+    elif diff.get('items_in'):
+        print("Nothing to write.")
     else:
         print("No consultations found.")
         print("Note: ec.europa.eu may be blocked from GitHub Actions.")
         print("Consider manual consultation entry via Supabase.")
+
+
+def report_feedback(totals):
+    """Print the consultation feedback summary"""
+    print("\n" + "=" * 50)
+    print("PART 3: Consultation Feedback")
+    print("=" * 50)
+    
+    if totals.get('initiatives'):
+        print(f"Consultations whose count changed: {totals['initiatives']}")
+        print(f"New feedback: {totals['new_feedback']}")
+        if 'counted' in totals:
+            print(f"Feedback counts saved: {totals['counted']}")
+        if totals.get('feedback_stored'):
+            print(f"Feedback stored: {totals['feedback_stored']}")
+        report_exports(totals)
+    else:
+        print("No new feedback.")
+
+
+def run_parts(parts):
+    """
+    Run independent pipelines concurrently
+    parts is a list of (name, pipeline, timeout_seconds). Each part is
+    isolated: a failure or timeout in one is recorded in its metrics and
+    does not affect the others. Returns {name: metrics} plus 'elapsed'.
+    """
+    started = time.monotonic()
+    metrics = {}
+    executor = ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix='part')
+    futures = [(name, pipeline, timeout, executor.submit(pipeline.run)) for name, pipeline, timeout in parts]
+    
+    for name, pipeline, timeout, future in futures:
+        remaining = max(timeout - (time.monotonic() - started), 0)
+        # No part outlives the run's time budget
+        budget_left = budget.BUDGET.remaining()
+        cut_by_budget = budget_left is not None and budget_left < remaining
+        try:
+            metrics[name] = future.result(timeout=max(budget_left, 0) if cut_by_budget else remaining)
+        except FutureTimeoutError:
+            pipeline.stop()
+            if cut_by_budget:
+                print(f"\n{name}: stopped at the time budget")
+                budget.BUDGET.defer('parts', name)
+                metrics[name] = dict(pipeline.metrics, deferred=True)
+            else:
+                print(f"\n{name}: timed out after {timeout}s, stopping")
+                metrics[name] = dict(pipeline.metrics, error=f"timed out after {timeout}s")
+        except Exception as e:
+            print(f"\n{name}: failed - {e}")
+            metrics[name] = dict(pipeline.metrics, error=str(e))
+    
+    # Don't block on a timed-out part; its threads exit at their next request timeout
+    executor.shutdown(wait=False)
+    metrics['elapsed'] = time.monotonic() - started
+    return metrics
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="NI/EU Law Tracker scraper",
+        epilog="With no command, legislation and consultations both run."
+    )
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                        help="resume the newest unfinished run (or RUN_ID), skipping committed work")
+    parser.add_argument('--pushdown', choices=PUSHDOWN_LEVELS, default='type',
+                        help="filtering done by the CELLAR endpoint (default: type)")
+    parser.add_argument('--output', action='append', metavar='SPEC',
+                        help="where to write: supabase (default), jsonl[:DIR], parquet[:DIR] or corpus[:DIR]; repeat for several")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="fetch, match and score but write nothing to Supabase and keep no checkpoints")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_DIR, metavar='DIR',
+                        help=f"sample every stage and write per-stage profiles to DIR (default: {PROFILE_DIR})")
+    parser.add_argument('--time-budget', type=budget.parse_duration, metavar='DURATION',
+                        help="wall clock for the whole run, e.g. 45m or 1h30m; work that does not fit is "
+                             "done most valuable first and the rest deferred to the next run")
+    commands = parser.add_subparsers(dest='command')
+    
+    legislation = commands.add_parser('legislation', help="fetch, match, score and save EUR-Lex legislation")
+    legislation.add_argument('--source', dest='sources', action='append', choices=LEGISLATION_SOURCES,
+                             help="only these sources (default: cellar, topped up from rss when thin)")
+    
+    consultations = commands.add_parser('consultations', help="discover and refresh Have Your Say consultations")
+    consultations.add_argument('--source', dest='sources', action='append', choices=CONSULTATION_SOURCES,
+                               help="only these sources (default: all)")
+    consultations.add_argument('--feedback-items', action='store_true',
+                               help="also store the new feedback itself, not only the counts")
+    
+    official_journal = commands.add_parser('oj', help="ingest the Official Journal L series day by day")
+    official_journal.add_argument('--from', dest='from_date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                                  help=f"first publication day (default: {OJ_DAYS - 1} days before --to)")
+    official_journal.add_argument('--to', dest='to_date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                                  help="last publication day (default: today)")
+    official_journal.add_argument('--record', metavar='DIR',
+                                  help="also save each day's contents to DIR, to serve as fixtures via OJ_DAILY_URL")
+    official_journal.add_argument('--check', action='store_true',
+                                  help="only parse the recorded contents in fixtures/ and check the acts found (exit 1 if not)")
+    
+    commands.add_parser('baseline', help="import the Annex 2 baseline (import_baseline.py)")
+    rescore = commands.add_parser('rescore', help="re-match and re-score stored legislation without fetching")
+    rescore.add_argument('--in-database', action='store_true',
+                         help="rescore in one call to the rescore() SQL function instead (stored matches, no re-matching)")
+    rescore.add_argument('--celex', action='append', metavar='CELEX',
+                         help="with --in-database, only these acts (default: all)")
+    
+    score_sql = commands.add_parser('score-sql', help="regenerate the SQL scoring migration from the Python weights")
+    score_sql.add_argument('--check', action='store_true', help="only check it is up to date (exit 1 if not)")
+    score_parity = commands.add_parser('score-parity', help="compare the SQL scoring function with calculate_score")
+    score_parity.add_argument('--dsn', default=os.environ.get('SCORE_PARITY_DSN', ''),
+                              help="local Postgres to load it into, rolled back after (default: SCORE_PARITY_DSN or libpq env)")
+    
+    bench = commands.add_parser('bench-sparql', help="read one CELLAR page as JSON and as streamed CSV, and compare")
+    bench.add_argument('--rows', type=int, default=2000, help="rows in the page (default: 2000)")
+    bench.add_argument('--rounds', type=int, default=3, help="reads per format; the median is reported (default: 3)")
+    
+    corpus_command = commands.add_parser('corpus', help="summarize the local corpus, or re-match and score all of it")
+    corpus_command.add_argument('--dir', help="corpus directory (default: $CORPUS_DIR, else corpus in the state directory)")
+    corpus_command.add_argument('--year', dest='years', action='append', metavar='YEAR', help="only these years")
+    corpus_command.add_argument('--match', action='store_true',
+                                help="re-match and score the newest copy of every stored act, and time it")
+    
+    backfill = commands.add_parser('backfill', help="fetch a historical range in month partitions")
+    backfill.add_argument('--from', dest='from_year', type=int, required=True, metavar='YEAR')
+    backfill.add_argument('--to', dest='to_year', type=int, default=datetime.now().year, metavar='YEAR')
+    backfill.add_argument('--workers', type=int, default=4, help="partitions fetched in parallel")
+    args = parser.parse_args(argv)
+    args.argv = list(sys.argv[1:] if argv is None else argv)
+    if args.resume in commands.choices:
+        # --resume takes an optional value, so it swallows a command right after it
+        parser.error(f"--resume took the command '{args.resume}' as a run id; "
+                     "write --resume=latest or --resume=RUN_ID")
+    try:
+        args.outputs = parse_outputs(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.dry_run:
+        args.outputs = [output for output in args.outputs if output[0] != 'supabase']
+    return args
+
+
+def run_baseline(args):
+    """The baseline command: hand over to import_baseline, imported only here"""
+    import import_baseline
+    
+    argv = []
+    for spec in args.output or []:
+        argv += ['--output', spec]
+    if args.dry_run:
+        argv.append('--dry-run')
+    return import_baseline.main(argv)
+
+
+def run_score_sql(args):
+    """The score-sql and score-parity commands, imported only here"""
+    import score_sql
+    
+    ok = score_sql.write_migration(check=args.check) if args.command == 'score-sql' else score_sql.parity(args.dsn)
+    if not ok:
+        # A failed check should fail the CI step that ran it
+        raise SystemExit(1)
+
+
+def run_oj_check(args):
+    """The oj --check command: the contents parser against the recorded pages"""
+    import oj
+    
+    if not oj.check_fixtures():
+        # A failed check should fail the CI step that ran it
+        raise SystemExit(1)
+
+
+def rescore_in_database(args, mirror):
+    """The rescore --in-database command: one RPC call instead of the rescore pipeline; True if it worked"""
+    ids = None
+    if args.celex:
+        ids = [mirror.legislation_id(celex) for celex in args.celex]
+        unknown = [celex for celex, leg_id in zip(args.celex, ids) if leg_id is None]
+        if unknown:
+            print(f"Not in the legislation table: {', '.join(unknown)}")
+        ids = [leg_id for leg_id in ids if leg_id is not None]
+        if not ids:
+            return False
+    
+    changed, errors = mirror.rescore(ids)
+    print(f"Rescored {'all stored' if ids is None else len(ids)} legislation in the database: "
+          f"{changed} analysis rows changed")
+    for error in errors:
+        print(f"  ERROR: {error}")
+    return not errors
+
+
+def bench_sparql(args):
+    """
+    The bench-sparql command: the same CELLAR page read in each result
+    format, reporting wire size, request-to-records time and the peak
+    memory held while reading (traced allocations above the baseline)
+    """
+    import tracemalloc
+    
+    query = cellar_query(pushdown=args.pushdown).format(limit=args.rows, after='')
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    
+    results = {fmt: [] for fmt in sparql.FORMATS}
+    for _ in range(args.rounds):
+        for fmt in sparql.FORMATS:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            response = sparql.post(query, stage='bench', fmt=fmt)
+            if response.status_code != 200:
+                print(f"  {fmt}: SPARQL response status {response.status_code}")
+                response.close()
+                continue
+            records = [r for r in (cellar_record(row, args.pushdown) for row in sparql.rows(response, fmt)) if r]
+            results[fmt].append((
+                len(records),
+                sparql.wire_bytes(response),
+                time.perf_counter() - started,
+                tracemalloc.get_traced_memory()[1] - baseline,
+            ))
+            del records
+    if not tracing:
+        tracemalloc.stop()
+    
+    print(f"\nCELLAR page of {args.rows} rows (push-down: {args.pushdown}), median of {args.rounds} reads")
+    print(f"  {'format':<6} {'records':>7} {'wire KB':>8} {'seconds':>8} {'peak MB':>8}")
+    for fmt, runs in results.items():
+        if not runs:
+            continue
+        count, size, seconds, peak = (sorted(column)[len(runs) // 2] for column in zip(*runs))
+        print(f"  {fmt:<6} {count:>7} {size / 1024:>8.0f} {seconds:>8.2f} {peak / 1e6:>8.1f}")
+
+
+def run_corpus(args):
+    """
+    The corpus command: rows and size per kind and year, and with --match
+    the newest copy of every act re-matched and scored straight from the
+    memory-mapped files, with how its matches differ from the stored ones
+    """
+    if importlib.util.find_spec('pyarrow') is None:
+        print("The corpus command needs pyarrow (pip install pyarrow)")
+        raise SystemExit(1)
+    import corpus
+    
+    directory = args.dir or corpus.CORPUS_DIR
+    store = corpus.Corpus(directory)
+    
+    summary = store.summary()
+    if not summary:
+        print(f"Nothing in the corpus at {directory}; write to it with --output corpus")
+        return
+    print(f"Corpus at {directory}")
+    for kind, years in summary.items():
+        rows = sum(n for n, _ in years.values())
+        size = sum(b for _, b in years.values())
+        print(f"  {kind}: {rows} rows, {size / 1e6:.1f} MB, years {min(years)}-{max(years)}")
+    if not args.match:
+        return
+    
+    started = time.perf_counter()
+    acts = store.latest('legislation', args.years)
+    loaded = time.perf_counter() - started
+    counts = {}
+    changed = 0
+    for batch in acts.to_batches():
+        rows = batch.to_pylist()
+        page = [Legislation.from_row(dict(row, provenance=None)) for row in rows]
+        for _ in score_legislation_stage(match_legislation_stage([page])):
+            pass
+        for row, item in zip(rows, page):
+            counts[item.priority_level] = counts.get(item.priority_level, 0) + 1
+            changed += (row['category_number'], row['priority_level']) != (item.category_number, item.priority_level)
+    elapsed = time.perf_counter() - started
+    
+    print(f"\nMatched and scored {acts.num_rows} acts in {elapsed:.2f}s "
+          f"({acts.num_rows / max(elapsed, 1e-9):.0f}/s, {loaded:.2f}s of it reading the corpus)")
+    print("  " + ", ".join(f"{counts.get(level, 0)} {level}" for level, _ in PRIORITY_THRESHOLDS + (('low', 0),)))
+    print(f"  {changed} differ from their stored category or priority")
+
+
+def finish_backfill(args, state, sink):
+    """The backfill command, from fetch to final status"""
+    results = run_backfill(args.from_year, args.to_year, args.workers, state, sink, args.pushdown)
+    close_errors = sink.close()['errors']
+    scheduler.SCHEDULER.print_report()
+    deferred = finish_budget(args, state)
+    if results['failed'] or close_errors:
+        state.finish('incomplete')
+        print(f"\nBackfill incomplete, failed partitions: {', '.join(results['failed']) or 'none'}")
+        for error in close_errors:
+            print(f"Output failed to flush: {error}")
+    elif deferred:
+        state.finish('deferred')
+        print("\nBackfill stopped at its time budget; the next run picks up the deferred months first")
+    else:
+        state.finish()
+        print("\nBackfill completed successfully!")
+
+
+def finish_budget(args, state):
+    """Report and record work deferred by the time budget; True if there was any"""
+    deferred = budget.BUDGET.deferred
+    if not args.dry_run:
+        budget.save_deferred(budget.BUDGET, state.run_id)
+    if deferred:
+        print(f"Deferred by the time budget: {budget.BUDGET.summary()}")
+    return bool(deferred)
+
+
+def main(argv=None):
+    """Main scraper function"""
+    args = parse_args(argv)
+    if not args.profile:
+        return run_command(args)
+    
+    from profiling import Profiler
+    
+    profiler = Profiler(args.profile).start()
+    try:
+        return run_command(args)
+    finally:
+        profiler.stop()
+        profiler.print_report()
+
+
+def replay_spool(mirror):
+    """Retry the writes earlier runs spooled, before anything new is written"""
+    if mirror.spool is None or not mirror.spool.count():
+        return
+    with profiling.label('spool-replay'):
+        replayed = mirror.replay()
+    print(f"Spool replay: {replayed['replayed']} rows written, {replayed['failed']} failed again, "
+          f"{replayed['dead']} moved to {mirror.spool.dead_path}")
+
+
+def command_line(argv):
+    """The words of a command line other than --resume and its run id"""
+    words = []
+    skip = False
+    for word in argv:
+        if skip and not word.startswith('-'):
+            skip = False
+            continue
+        skip = word == '--resume'
+        if not word.startswith('--resume'):
+            words.append(word)
+    return words
+
+
+def run_command(args):
+    """Run the chosen command (or everything)"""
+    if args.command == 'baseline':
+        return run_baseline(args)
+    if args.command == 'bench-sparql':
+        return bench_sparql(args)
+    if args.command in ('score-sql', 'score-parity'):
+        return run_score_sql(args)
+    if args.command == 'corpus':
+        return run_corpus(args)
+    if args.command == 'oj' and args.check:
+        return run_oj_check(args)
+    
+    # A bare --resume carries on with the command line the run was started with
+    words = command_line(args.argv)
+    try:
+        command = (args.command or 'all') if words else None
+        state = NullState() if args.dry_run else RunState.open(resume=args.resume, command=command)
+    except ValueError as e:
+        print(f"Cannot resume: {e}")
+        raise SystemExit(1)
+    started_as = state.setting('argv', words)
+    if started_as != words and not words:
+        args = parse_args([f"--resume={state.run_id}"] + started_as)
+        words = started_as
+    state.setting('command', args.command or 'all')
+    run_budget = budget.start(args.time_budget, carried={} if args.dry_run else budget.load_deferred())
+    
+    print("=" * 50)
+    print("NI/EU Law Tracker - Scraper")
+    print(f"Command: {args.command or 'all'}{' (dry run)' if args.dry_run else ''}")
+    print(f"Run id: {state.run_id}")
+    print(f"Started at: {datetime.now().isoformat()}")
+    print(f"SUPABASE_URL: {'SET' if SUPABASE_URL else 'NOT SET'}")
+    print(f"SUPABASE_KEY: {'SET' if SUPABASE_KEY else 'NOT SET'}")
+    if run_budget.seconds:
+        print(f"Time budget: {run_budget.seconds}s")
+    if run_budget.carried:
+        print("Carried over from the last run: " + ', '.join(
+            f"{len(items)} {budget.DEFERRED_LABELS.get(kind, kind)}" for kind, items in sorted(run_budget.carried.items())
+        ))
+    print("=" * 50)
+    
+    mirror = Mirror(SUPABASE_URL, SUPABASE_KEY, spool=None if args.dry_run else Spool())
+    if SUPABASE_KEY:
+        with profiling.label('mirror-sync'):
+            pulled = mirror.sync()
+        print("Mirror sync: " + ", ".join(f"{n} {table}" for table, n in pulled.items()) + " rows pulled")
+        replay_spool(mirror)
+    if args.command == 'rescore' and args.in_database:
+        if args.dry_run or not SUPABASE_KEY:
+            print("Nothing to rescore in the database: " + ("dry run" if args.dry_run else "SUPABASE_SERVICE_KEY not set"))
+            return
+        state.finish('complete' if rescore_in_database(args, mirror) else 'incomplete')
+        return
+    change_op = 'rescore' if args.command == 'rescore' else None
+    writers = supabase_writers(mirror, change_op, feedback_items=getattr(args, 'feedback_items', False))
+    sink = build_sinks(args.outputs, writers, state=state, run_id=state.run_id or 'dry-run', dry_run=args.dry_run)
+    print(f"Outputs: {', '.join(s.name for s in sink.sinks) or 'none'}")
+    
+    if args.command == 'backfill':
+        return finish_backfill(args, state, sink)
+    
+    # Legislation and consultations hit different hosts and share no data,
+    # so when both run they run side by side
+    sources = getattr(args, 'sources', None)
+    parts = []
+    if args.command in (None, 'legislation'):
+        source = iter_legislation_pages(state, args.pushdown, sources)
+        parts.append(('legislation', legislation_pipeline(state, sink, source=source), LEGISLATION_TIMEOUT))
+    if args.command in (None, 'consultations'):
+        if sources is None or {'portal', 'refresh'} & set(sources):
+            parts.append(('consultations', consultation_pipeline(state, mirror, sink, sources), CONSULTATION_TIMEOUT))
+        if sources is None or 'feedback' in sources:
+            parts.append(('feedback', feedback_pipeline(state, mirror, sink), CONSULTATION_TIMEOUT))
+    if args.command == 'rescore':
+        parts.append(('rescore', rescore_pipeline(state, mirror, sink), LEGISLATION_TIMEOUT))
+    if args.command == 'oj':
+        last = args.to_date or date.today()
+        first = args.from_date or last - timedelta(days=OJ_DAYS - 1)
+        source = iter_oj_pages(state, first, last, args.record)
+        parts.append(('oj', legislation_pipeline(state, sink, source=source, name='oj'), LEGISLATION_TIMEOUT))
+    metrics = run_parts(parts)
+    names = [name for name, _, _ in parts]
+    
+    if 'legislation' in metrics:
+        report_legislation(metrics['legislation']['sink'])
+    if 'consultations' in metrics:
+        report_consultations(metrics['consultations'])
+    if 'feedback' in metrics:
+        report_feedback(metrics['feedback']['sink'])
+    if 'rescore' in metrics:
+        report_legislation(metrics['rescore']['sink'], title="Rescore: stored legislation")
+    if 'oj' in metrics:
+        report_legislation(metrics['oj']['sink'], title="Official Journal L series")
     
     # ==========================================
     # COMPLETE
     # ==========================================
+    failed = [name for name in names if metrics[name].get('error')]
+    
     print("\n" + "=" * 50)
-    print("Scraper completed successfully!")
+    for name in names:
+        part = metrics[name]
+        status = part.get('error') or ('stopped at the time budget' if part.get('deferred') else 'ok')
+        errors = len(part['sink'].get('errors', []))
+        print(f"{name}: {status} ({part['elapsed']:.1f}s, {errors} save errors)")
+    print(f"Wall clock: {metrics['elapsed']:.1f}s")
+    metrics['requests'] = scheduler.SCHEDULER.report()
+    scheduler.SCHEDULER.print_report()
+    close_errors = sink.close()['errors']
+    for error in close_errors:
+        print(f"Output failed to flush: {error}")
+    if mirror.spool and (mirror.spool.count() or mirror.spool.count(dead=True)):
+        print(f"Spooled writes: {mirror.spool.count()} waiting for the next run, "
+              f"{mirror.spool.count(dead=True)} dead-lettered in {mirror.spool.dead_path}")
+    save_errors = close_errors or any(metrics[name]['sink'].get('errors') for name in names)
+    deferred = finish_budget(args, state)
+    if failed:
+        state.finish('failed')
+        print(f"Scraper completed with failures: {', '.join(failed)}")
+        print(f"Re-run with: python scraper.py --resume={state.run_id} {shlex.join(words)}")
+    elif save_errors:
+        state.finish('incomplete')
+        print("Scraper completed with save errors")
+        print(f"Re-run with: python scraper.py --resume={state.run_id} {shlex.join(words)} (retries uncommitted batches)")
+    elif deferred:
+        state.finish('deferred')
+        print("Scraper stopped at its time budget; the next run picks up the deferred work first")
+    else:
+        state.finish()
+        print("Scraper completed successfully!")
     print(f"Finished at: {datetime.now().isoformat()}")
     print("=" * 50)
 
@@ -0,0 +1,314 @@
+"""
+NI/EU Law Tracker - Output Sinks
+Where scraped records end up. Every sink takes batches of records of one
+kind ('legislation' or 'consultations') and returns counters; a MultiSink
+fans each batch out to several sinks so one fetch feeds Supabase, any
+analytics extracts and the local corpus in the same pass.
+"""
+
+import os
+import json
+import threading
+import importlib.util
+from dataclasses import asdict
+from datetime import datetime
+from uuid import uuid4
+
+import corpus
+import engine
+from checkpoint import NullState
+
+DEFAULT_EXPORT_DIR = 'exports'
+
+# Hive-style partition columns for the Parquet extract
+PARQUET_PARTITIONS = {
+    'legislation': ['category_number', 'priority_level'],
+    'consultations': ['category_number'],
+}
+
+# Rows buffered per kind before a Parquet file is written
+PARQUET_BATCH_SIZE = 5000
+
+# Rows buffered per corpus partition before a record batch is written
+CORPUS_BATCH_SIZE = 5000
+
+# Outputs written to local files rather than Supabase
+FILE_OUTPUTS = ('jsonl', 'parquet', 'corpus')
+
+
+def record_row(record):
+    """A record as a plain dict of all its fields"""
+    return record if isinstance(record, dict) else asdict(record)
+
+
+class Sink:
+    """
+    Base class: write(kind, records) is called once per batch and returns
+    a dict of counters; close() flushes anything still buffered
+    """
+
+    name = 'sink'
+
+    def write(self, kind, records):
+        raise NotImplementedError
+
+    def close(self):
+        return {}
+
+
+class SupabaseSink(Sink):
+    """
+    Writes through per-kind writer functions, fn(records) -> counters
+    The writers live with their callers, which own the linking and scoring
+    that goes with each table.
+    """
+
+    name = 'supabase'
+
+    def __init__(self, writers):
+        self.writers = writers
+
+    def write(self, kind, records):
+        writer = self.writers.get(kind)
+        return writer(records) if writer else {}
+
+
+class JsonlSink(Sink):
+    """
+    Streams records to <directory>/<kind>-<run id>.jsonl, one JSON object
+    per line. The file is appended to, so a resumed run carries on with it.
+    """
+
+    name = 'jsonl'
+
+    def __init__(self, directory=DEFAULT_EXPORT_DIR, run_id='extract'):
+        self.directory = directory
+        self.run_id = run_id
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _file(self, kind):
+        if kind not in self._files:
+            os.makedirs(self.directory, exist_ok=True)
+            self._files[kind] = open(os.path.join(self.directory, f"{kind}-{self.run_id}.jsonl"), 'a')
+        return self._files[kind]
+
+    def write(self, kind, records):
+        lines = [json.dumps(record_row(r), default=str) + '\n' for r in records]
+        with self._lock:
+            f = self._file(kind)
+            f.writelines(lines)
+            f.flush()
+        return {'jsonl_rows': len(lines)}
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+        return {}
+
+
+class ParquetSink(Sink):
+    """
+    Columnar extract under <directory>/<kind>/, partitioned as in
+    PARQUET_PARTITIONS. Needs pyarrow, which is imported on first use.
+    Files are named by run id, so runs into the same directory add files
+    next to each other rather than overwrite. Rows are buffered until
+    close(), so a run killed part-way leaves a partial extract.
+    """
+
+    name = 'parquet'
+
+    def __init__(self, directory=DEFAULT_EXPORT_DIR, run_id='extract', batch_size=PARQUET_BATCH_SIZE):
+        self.directory = directory
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def _flush(self, kind):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = self._buffers.pop(kind, [])
+        if not rows:
+            return 0
+        pq.write_to_dataset(
+            pa.Table.from_pylist(rows),
+            root_path=os.path.join(self.directory, kind),
+            partition_cols=PARQUET_PARTITIONS.get(kind),
+            basename_template=f"{self.run_id}-{uuid4().hex[:8]}-{{i}}.parquet"
+        )
+        return len(rows)
+
+    def write(self, kind, records):
+        rows = [record_row(r) for r in records]
+        with self._lock:
+            buffer = self._buffers.setdefault(kind, [])
+            buffer.extend(rows)
+            if len(buffer) >= self.batch_size:
+                self._flush(kind)
+        return {'parquet_rows': len(rows)}
+
+    def close(self):
+        with self._lock:
+            for kind in list(self._buffers):
+                self._flush(kind)
+        return {}
+
+
+class CorpusSink(Sink):
+    """
+    Appends every record to the local corpus (see corpus.py): one Arrow IPC
+    file per kind and year for the run, written a record batch at a time
+    as rows build up. Each file records when the run started and whether
+    it was a dry run. Files are renamed into place on close(), so a run
+    killed part-way leaves only .partial files, which readers skip.
+    """
+
+    name = 'corpus'
+
+    def __init__(self, directory=corpus.CORPUS_DIR, run_id='extract', batch_size=CORPUS_BATCH_SIZE, dry_run=False):
+        self.directory = directory
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.started = datetime.now().isoformat()
+        self._buffers = {}
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def _flush(self, kind, year):
+        import pyarrow.ipc as ipc
+
+        records = self._buffers.pop((kind, year), [])
+        if not records:
+            return
+        if (kind, year) not in self._writers:
+            folder = corpus.partition_dir(self.directory, kind, year)
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{self.run_id}-{uuid4().hex[:8]}{corpus.PARTIAL_SUFFIX}")
+            schema = corpus.schema(kind, self.started, self.dry_run)
+            self._writers[(kind, year)] = (path, ipc.new_file(path, schema))
+        self._writers[(kind, year)][1].write_batch(corpus.record_batch(kind, records))
+
+    def write(self, kind, records):
+        if kind not in corpus.KINDS:
+            return {}
+        kept = corpus.records_of(kind, records)
+        with self._lock:
+            for record in kept:
+                year = corpus.year_of(kind, record)
+                buffer = self._buffers.setdefault((kind, year), [])
+                buffer.append(record)
+                if len(buffer) >= self.batch_size:
+                    self._flush(kind, year)
+        return {'corpus_rows': len(kept)}
+
+    def close(self):
+        with self._lock:
+            for kind, year in list(self._buffers):
+                self._flush(kind, year)
+            for path, writer in self._writers.values():
+                writer.close()
+                os.replace(path, path[:-len(corpus.PARTIAL_SUFFIX)] + '.arrow')
+            self._writers = {}
+        return {}
+
+
+class MultiSink(Sink):
+    """
+    Fans each batch out to several sinks
+    With a run state, each sink's write of a keyed batch (a Page) is
+    checkpointed on its own as '<key>:<sink name>', so a resumed run only
+    repeats the sinks that failed.
+    """
+
+    name = 'multi'
+
+    def __init__(self, sinks, state=None):
+        self.sinks = list(sinks)
+        self.state = state or NullState()
+
+    def batch_done(self, records):
+        key = getattr(records, 'key', None)
+        return key is not None and all(self.state.batch_done(f"{key}:{s.name}") for s in self.sinks)
+
+    def _write_one(self, sink, kind, records):
+        key = getattr(records, 'key', None)
+        try:
+            result = sink.write(kind, records) or {}
+        except Exception as e:
+            result = {'errors': [f"{sink.name}: {e}"]}
+        if key is not None and not result.get('errors'):
+            self.state.commit_batch(f"{key}:{sink.name}")
+        return result
+
+    def write(self, kind, records):
+        """Write to the sinks that still need this batch, side by side as engine tasks"""
+        key = getattr(records, 'key', None)
+        todo = [s for s in self.sinks if key is None or not self.state.batch_done(f"{key}:{s.name}")]
+        if len(todo) == 1:
+            results = [self._write_one(todo[0], kind, records)]
+        else:
+            results = engine.ENGINE.gather(
+                engine.ENGINE.call(self._write_one, sink, kind, records, label=f"sink-{sink.name}") for sink in todo
+            )
+        totals = {'errors': []}
+        for result in results:
+            for name, value in result.items():
+                if isinstance(value, list):
+                    totals.setdefault(name, []).extend(value)
+                else:
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def close(self):
+        errors = []
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                errors.append(f"{sink.name}: {e}")
+        return {'errors': errors}
+
+
+def parse_outputs(specs):
+    """
+    Parse --output values: 'supabase', 'jsonl[:DIR]', 'parquet[:DIR]' or
+    'corpus[:DIR]'. Returns a list of (kind, directory) with the directory
+    None for supabase.
+    Optional dependencies are checked here so a run fails before fetching.
+    """
+    outputs = []
+    for spec in specs or ['supabase']:
+        kind, _, directory = spec.partition(':')
+        if kind not in ('supabase',) + FILE_OUTPUTS:
+            raise ValueError(f"unknown output '{spec}'")
+        if kind in ('parquet', 'corpus') and importlib.util.find_spec('pyarrow') is None:
+            raise ValueError(f"the {kind} output needs pyarrow (pip install pyarrow)")
+        if kind == 'supabase':
+            directory = None
+        elif not directory:
+            directory = corpus.CORPUS_DIR if kind == 'corpus' else DEFAULT_EXPORT_DIR
+        outputs.append((kind, directory))
+    return outputs
+
+
+def build_sinks(outputs, supabase_writers, state=None, run_id='extract', dry_run=False):
+    """
+    MultiSink for parsed outputs; supabase_writers backs the supabase output
+    dry_run marks what the corpus output writes, so readers leave it out.
+    """
+    sinks = []
+    for kind, directory in outputs:
+        if kind == 'supabase':
+            sinks.append(SupabaseSink(supabase_writers))
+        elif kind == 'jsonl':
+            sinks.append(JsonlSink(directory, run_id=run_id))
+        elif kind == 'parquet':
+            sinks.append(ParquetSink(directory, run_id=run_id))
+        elif kind == 'corpus':
+            sinks.append(CorpusSink(directory, run_id=run_id, dry_run=dry_run))
+    return MultiSink(sinks, state=state)
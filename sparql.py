@@ -0,0 +1,87 @@
+"""
+NI/EU Law Tracker - CELLAR SPARQL Client
+Posts SELECT queries to the Publications Office endpoint and reads the
+results as they arrive. The default wire format is gzip-compressed CSV,
+parsed row by row straight off the response stream, so a page never sits
+in memory both as a decoded JSON document and as records. The JSON format
+is kept for comparison (see the bench-sparql command).
+"""
+
+import io
+import os
+import csv
+
+import engine
+
+ENDPOINT = "https://publications.europa.eu/webapi/rdf/sparql"
+
+FORMATS = {
+    'csv': 'text/csv',
+    'json': 'application/sparql-results+json',
+}
+RESULT_FORMAT = os.environ.get('SPARQL_RESULT_FORMAT', 'csv')
+
+USER_AGENT = 'Mozilla/5.0 (compatible; NI-EU-Law-Tracker/1.0)'
+
+
+async def post_async(query, stage, fmt=RESULT_FORMAT, timeout=60):
+    """Send a query as an engine task; CSV responses are left unread for rows() to stream"""
+    return await engine.ENGINE.request(
+        'POST',
+        ENDPOINT,
+        stage=stage,
+        data={'query': query},
+        headers={
+            'Accept': FORMATS[fmt],
+            'Accept-Encoding': 'gzip',
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'User-Agent': USER_AGENT
+        },
+        stream=fmt == 'csv',
+        timeout=timeout
+    )
+
+
+def post(query, stage, fmt=RESULT_FORMAT, timeout=60):
+    """Blocking post_async()"""
+    return engine.run(post_async(query, stage, fmt, timeout))
+
+
+def rows(response, fmt=RESULT_FORMAT):
+    """
+    Yield each result row as {variable: value}
+    Unbound variables are missing (JSON) or empty (CSV), so read them
+    with row.get(name) or None. The response is closed once read.
+    """
+    try:
+        if fmt == 'json':
+            for binding in response.json().get('results', {}).get('bindings', []):
+                yield {name: term.get('value', '') for name, term in binding.items()}
+            return
+
+        # gzip is undone by urllib3 as the text wrapper reads; newline=''
+        # leaves line endings inside quoted titles to the csv module, and
+        # auto_close off keeps the raw stream readable to its end for io
+        response.raw.decode_content = True
+        response.raw.auto_close = False
+        reader = csv.reader(io.TextIOWrapper(response.raw, encoding='utf-8', newline=''))
+        header = next(reader, None)
+        if header is None:
+            return
+        for values in reader:
+            yield dict(zip(header, values))
+    finally:
+        response.wire_bytes = _bytes_read(response)
+        response.close()
+
+
+def _bytes_read(response):
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return len(response.content or b'')
+
+
+def wire_bytes(response):
+    """Bytes read off the socket for a response read by rows(), before decompression"""
+    return getattr(response, 'wire_bytes', None) or _bytes_read(response)
@@ -0,0 +1,109 @@
+"""
+NI/EU Law Tracker - Failed-Write Spool
+Writes that Supabase rejected or never answered are appended to a local
+spool file instead of being dropped, and replayed in bulk at the start of
+the next run. Entries that keep failing move to a dead-letter file, so a
+poison row is looked at by a person rather than retried forever.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from checkpoint import STATE_DIR
+
+SPOOL_FILE = os.path.join(STATE_DIR, 'spool.jsonl')
+DEAD_LETTER_FILE = os.path.join(STATE_DIR, 'dead_letter.jsonl')
+
+# Failed attempts before an entry goes to the dead-letter file
+MAX_ATTEMPTS = 3
+
+# HTTP statuses worth retrying as they are; other 4xx mean the rows were refused
+TRANSIENT_STATUSES = {401, 403, 408, 409, 429}
+
+
+def error_class(status=None, exc=None):
+    """'network', 'server' or 'rejected' for a failed write"""
+    if exc is not None:
+        return 'network'
+    if status >= 500 or status in TRANSIENT_STATUSES:
+        return 'server'
+    return 'rejected'
+
+
+class Spool:
+    """
+    Append-only JSON-lines spool of failed writes
+    Each entry is one upserted row or one child-table replacement, with
+    the error, its class and the attempt count. take() moves the file
+    aside, so entries that fail again during a replay are appended to a
+    fresh spool.
+    """
+
+    def __init__(self, path=SPOOL_FILE, dead_path=DEAD_LETTER_FILE, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.dead_path = dead_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    def _append(self, path, entries):
+        lines = [json.dumps(e, default=str) + '\n' for e in entries]
+        if not lines:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'a') as f:
+                f.writelines(lines)
+
+    def add(self, entries, error, cls):
+        """
+        Spool failed entries; each entry's 'attempts' counts earlier tries
+        Entries reaching max_attempts go to the dead-letter file instead.
+        Returns the number dead-lettered.
+        """
+        now = datetime.now().isoformat()
+        spooled = []
+        dead = []
+        for entry in entries:
+            entry = dict(entry, error=error, error_class=cls, attempts=entry.get('attempts', 0) + 1, failed_at=now)
+            (dead if entry['attempts'] >= self.max_attempts else spooled).append(entry)
+        self._append(self.path, spooled)
+        self._append(self.dead_path, dead)
+        return len(dead)
+
+    def take(self):
+        """
+        All spooled entries, oldest first, and the spool emptied
+        A spool left behind by a replay that was killed is picked up too.
+        """
+        taken = self.path + '.replaying'
+        with self._lock:
+            if os.path.exists(self.path):
+                with open(self.path) as src, open(taken, 'a') as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+        if not os.path.exists(taken):
+            return []
+        entries = []
+        with open(taken) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def done(self):
+        """Drop the entries returned by take() once they are replayed or respooled"""
+        try:
+            os.remove(self.path + '.replaying')
+        except FileNotFoundError:
+            pass
+
+    def count(self, dead=False):
+        try:
+            with open(self.dead_path if dead else self.path) as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0